@@ -0,0 +1,75 @@
+"""
+Commande Django pour reconstruire ou vérifier les soldes persistés des types de caisse
+Usage:
+    python manage.py recalculer_soldes_caisse
+    python manage.py recalculer_soldes_caisse --verifier
+    python manage.py recalculer_soldes_caisse --caissetype 3
+"""
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from caisse.models import CaisseType, SoldeCaisseType
+from caisse.services import recalculer_solde_caissetype
+
+
+class Command(BaseCommand):
+    help = 'Reconstruit (ou vérifie) le solde persisté de chaque type de caisse à partir des Caissetypemvt'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verifier',
+            action='store_true',
+            help='Compare seulement les soldes persistés au recalcul complet, sans rien modifier'
+        )
+        parser.add_argument(
+            '--caissetype',
+            type=int,
+            help='ID du type de caisse à traiter (par défaut : tous)'
+        )
+
+    def handle(self, *args, **options):
+        verifier = options['verifier']
+        caissetypes = CaisseType.objects.all()
+        if options['caissetype']:
+            caissetypes = caissetypes.filter(id=options['caissetype'])
+            if not caissetypes.exists():
+                raise CommandError(f"Type de caisse {options['caissetype']} introuvable")
+
+        soldes_persistes = {
+            solde.caissetype_id: solde
+            for solde in SoldeCaisseType.objects.filter(caissetype__in=caissetypes)
+        }
+
+        ecarts = 0
+        for caissetype in caissetypes:
+            attendu = recalculer_solde_caissetype(caissetype.id, sauvegarder=not verifier)
+
+            if not verifier:
+                self.stdout.write(
+                    f"{caissetype.nom}: entrées={attendu['total_entrees']} sorties={attendu['total_sorties']} "
+                    f"solde={attendu['solde']} mouvements={attendu['nombre_mouvements']}"
+                )
+                continue
+
+            persiste = soldes_persistes.get(caissetype.id)
+            if persiste is None:
+                ecarts += 1
+                self.stdout.write(self.style.WARNING(f"{caissetype.nom}: aucun solde persisté"))
+                continue
+
+            differences = [
+                f"{champ} persisté={getattr(persiste, champ)} attendu={attendu[champ]}"
+                for champ in ('total_entrees', 'total_sorties', 'solde', 'nombre_mouvements')
+                if Decimal(str(getattr(persiste, champ))) != Decimal(str(attendu[champ]))
+            ]
+            if differences:
+                ecarts += 1
+                self.stdout.write(self.style.ERROR(f"{caissetype.nom}: " + ', '.join(differences)))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{caissetype.nom}: OK (solde={persiste.solde})"))
+
+        if verifier:
+            if ecarts:
+                raise CommandError(f"{ecarts} type(s) de caisse avec un solde persisté incohérent")
+            self.stdout.write(self.style.SUCCESS('Tous les soldes persistés sont cohérents.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{caissetypes.count()} solde(s) de caisse reconstruit(s).'))
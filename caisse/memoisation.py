@@ -0,0 +1,132 @@
+"""
+MÉMOÏSATION DES CALCULS FINANCIERS DE LA CAISSE
+
+Les endpoints composites (résumé, répartition) et les rapports appellent plusieurs fois les
+mêmes calculs dans une même unité de travail : calculer_frais_gestion recalcule les intérêts
+déjà calculés par l'appelant, les sections d'un rapport reprennent les mêmes apports, etc.
+
+Les fonctions décorées par @memoiser (caisse/services.py) ne sont calculées qu'une fois par
+unité de travail et par jeu d'arguments, quand une mémoïsation est active :
+- une requête HTTP GET/HEAD (caisse.middleware.MemoisationCalculsMiddleware)
+- la génération d'un rapport (rapports.services.generer_contenu_rapport)
+- un bloc `with memoisation_calculs() as memo:` (commandes de gestion, scripts)
+
+Sans mémoïsation active, les fonctions sont appelées normalement. Les résultats sont partagés
+entre les appelants : ne pas les modifier. Toute écriture financière vide la mémoïsation active
+(caisse/signals.py).
+"""
+import functools
+import inspect
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+logger = logging.getLogger(__name__)
+
+_memoisation_active = ContextVar('caisse_memoisation_calculs', default=None)
+
+
+class MemoisationCalculs:
+    """
+    Résultats des calculs d'une unité de travail, indexés par (fonction, arguments)
+
+    Compteurs : `succes` (résultat réutilisé), `echecs` (résultat calculé), et le détail
+    par fonction dans `par_fonction`.
+    """
+
+    def __init__(self):
+        self._resultats = {}
+        self.succes = 0
+        self.echecs = 0
+        # Fonction -> {'succes', 'echecs'}
+        self.par_fonction = {}
+
+    def obtenir(self, nom, cle, calcul):
+        """Retourne le résultat mémorisé pour `cle`, ou l'obtient avec calcul() et le mémorise"""
+        compteur = self.par_fonction.setdefault(nom, {'succes': 0, 'echecs': 0})
+        if cle in self._resultats:
+            self.succes += 1
+            compteur['succes'] += 1
+            return self._resultats[cle]
+        self.echecs += 1
+        compteur['echecs'] += 1
+        resultat = calcul()
+        self._resultats[cle] = resultat
+        return resultat
+
+    def vider(self):
+        """Oublie les résultats mémorisés (après une écriture), sans remettre les compteurs à zéro"""
+        self._resultats.clear()
+
+    def statistiques(self):
+        return {
+            'succes': self.succes,
+            'echecs': self.echecs,
+            'par_fonction': self.par_fonction,
+        }
+
+
+def memoisation_active():
+    """Mémoïsation de l'unité de travail en cours, ou None"""
+    return _memoisation_active.get()
+
+
+@contextmanager
+def memoisation_calculs():
+    """
+    Active la mémoïsation des calculs de la caisse pour la durée du bloc
+
+    Un bloc imbriqué réutilise la mémoïsation déjà active (mêmes résultats, mêmes compteurs).
+
+    Exemple (commande de gestion) :
+        with memoisation_calculs() as memo:
+            ...
+        self.stdout.write(f"{memo.succes} calcul(s) réutilisé(s), {memo.echecs} effectué(s)")
+    """
+    memo = _memoisation_active.get()
+    if memo is not None:
+        yield memo
+        return
+    memo = MemoisationCalculs()
+    jeton = _memoisation_active.set(memo)
+    try:
+        yield memo
+    finally:
+        _memoisation_active.reset(jeton)
+        if memo.succes or memo.echecs:
+            logger.debug('Calculs caisse : %s réutilisé(s), %s effectué(s)', memo.succes, memo.echecs)
+
+
+def vider_memoisation():
+    """Vide la mémoïsation active (appelé après une écriture financière)"""
+    memo = _memoisation_active.get()
+    if memo is not None:
+        memo.vider()
+
+
+def memoiser(fonction):
+    """
+    Mémoïse une fonction de calcul dans la mémoïsation active, par arguments
+
+    Les arguments sont normalisés avec la signature de la fonction (positionnels, nommés,
+    valeurs par défaut) : f(20) et f(pourcentage=20) partagent le même résultat. Un appel
+    avec un argument non hachable (ex : liste d'IDs) n'est pas mémoïsé.
+    """
+    signature = inspect.signature(fonction)
+    nom = fonction.__name__
+
+    @functools.wraps(fonction)
+    def enveloppe(*args, **kwargs):
+        memo = _memoisation_active.get()
+        if memo is None:
+            return fonction(*args, **kwargs)
+        arguments = signature.bind(*args, **kwargs)
+        arguments.apply_defaults()
+        cle = (nom, tuple(arguments.arguments.items()))
+        try:
+            hash(cle)
+        except TypeError:
+            return fonction(*args, **kwargs)
+        return memo.obtenir(nom, cle, lambda: fonction(*args, **kwargs))
+
+    return enveloppe
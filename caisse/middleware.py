@@ -0,0 +1,24 @@
+"""
+Middleware de mémoïsation des calculs financiers de la caisse (voir caisse/memoisation.py)
+"""
+from .memoisation import memoisation_calculs
+
+
+class MemoisationCalculsMiddleware:
+    """
+    Active la mémoïsation des calculs de la caisse pour chaque requête en lecture (GET, HEAD) :
+    un endpoint composite ne calcule jamais deux fois les mêmes intérêts, frais ou apports.
+
+    Les requêtes d'écriture ne sont pas mémoïsées (un calcul après l'écriture doit la refléter).
+    """
+
+    METHODES_LECTURE = ('GET', 'HEAD')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method not in self.METHODES_LECTURE:
+            return self.get_response(request)
+        with memoisation_calculs():
+            return self.get_response(request)
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.25 on 2026-10-16 22:34
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caisse', '0006_dondirect_caissetypemvt_dondirect'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SoldeCaisseType',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_entrees', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Total des entrées', max_digits=18)),
+                ('total_sorties', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Total des sorties', max_digits=18)),
+                ('solde', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Solde (total_entrees - total_sorties)', max_digits=18)),
+                ('nombre_mouvements', models.PositiveIntegerField(default=0, help_text='Nombre de mouvements de la caisse')),
+                ('last_updated', models.DateTimeField(auto_now=True, help_text='Date de dernière mise à jour')),
+                ('caissetype', models.OneToOneField(help_text='Type de caisse', on_delete=django.db.models.deletion.CASCADE, related_name='solde', to='caisse.caissetype')),
+            ],
+            options={
+                'verbose_name': 'Solde de type de caisse',
+                'verbose_name_plural': 'Soldes de types de caisse',
+            },
+        ),
+    ]
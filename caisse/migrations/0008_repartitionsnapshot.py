@@ -0,0 +1,30 @@
+# Generated by Django 4.2.25 on 2026-10-16 22:38
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caisse', '0007_soldecaissetype'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RepartitionSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pourcentage_frais_gestion', models.DecimalField(decimal_places=2, help_text='Pourcentage des frais de gestion', max_digits=5)),
+                ('periode_mois', models.IntegerField(blank=True, help_text='Mois (1-12), NULL pour le total annuel', null=True)),
+                ('periode_annee', models.IntegerField(help_text='Année')),
+                ('resultat', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='Résultat complet de la répartition (JSON)')),
+                ('date_calcul', models.DateTimeField(auto_now=True, help_text='Date du calcul')),
+            ],
+            options={
+                'verbose_name': 'Snapshot de répartition des intérêts',
+                'verbose_name_plural': 'Snapshots de répartition des intérêts',
+                'indexes': [models.Index(fields=['periode_annee', 'periode_mois', 'pourcentage_frais_gestion'], name='caisse_repart_periode_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.25 on 2026-10-16 22:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caisse', '0008_repartitionsnapshot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='caissetypemvt',
+            index=models.Index(fields=['caissetype', '-date', '-created_at', '-id'], name='caisse_mvt_historique_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.25 on 2026-10-16 23:25
+
+from django.db import migrations, models
+import django.db.models.functions.comparison
+
+
+def vider_snapshots(apps, schema_editor):
+    """Les snapshots ne sont qu'un cache : les supprimer élimine d'éventuels doublons"""
+    apps.get_model('caisse', 'RepartitionSnapshot').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caisse', '0009_index_historique_mouvements'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenerationRepartition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('generation', models.BigIntegerField(default=0, help_text='Numéro de génération des snapshots')),
+            ],
+            options={
+                'verbose_name': 'Génération des snapshots de répartition',
+                'verbose_name_plural': 'Générations des snapshots de répartition',
+            },
+        ),
+        migrations.RunPython(vider_snapshots, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='repartitionsnapshot',
+            constraint=models.UniqueConstraint(models.F('pourcentage_frais_gestion'), django.db.models.functions.comparison.Coalesce(models.F('periode_mois'), models.Value(0)), models.F('periode_annee'), name='caisse_repart_unique_periode'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.25 on 2026-10-16 23:41
+
+from django.db import migrations, models
+
+
+def vider_snapshots(apps, schema_editor):
+    """Les snapshots ne sont qu'un cache : les supprimer évite les NULL et les doublons"""
+    apps.get_model('caisse', 'RepartitionSnapshot').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caisse', '0010_repartition_generation_unique'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='repartitionsnapshot',
+            name='caisse_repart_unique_periode',
+        ),
+        migrations.RunPython(vider_snapshots, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='repartitionsnapshot',
+            name='periode_mois',
+            field=models.IntegerField(default=0, help_text='Mois (1-12), 0 pour le total annuel'),
+        ),
+        migrations.AddConstraint(
+            model_name='repartitionsnapshot',
+            constraint=models.UniqueConstraint(fields=('pourcentage_frais_gestion', 'periode_mois', 'periode_annee'), name='caisse_repart_unique_periode'),
+        ),
+    ]
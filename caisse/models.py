@@ -1,4 +1,5 @@
 from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
 from decimal import Decimal
 from datetime import datetime, date
@@ -49,6 +50,10 @@ class Caissetypemvt(models.Model):
         verbose_name = "Mouvement de type de caisse"
         verbose_name_plural = "Mouvements de type de caisse"
         ordering = ['-date', '-created_at']
+        indexes = [
+            # Historique paginé par clé (voir historique_caissetype_queryset)
+            models.Index(fields=['caissetype', '-date', '-created_at', '-id'], name='caisse_mvt_historique_idx'),
+        ]
     
     def clean(self):
         """Valide qu'au moins une des 8 relations est remplie"""
@@ -65,6 +70,76 @@ class Caissetypemvt(models.Model):
         mouvement = self.remboursement or self.credit or self.donnatepargne or self.donnatpartsocial or self.fraisadhesion or self.depense or self.retrait or self.dondirect
         return f"{self.caissetype} - {mouvement} - {self.date}"
 
+class SoldeCaisseType(models.Model):
+    """
+    Solde courant persisté d'un type de caisse.
+    Mis à jour de façon incrémentale (transactionnelle) à chaque création, modification
+    ou suppression d'un Caissetypemvt, afin que la vérification du solde disponible
+    (crédits, retraits) soit une simple lecture au lieu d'un parcours de tout l'historique.
+    Reconstructible avec : python manage.py recalculer_soldes_caisse
+    """
+    caissetype = models.OneToOneField(CaisseType, on_delete=models.CASCADE, related_name='solde', help_text="Type de caisse")
+    total_entrees = models.DecimalField(max_digits=18, decimal_places=2, default=Decimal('0.00'), help_text="Total des entrées")
+    total_sorties = models.DecimalField(max_digits=18, decimal_places=2, default=Decimal('0.00'), help_text="Total des sorties")
+    solde = models.DecimalField(max_digits=18, decimal_places=2, default=Decimal('0.00'), help_text="Solde (total_entrees - total_sorties)")
+    nombre_mouvements = models.PositiveIntegerField(default=0, help_text="Nombre de mouvements de la caisse")
+    last_updated = models.DateTimeField(auto_now=True, help_text="Date de dernière mise à jour")
+
+    class Meta:
+        verbose_name = "Solde de type de caisse"
+        verbose_name_plural = "Soldes de types de caisse"
+
+    def __str__(self):
+        return f"{self.caissetype} - {self.solde}"
+
+class RepartitionSnapshot(models.Model):
+    """
+    Résultat complet (tous les membres) d'une répartition des intérêts, matérialisé
+    pour une combinaison (pourcentage_frais_gestion, periode_mois, periode_annee).
+    Évite de recalculer la répartition de toute la coopérative à chaque consultation.
+    Les snapshots sont invalidés (supprimés) à chaque écriture financière
+    (Credit, DonnatEpargne, DonnatPartSocial, Retrait, FraisAdhesion, Depenses, Membre, Compte).
+    periode_mois = 0 : total annuel (valeur non NULL : un NULL n'est jamais égal à un autre
+    NULL, la contrainte unique ne protégerait pas le total annuel).
+    """
+    pourcentage_frais_gestion = models.DecimalField(max_digits=5, decimal_places=2, help_text="Pourcentage des frais de gestion")
+    periode_mois = models.IntegerField(default=0, help_text="Mois (1-12), 0 pour le total annuel")
+    periode_annee = models.IntegerField(help_text="Année")
+    resultat = models.JSONField(encoder=DjangoJSONEncoder, help_text="Résultat complet de la répartition (JSON)")
+    date_calcul = models.DateTimeField(auto_now=True, help_text="Date du calcul")
+
+    class Meta:
+        verbose_name = "Snapshot de répartition des intérêts"
+        verbose_name_plural = "Snapshots de répartition des intérêts"
+        indexes = [
+            models.Index(fields=['periode_annee', 'periode_mois', 'pourcentage_frais_gestion'], name='caisse_repart_periode_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['pourcentage_frais_gestion', 'periode_mois', 'periode_annee'],
+                name='caisse_repart_unique_periode'
+            ),
+        ]
+
+    def __str__(self):
+        periode = f"{self.periode_mois:02d}/{self.periode_annee}" if self.periode_mois else f"{self.periode_annee}"
+        return f"Répartition {periode} ({self.pourcentage_frais_gestion}%)"
+
+class GenerationRepartition(models.Model):
+    """
+    Compteur de génération des snapshots de répartition (une seule ligne, pk=1).
+    Incrémenté à chaque invalidation : un calcul de répartition commencé avant une écriture
+    financière (génération différente à l'enregistrement) n'est pas enregistré en snapshot.
+    """
+    generation = models.BigIntegerField(default=0, help_text="Numéro de génération des snapshots")
+
+    class Meta:
+        verbose_name = "Génération des snapshots de répartition"
+        verbose_name_plural = "Générations des snapshots de répartition"
+
+    def __str__(self):
+        return f"Génération {self.generation}"
+
 class DonDirect(models.Model):
     """
     Modèle pour gérer les dons directs de personnes qui ne sont ni membres ni clients.
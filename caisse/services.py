@@ -2,6 +2,9 @@
 SERVICES - CALCULS FINANCIERS POUR LA CAISSE
 
 Tous les calculs financiers (intérêts, frais de gestion, répartition aux membres, etc.)
+
+Les calculs décorés par @memoiser ne sont effectués qu'une fois par requête GET ou par
+génération de rapport (voir caisse/memoisation.py).
 """
 
 from decimal import Decimal
@@ -9,6 +12,7 @@ from datetime import date, datetime
 from credits.models import Credit
 from membres.models import SouscriptionPartSocial, DonnatPartSocial, Compte, DonnatEpargne, SouscriptEpargne, Retrait
 from users.models import Membre, Client
+from .memoisation import memoiser, memoisation_calculs
 
 def calculer_interet_credit(credit):
     """
@@ -28,83 +32,117 @@ def calculer_interet_credit(credit):
     """
     return (credit.montant * credit.taux_interet) / Decimal('100')
 
+def _expression_interet_credit():
+    """Intérêt d'un crédit calculé en SQL : montant * taux_interet / 100 (même formule que calculer_interet_credit)"""
+    from django.db.models import F, Value, DecimalField, ExpressionWrapper
+    
+    return ExpressionWrapper(
+        F('montant') * F('taux_interet') / Value(Decimal('100')),
+        output_field=DecimalField(max_digits=20, decimal_places=4)
+    )
+
+def _montant_interet(valeur):
+    """Somme d'intérêts lue en base, arrondie au millionième (montant et taux ont 2 décimales)"""
+    return Decimal(str(valeur or 0)).quantize(Decimal('0.000001'))
+
+@memoiser
 def calculer_interets_tous_credits(periode_annee=None):
     """
     Calcule les intérêts de tous les crédits.
     
+    Les totaux sont agrégés en SQL (SUM(montant * taux_interet / 100) groupé par membre et
+    par client) : 3 requêtes quel que soit le nombre de crédits. Le détail par crédit n'est
+    pas inclus, il est paginé par interets_credits_queryset (GET /api/caisse/calculs/interets/credits/).
+    
     Args:
         periode_annee (int, optional): Année pour filtrer les crédits par date_octroi. Si None, calcule sur tous les crédits.
     
     Returns:
         dict: Dictionnaire avec les résultats des calculs
     """
-    # Utiliser only() pour ne récupérer que les champs nécessaires et éviter les erreurs de champs inexistants
-    # Cela évite que Django essaie d'accéder à des champs qui n'existent pas dans la base de données
-    credits = Credit.objects.only('id', 'montant', 'taux_interet', 'membre_id', 'client_id', 'date_octroi').select_related('membre', 'client')
+    from django.db.models import Count, Sum
+    
+    credits = Credit.objects.order_by()
     
     # Filtrer par année si periode_annee est spécifié
     if periode_annee is not None:
         credits = credits.filter(date_octroi__year=periode_annee)
     
-    # Intérêts par crédit
-    interets_par_credit = []
-    for credit in credits:
-        interet = calculer_interet_credit(credit)
-        interets_par_credit.append({
-            'credit_id': credit.id,
-            'montant': float(credit.montant),
-            'taux_interet': float(credit.taux_interet),
-            'interet': float(interet),
-            'membre': credit.membre.numero_compte if credit.membre else None,
-            'client': credit.client.numero_compte if credit.client else None
-        })
+    # Intérêt total global et nombre de crédits
+    totaux = credits.aggregate(interet_total=Sum(_expression_interet_credit()), nombre=Count('id'))
     
     # Intérêts par membre
-    interets_par_membre = {}
-    for credit in credits:
-        if credit.membre:
-            membre_id = credit.membre.id
-            membre_numero = credit.membre.numero_compte
-            # Gérer le nom selon le type de membre (physique ou morale)
-            if credit.membre.type_membre == 'MORALE':
-                membre_nom = credit.membre.raison_sociale or credit.membre.sigle or 'Entreprise'
-            else:
-                membre_nom = f"{credit.membre.nom or ''} {credit.membre.prenom or ''}".strip() or 'Personne physique'
-            
-            if membre_id not in interets_par_membre:
-                interets_par_membre[membre_id] = {
-                    'membre_id': membre_id,
-                    'membre_numero': membre_numero,
-                    'membre_nom': membre_nom,
-                    'interet_total': Decimal('0.00'),
-                    'nombre_credits': 0
-                }
-            
-            interet = calculer_interet_credit(credit)
-            interets_par_membre[membre_id]['interet_total'] += interet
-            interets_par_membre[membre_id]['nombre_credits'] += 1
-    
-    # Convertir en liste
-    interets_par_membre_list = []
-    for membre_id, data in interets_par_membre.items():
-        interets_par_membre_list.append({
-            'membre_id': data['membre_id'],
-            'membre_numero': data['membre_numero'],
-            'membre_nom': data['membre_nom'],
-            'interet_total': float(data['interet_total']),
-            'nombre_credits': data['nombre_credits']
-        })
+    sommes_membres = list(
+        credits.filter(membre__isnull=False).values('membre_id')
+        .annotate(interet_total=Sum(_expression_interet_credit()), nombre_credits=Count('id'))
+        .order_by('membre_id')
+    )
+    membres = Membre.objects.only(
+        'id', 'numero_compte', 'type_membre', 'raison_sociale', 'sigle', 'nom', 'prenom'
+    ).in_bulk([ligne['membre_id'] for ligne in sommes_membres])
+    interets_par_membre = [
+        {
+            'membre_id': ligne['membre_id'],
+            'membre_numero': membres[ligne['membre_id']].numero_compte,
+            'membre_nom': _nom_membre(membres[ligne['membre_id']]),
+            'interet_total': float(_montant_interet(ligne['interet_total'])),
+            'nombre_credits': ligne['nombre_credits']
+        }
+        for ligne in sommes_membres
+    ]
+    
+    # Intérêts par client
+    interets_par_client = [
+        {
+            'client_id': ligne['client_id'],
+            'client_numero': ligne['client__numero_compte'],
+            'client_nom': f"{ligne['client__nom'] or ''} {ligne['client__prenom'] or ''}".strip(),
+            'interet_total': float(_montant_interet(ligne['interet_total'])),
+            'nombre_credits': ligne['nombre_credits']
+        }
+        for ligne in credits.filter(client__isnull=False)
+        .values('client_id', 'client__numero_compte', 'client__nom', 'client__prenom')
+        .annotate(interet_total=Sum(_expression_interet_credit()), nombre_credits=Count('id'))
+        .order_by('client_id')
+    ]
     
-    # Intérêt total global - utiliser la même queryset pour éviter les problèmes
-    interet_total_global = sum([calculer_interet_credit(credit) for credit in credits])
+    return {
+        'interets_par_membre': interets_par_membre,
+        'interets_par_client': interets_par_client,
+        'interet_total_global': float(_montant_interet(totaux['interet_total'])),
+        'nombre_credits': totaux['nombre']
+    }
+
+def interets_credits_queryset(periode_annee=None, membre_id=None, client_id=None):
+    """
+    Crédits du détail des intérêts (à paginer), du plus récent au plus ancien.
     
+    L'ordre (date_octroi, id) décroissant est celui du modèle : le queryset se pagine par clé
+    (coopec.pagination.KeysetPagination). Chaque ligne se formate avec formater_interet_credit.
+    """
+    credits = Credit.objects.only(
+        'id', 'montant', 'taux_interet', 'date_octroi', 'membre__numero_compte', 'client__numero_compte'
+    ).select_related('membre', 'client')
+    if periode_annee is not None:
+        credits = credits.filter(date_octroi__year=periode_annee)
+    if membre_id is not None:
+        credits = credits.filter(membre_id=membre_id)
+    if client_id is not None:
+        credits = credits.filter(client_id=client_id)
+    return credits.order_by('-date_octroi', '-id')
+
+def formater_interet_credit(credit):
+    """Ligne du détail des intérêts d'un crédit"""
     return {
-        'interets_par_credit': interets_par_credit,
-        'interets_par_membre': interets_par_membre_list,
-        'interet_total_global': float(interet_total_global),
-        'nombre_credits': credits.count()
+        'credit_id': credit.id,
+        'montant': float(credit.montant),
+        'taux_interet': float(credit.taux_interet),
+        'interet': float(calculer_interet_credit(credit)),
+        'membre': credit.membre.numero_compte if credit.membre else None,
+        'client': credit.client.numero_compte if credit.client else None
     }
 
+@memoiser
 def calculer_frais_gestion(pourcentage=20, periode_annee=None):
     """
     Calcule les frais de gestion sur l'intérêt total global + les frais d'adhésion.
@@ -126,7 +164,7 @@ def calculer_frais_gestion(pourcentage=20, periode_annee=None):
     """
     from membres.models import FraisAdhesion
     
-    # Calculer d'abord les intérêts totaux
+    # Calculer d'abord les intérêts totaux (réutilisés si déjà calculés dans la mémoïsation active)
     resultats_interets = calculer_interets_tous_credits(periode_annee=periode_annee)
     interet_total_global = Decimal(str(resultats_interets['interet_total_global']))
     
@@ -199,17 +237,136 @@ def calculer_frais_gestion(pourcentage=20, periode_annee=None):
 # SERVICE 2.5 : CALCUL DU SOLDE DISPONIBLE PAR TYPE DE CAISSE (POUR CRÉDITS ET RETRAITS)
 # ============================================================================
 
+# Relations de Caissetypemvt qui représentent une entrée ou une sortie d'argent
+CHAMPS_ENTREES_CAISSE = ('remboursement', 'donnatepargne', 'donnatpartsocial', 'fraisadhesion', 'dondirect')
+CHAMPS_SORTIES_CAISSE = ('depense', 'retrait', 'credit')
+
+
+def calculer_contribution_objet(champ, objet):
+    """
+    Calcule la contribution d'une opération liée à un Caissetypemvt.
+    
+    Règles (identiques à calculer_totaux() dans CaisseTypeViewSet) :
+    - Remboursement, don d'épargne, don de part sociale, frais d'adhésion, don direct : entrée (montant)
+    - Dépense : sortie (pt = quantite × pu)
+    - Retrait : sortie (montant)
+    - Crédit : sortie, PRECOMPTE → montant_effectif (montant - intérêt), POSTCOMPTE → montant
+    
+    Args:
+        champ (str): Nom de la relation sur Caissetypemvt (ex: 'remboursement', 'credit')
+        objet: Instance liée (ou None)
+        
+    Returns:
+        tuple: (entree: Decimal, sortie: Decimal)
+    """
+    zero = Decimal('0.00')
+    if objet is None:
+        return zero, zero
+    
+    if champ in CHAMPS_ENTREES_CAISSE:
+        return Decimal(str(objet.montant or 0)), zero
+    
+    if champ == 'depense':
+        return zero, Decimal(str(objet.pt))
+    
+    if champ == 'retrait':
+        return zero, Decimal(str(objet.montant or 0))
+    
+    if champ == 'credit':
+        if objet.methode_interet == 'PRECOMPTE':
+            return zero, Decimal(str(objet.montant_effectif))
+        return zero, Decimal(str(objet.montant or 0))
+    
+    return zero, zero
+
+
+def calculer_contribution_mouvement(mouvement):
+    """
+    Calcule la contribution (entrée, sortie) d'un Caissetypemvt en additionnant
+    la contribution de chacune de ses relations renseignées.
+    
+    Returns:
+        tuple: (entree: Decimal, sortie: Decimal)
+    """
+    total_entree = Decimal('0.00')
+    total_sortie = Decimal('0.00')
+    for champ in CHAMPS_ENTREES_CAISSE + CHAMPS_SORTIES_CAISSE:
+        if getattr(mouvement, f'{champ}_id', None) is None:
+            continue
+        entree, sortie = calculer_contribution_objet(champ, getattr(mouvement, champ))
+        total_entree += entree
+        total_sortie += sortie
+    return total_entree, total_sortie
+
+
+def recalculer_solde_caissetype(caissetype_id, sauvegarder=True):
+    """
+    Recalcule entièrement le solde d'un type de caisse à partir de tous ses Caissetypemvt
+    (agrégation SQL sur tout l'historique) et, si demandé, met à jour le solde persisté.
+    
+    Utilisé pour initialiser le solde persisté, et par la commande recalculer_soldes_caisse.
+    
+    Args:
+        caissetype_id (int): ID du CaisseType
+        sauvegarder (bool): Enregistrer le résultat dans SoldeCaisseType
+        
+    Returns:
+        dict: {'total_entrees', 'total_sorties', 'solde', 'nombre_mouvements'} (Decimal / int)
+    """
+    from caisse.models import SoldeCaisseType
+    
+    totaux = calculer_totaux_par_caissetype(caissetype_ids=[caissetype_id]).get(caissetype_id)
+    
+    resultat = {
+        'total_entrees': totaux['total_entrees'] if totaux else Decimal('0.00'),
+        'total_sorties': totaux['total_sorties'] if totaux else Decimal('0.00'),
+        'solde': totaux['total_montant'] if totaux else Decimal('0.00'),
+        'nombre_mouvements': totaux['nombre_mouvements'] if totaux else 0,
+    }
+    
+    if sauvegarder:
+        SoldeCaisseType.objects.update_or_create(caissetype_id=caissetype_id, defaults=resultat)
+    
+    return resultat
+
+
+def appliquer_delta_solde_caissetype(caissetype_id, delta_entrees=Decimal('0.00'), delta_sorties=Decimal('0.00'), delta_mouvements=0):
+    """
+    Applique une variation au solde persisté d'un type de caisse.
+    
+    La mise à jour se fait avec des expressions F() dans une transaction (pas de
+    lecture-modification-écriture en Python), donc sans perte en cas d'accès concurrents.
+    Si le solde persisté n'existe pas encore, il est initialisé par un recalcul complet
+    (qui inclut déjà le mouvement courant) et le delta n'est pas appliqué.
+    """
+    from django.db import transaction
+    from django.db.models import F
+    from caisse.models import SoldeCaisseType
+    
+    if caissetype_id is None:
+        return
+    
+    with transaction.atomic():
+        lignes = SoldeCaisseType.objects.filter(caissetype_id=caissetype_id).update(
+            total_entrees=F('total_entrees') + delta_entrees,
+            total_sorties=F('total_sorties') + delta_sorties,
+            solde=F('solde') + delta_entrees - delta_sorties,
+            nombre_mouvements=F('nombre_mouvements') + delta_mouvements,
+        )
+        if lignes == 0:
+            recalculer_solde_caissetype(caissetype_id)
+
+
 def calculer_solde_caissetype_disponible(caissetype):
     """
     Calcule le solde disponible dans un type de caisse spécifique.
     Utilisé pour les crédits et les retraits.
     
     IMPORTANT : 
-    - Utilise la même logique que calculer_totaux() dans CaisseTypeViewSet
-    - Calcule total_montant = total_entrees - total_sorties basé sur Caissetypemvt
-    - Inclut TOUTES les entrées (remboursements, donations, frais d'adhésion, remboursements, donations, frais d'adhésion)
-    - Soustrait TOUTES les sorties (dépenses, retraits)
-    - Ne soustrait PAS les crédits actifs (ils sont déjà comptabilisés dans les sorties via Caissetypemvt)
+    - Lit le solde persisté (SoldeCaisseType), maintenu à chaque création/modification/suppression
+      de Caissetypemvt (voir caisse/signals.py) : une seule requête, quel que soit l'historique
+    - Même logique que calculer_totaux() dans CaisseTypeViewSet (voir calculer_contribution_objet)
+    - Si le solde persisté n'existe pas encore, il est initialisé par un recalcul complet
     
     Args:
         caissetype: Instance de CaisseType
@@ -221,77 +378,15 @@ def calculer_solde_caissetype_disponible(caissetype):
             'total_sorties': Decimal,     # Total des sorties
         }
     """
-    from caisse.models import Caissetypemvt
-    
-    # Récupérer tous les mouvements pour ce type de caisse
-    mouvements = Caissetypemvt.objects.filter(caissetype=caissetype)
+    from caisse.models import SoldeCaisseType
     
-    # Calculer le total en additionnant/soustrayant les montants selon le type
-    total_montant = Decimal('0.00')
-    total_entrees = Decimal('0.00')
-    total_sorties = Decimal('0.00')
+    solde_persiste = SoldeCaisseType.objects.filter(caissetype_id=caissetype.pk).values(
+        'total_entrees', 'total_sorties', 'solde'
+    ).first()
+    if solde_persiste is None:
+        solde_persiste = recalculer_solde_caissetype(caissetype.pk)
     
-    for mouvement in mouvements:
-                # Les opérations sont maintenant gérées via Caissetypemvt directement
-        
-        # Remboursement - toujours ajouter (entrée d'argent)
-        if mouvement.remboursement:
-            montant_remb = Decimal(str(mouvement.remboursement.montant))
-            total_montant += montant_remb
-            total_entrees += montant_remb
-        
-        # Donation épargne - toujours ajouter (entrée d'argent)
-        if mouvement.donnatepargne:
-            montant_epargne = Decimal(str(mouvement.donnatepargne.montant))
-            total_montant += montant_epargne
-            total_entrees += montant_epargne
-        
-        # Donation part sociale - toujours ajouter (entrée d'argent)
-        if mouvement.donnatpartsocial:
-            montant_part = Decimal(str(mouvement.donnatpartsocial.montant))
-            total_montant += montant_part
-            total_entrees += montant_part
-        
-        # Frais d'adhésion - toujours ajouter (entrée d'argent)
-        if mouvement.fraisadhesion:
-            montant_frais = Decimal(str(mouvement.fraisadhesion.montant))
-            total_montant += montant_frais
-            total_entrees += montant_frais
-        
-        # Dépense - toujours soustraire (sortie d'argent)
-        if mouvement.depense:
-            montant_depense = Decimal(str(mouvement.depense.pt))  # Utiliser la propriété pt (prix total)
-            total_montant -= montant_depense
-            total_sorties += montant_depense
-        
-        # Retrait - toujours soustraire (sortie d'argent)
-        if mouvement.retrait:
-            montant_retrait = Decimal(str(mouvement.retrait.montant))
-            total_montant -= montant_retrait
-            total_sorties += montant_retrait
-        
-        # Don direct - toujours ajouter (entrée d'argent)
-        if mouvement.dondirect:
-            montant_don = Decimal(str(mouvement.dondirect.montant))
-            total_montant += montant_don
-            total_entrees += montant_don
-        
-        # Crédit - toujours soustraire (sortie d'argent)
-        # IMPORTANT : Le montant soustrait dépend de la méthode d'intérêt :
-        # - PRECOMPTE : on soustrait montant_effectif (montant - intérêt) car c'est ce qui est réellement sorti
-        # - POSTCOMPTE : on soustrait montant (montant demandé) car c'est ce qui est réellement sorti
-        if mouvement.credit:
-            if mouvement.credit.methode_interet == 'PRECOMPTE':
-                # Pour PRECOMPTE : montant effectivement sorti = montant - intérêt
-                montant_credit = Decimal(str(mouvement.credit.montant_effectif))
-            else:  # POSTCOMPTE
-                # Pour POSTCOMPTE : montant effectivement sorti = montant demandé
-                montant_credit = Decimal(str(mouvement.credit.montant))
-            total_montant -= montant_credit
-            total_sorties += montant_credit
-    
-    # Le solde disponible est le total_montant (total_entrees - total_sorties)
-    solde_disponible = total_montant
+    solde_disponible = Decimal(str(solde_persiste['solde']))
     
     # S'assurer que le solde ne soit pas négatif
     if solde_disponible < 0:
@@ -299,188 +394,258 @@ def calculer_solde_caissetype_disponible(caissetype):
     
     return {
         'solde_disponible': solde_disponible,
-        'total_entrees': total_entrees,
-        'total_sorties': total_sorties,
+        'total_entrees': Decimal(str(solde_persiste['total_entrees'])),
+        'total_sorties': Decimal(str(solde_persiste['total_sorties'])),
     }
 
 # ============================================================================
-# SERVICE 3 : CALCUL DES APPORTS DES MEMBRES (PARTS SOCIALES + ÉPARGNES BLOQUÉES)
+# SERVICE 2.6 : TOTAUX DE TOUS LES TYPES DE CAISSE EN UNE SEULE REQUÊTE SQL
 # ============================================================================
 
-def calculer_apports_membre(membre, periode_mois=None, periode_annee=None):
+def _expression_entrees_mouvement():
     """
-    Calcule les apports d'un membre (parts sociales + épargnes bloquées + comptes en vue).
+    Expression SQL du montant entré en caisse par un Caissetypemvt
+    (remboursement + don d'épargne + don de part sociale + frais d'adhésion + don direct).
+    """
+    from django.db.models import F, Value, DecimalField
+    from django.db.models.functions import Coalesce
+    
+    zero = Value(Decimal('0.00'), output_field=DecimalField(max_digits=20, decimal_places=4))
+    expression = None
+    for champ in CHAMPS_ENTREES_CAISSE:
+        terme = Coalesce(F(f'{champ}__montant'), zero, output_field=DecimalField(max_digits=20, decimal_places=4))
+        expression = terme if expression is None else expression + terme
+    return expression
+
+
+def _expression_sorties_mouvement():
+    """
+    Expression SQL du montant sorti de caisse par un Caissetypemvt :
+    - Dépense : quantite × pu
+    - Retrait : montant
+    - Crédit PRECOMPTE : montant - (montant × taux_interet / 100) ; POSTCOMPTE : montant
+    """
+    from django.db.models import F, Q, Value, DecimalField, Case, When, ExpressionWrapper
+    from django.db.models.functions import Coalesce
     
-    IMPORTANT : 
-    - Les épargnes de type "BLOQUE" sont prises en compte via les donations d'épargne
-    - Les comptes en vue (VUE) sont pris en compte via les mouvements de type DEPOT
+    decimal_field = DecimalField(max_digits=20, decimal_places=4)
+    zero = Value(Decimal('0.00'), output_field=decimal_field)
+    
+    depense = Coalesce(
+        ExpressionWrapper(F('depense__quantite') * F('depense__pu'), output_field=decimal_field),
+        zero, output_field=decimal_field
+    )
+    retrait = Coalesce(F('retrait__montant'), zero, output_field=decimal_field)
+    credit = Case(
+        When(
+            credit__methode_interet='PRECOMPTE',
+            then=ExpressionWrapper(
+                F('credit__montant') - F('credit__montant') * F('credit__taux_interet') / Value(Decimal('100')),
+                output_field=decimal_field
+            )
+        ),
+        When(credit__isnull=False, then=F('credit__montant')),
+        default=zero,
+        output_field=decimal_field,
+    )
+    return depense + retrait + credit
+
+
+@memoiser
+def calculer_totaux_par_caissetype(date_debut=None, date_fin=None, caissetype_ids=None):
+    """
+    Calcule entrées / sorties / solde / nombre de mouvements de tous les types de caisse
+    en UNE seule requête SQL groupée (LEFT JOIN sur les opérations liées + Sum/Case conditionnels).
+    
+    Mêmes règles que calculer_contribution_objet() (voir SERVICE 2.5).
+    
+    Args:
+        date_debut (date, optional): Filtre Caissetypemvt.date >= date_debut
+        date_fin (date, optional): Filtre Caissetypemvt.date <= date_fin
+        caissetype_ids (list, optional): Limiter à certains types de caisse
+        
+    Returns:
+        dict: {caissetype_id: {
+            'total_entrees': Decimal,
+            'total_sorties': Decimal,
+            'total_montant': Decimal,   # total_entrees - total_sorties
+            'nombre_mouvements': int,
+        }}
+        Les types de caisse sans mouvement sont absents du dictionnaire.
+    """
+    from django.db.models import Sum, Count
+    from caisse.models import Caissetypemvt
+    
+    mouvements = Caissetypemvt.objects.all()
+    if caissetype_ids is not None:
+        mouvements = mouvements.filter(caissetype_id__in=caissetype_ids)
+    if date_debut:
+        mouvements = mouvements.filter(date__gte=date_debut)
+    if date_fin:
+        mouvements = mouvements.filter(date__lte=date_fin)
+    
+    lignes = (
+        mouvements
+        .order_by()
+        .values('caissetype_id')
+        .annotate(
+            total_entrees=Sum(_expression_entrees_mouvement()),
+            total_sorties=Sum(_expression_sorties_mouvement()),
+            nombre_mouvements=Count('id'),
+        )
+    )
+    
+    centimes = Decimal('0.01')
+    totaux = {}
+    for ligne in lignes:
+        total_entrees = Decimal(str(ligne['total_entrees'] or 0)).quantize(centimes)
+        total_sorties = Decimal(str(ligne['total_sorties'] or 0)).quantize(centimes)
+        totaux[ligne['caissetype_id']] = {
+            'total_entrees': total_entrees,
+            'total_sorties': total_sorties,
+            'total_montant': total_entrees - total_sorties,
+            'nombre_mouvements': ligne['nombre_mouvements'],
+        }
+    return totaux
+
+# ============================================================================
+# SERVICE 3 : CALCUL DES APPORTS DES MEMBRES (PARTS SOCIALES + ÉPARGNES BLOQUÉES)
+# ============================================================================
+
+# Mapping des mois (numéro -> valeur du champ mois de DonnatEpargne / DonnatPartSocial)
+MOIS_MAPPING = {
+    1: 'JANVIER', 2: 'FEVRIER', 3: 'MARS', 4: 'AVRIL',
+    5: 'MAI', 6: 'JUIN', 7: 'JUILLET', 8: 'AOUT',
+    9: 'SEPTEMBRE', 10: 'OCTOBRE', 11: 'NOVEMBRE', 12: 'DECEMBRE'
+}
+
+
+def _agreger_apports_par_membre(periode_mois=None, periode_annee=None, membre_ids=None):
+    """
+    Moteur ensembliste des apports : calcule pour tous les membres (ou ceux de membre_ids)
+    les parts sociales, épargnes bloquées, comptes en vue et crédits actifs
+    en un nombre FIXE de requêtes GROUP BY (4), quel que soit le nombre de membres.
+    
+    Règles de période (identiques au calcul historique membre par membre) :
+    - Mois + année : dons de parts sociales du mois (champ mois) de l'année (date_donnat) ;
+      dons d'épargne du mois et retraits du mois/année, uniquement pour les souscriptions
+      d'épargne dont la date de souscription est dans l'année
+    - Année seule : parts sociales cumulées depuis le début ; dons d'épargne des 12 mois
+      et retraits de l'année, pour les souscriptions d'épargne souscrites dans l'année
+    - Sans période : cumul depuis le début (dons - retraits)
     
     Args:
-        membre (Membre): Le membre concerné
         periode_mois (int, optional): Mois pour filtrer (1-12)
         periode_annee (int, optional): Année pour filtrer
+        membre_ids (list, optional): Limiter le calcul à ces membres
     
     Returns:
-        dict: Dictionnaire avec les apports calculés
+        dict: {membre_id: {
+            'montant_parts_sociales': Decimal,
+            'montant_epargnes_bloquees': Decimal,
+            'montant_comptes_vue': Decimal,
+            'total_credits_actifs': Decimal,
+        }}
     """
-    # Mapping des mois
-    MOIS_MAPPING = {
-        1: 'JANVIER', 2: 'FEVRIER', 3: 'MARS', 4: 'AVRIL',
-        5: 'MAI', 6: 'JUIN', 7: 'JUILLET', 8: 'AOUT',
-        9: 'SEPTEMBRE', 10: 'OCTOBRE', 11: 'NOVEMBRE', 12: 'DECEMBRE'
+    from collections import defaultdict
+    from django.db.models import Sum
+    
+    apports = defaultdict(lambda: {
+        'montant_parts_sociales': Decimal('0.00'),
+        'montant_epargnes_bloquees': Decimal('0.00'),
+        'montant_comptes_vue': Decimal('0.00'),
+        'total_credits_actifs': Decimal('0.00'),
+    })
+    champ_par_type_compte = {
+        'BLOQUE': 'montant_epargnes_bloquees',
+        'VUE': 'montant_comptes_vue',
     }
     
-    # === CALCULER LES PARTS SOCIALES ===
-    montant_parts_sociales = Decimal('0.00')
-    
-    # Récupérer toutes les souscriptions de parts sociales du membre
-    souscriptions = SouscriptionPartSocial.objects.filter(membre=membre)
-    
-    for souscription in souscriptions:
-        # Filtrer par période si spécifiée
-        if periode_mois and periode_annee:
-            # Récupérer les donations du mois/année spécifiés
-            mois_nom = MOIS_MAPPING.get(periode_mois)
-            if mois_nom:
-                donations = DonnatPartSocial.objects.filter(
-                    souscription_part_social=souscription,
-                    mois=mois_nom,
-                    date_donnat__year=periode_annee
-                )
-                montant_parts_sociales += sum([d.montant for d in donations])
-        else:
-            # Toutes les donations (cumul depuis le début)
-            montant_parts_sociales += souscription.montant_total_verse
+    mode_mois = bool(periode_mois and periode_annee)
+    mode_annee = not mode_mois and bool(periode_annee)
+    mois_nom = MOIS_MAPPING.get(periode_mois) if mode_mois else None
+    
+    # === 1. PARTS SOCIALES (GROUP BY membre) ===
+    dons_parts = DonnatPartSocial.objects.filter(souscription_part_social__isnull=False)
+    if membre_ids is not None:
+        dons_parts = dons_parts.filter(souscription_part_social__membre_id__in=membre_ids)
+    if mode_mois:
+        dons_parts = dons_parts.filter(mois=mois_nom, date_donnat__year=periode_annee)
+    
+    for ligne in dons_parts.order_by().values('souscription_part_social__membre_id').annotate(total=Sum('montant')):
+        apports[ligne['souscription_part_social__membre_id']]['montant_parts_sociales'] += ligne['total'] or Decimal('0.00')
+    
+    # === 2. DONS D'ÉPARGNE (GROUP BY membre, type de compte) ===
+    dons_epargne = DonnatEpargne.objects.filter(souscriptEpargne__compte__titulaire_membre__isnull=False)
+    retraits = Retrait.objects.filter(souscriptEpargne__compte__titulaire_membre__isnull=False)
+    if membre_ids is not None:
+        dons_epargne = dons_epargne.filter(souscriptEpargne__compte__titulaire_membre_id__in=membre_ids)
+        retraits = retraits.filter(souscriptEpargne__compte__titulaire_membre_id__in=membre_ids)
+    if mode_mois:
+        dons_epargne = dons_epargne.filter(
+            mois=mois_nom,
+            souscriptEpargne__date_souscription__year=periode_annee
+        )
+        retraits = retraits.filter(
+            date_operation__month=periode_mois,
+            date_operation__year=periode_annee,
+            souscriptEpargne__date_souscription__year=periode_annee
+        )
+        if mois_nom is None:
+            dons_epargne = dons_epargne.none()
+            retraits = retraits.none()
+    elif mode_annee:
+        dons_epargne = dons_epargne.filter(
+            mois__in=list(MOIS_MAPPING.values()),
+            souscriptEpargne__date_souscription__year=periode_annee
+        )
+        retraits = retraits.filter(
+            date_operation__year=periode_annee,
+            souscriptEpargne__date_souscription__year=periode_annee
+        )
     
-    # === CALCULER LES ÉPARGNES BLOQUÉES (UNIQUEMENT TYPE BLOQUE) ===
-    montant_epargnes_bloquees = Decimal('0.00')
+    cle_membre = 'souscriptEpargne__compte__titulaire_membre_id'
+    cle_type = 'souscriptEpargne__compte__type_compte'
     
-    # Récupérer les comptes bloqués du membre
-    comptes_bloques = Compte.objects.filter(
-        titulaire_membre=membre,
-        type_compte='BLOQUE'
-    )
+    for ligne in dons_epargne.order_by().values(cle_membre, cle_type).annotate(total=Sum('montant')):
+        champ = champ_par_type_compte.get(ligne[cle_type])
+        if champ:
+            apports[ligne[cle_membre]][champ] += ligne['total'] or Decimal('0.00')
     
-    for compte in comptes_bloques:
-        # Récupérer les souscriptions d'épargne sur ce compte
-        souscriptions_epargne = SouscriptEpargne.objects.filter(compte=compte)
-        
-        for souscription_epargne in souscriptions_epargne:
-            # Filtrer par période si spécifiée
-            if periode_mois and periode_annee:
-                # Récupérer les donations du mois spécifié
-                mois_nom = MOIS_MAPPING.get(periode_mois)
-                if mois_nom:
-                    donations = DonnatEpargne.objects.filter(
-                        souscriptEpargne=souscription_epargne,
-                        mois=mois_nom
-                    )
-                    # Filtrer par année : on utilise la date de souscription de l'épargne
-                    if souscription_epargne.date_souscription.year == periode_annee:
-                        montant_dons = sum([d.montant for d in donations])
-                        # Soustraire les retraits de la période
-                        retraits = Retrait.objects.filter(
-                            souscriptEpargne=souscription_epargne,
-                            date_operation__month=periode_mois,
-                            date_operation__year=periode_annee
-                        )
-                        montant_retraits = sum([r.montant for r in retraits])
-                        montant_epargnes_bloquees += montant_dons - montant_retraits
-                    # Si l'année ne correspond pas, on n'ajoute rien (0 pour cette période)
-            elif periode_annee:
-                # Si seulement l'année est fournie, sommer tous les mois de l'année
-                for month_num in range(1, 13):
-                    mois_nom = MOIS_MAPPING.get(month_num)
-                    if mois_nom:
-                        donations = DonnatEpargne.objects.filter(
-                            souscriptEpargne=souscription_epargne,
-                            mois=mois_nom
-                        )
-                        if souscription_epargne.date_souscription.year == periode_annee:
-                            montant_dons = sum([d.montant for d in donations])
-                            # Soustraire les retraits du mois
-                            retraits = Retrait.objects.filter(
-                                souscriptEpargne=souscription_epargne,
-                                date_operation__month=month_num,
-                                date_operation__year=periode_annee
-                            )
-                            montant_retraits = sum([r.montant for r in retraits])
-                            montant_epargnes_bloquees += montant_dons - montant_retraits
-            else:
-                # Toutes les donations (cumul depuis le début) - utiliser solde_epargne
-                montant_epargnes_bloquees += souscription_epargne.solde_epargne
-    
-    # === CALCULER LES COMPTES EN VUE (TYPE VUE) ===
-    montant_comptes_vue = Decimal('0.00')
-    
-    # Récupérer les comptes en vue du membre
-    comptes_vue = Compte.objects.filter(
-        titulaire_membre=membre,
-        type_compte='VUE'
-    )
+    # === 3. RETRAITS (GROUP BY membre, type de compte) ===
+    for ligne in retraits.order_by().values(cle_membre, cle_type).annotate(total=Sum('montant')):
+        champ = champ_par_type_compte.get(ligne[cle_type])
+        if champ:
+            apports[ligne[cle_membre]][champ] -= ligne['total'] or Decimal('0.00')
     
-    # Calculer les épargnes sur comptes VUE (via DonnatEpargne)
-    for compte in comptes_vue:
-        # Récupérer les souscriptions d'épargne sur ce compte
-        souscriptions_epargne = SouscriptEpargne.objects.filter(compte=compte)
-        
-        for souscription_epargne in souscriptions_epargne:
-            # Filtrer par période si spécifiée
-            if periode_mois and periode_annee:
-                # Récupérer les donations du mois spécifié
-                mois_nom = MOIS_MAPPING.get(periode_mois)
-                if mois_nom:
-                    donations = DonnatEpargne.objects.filter(
-                        souscriptEpargne=souscription_epargne,
-                        mois=mois_nom
-                    )
-                    # Filtrer par année : on utilise la date de souscription de l'épargne
-                    if souscription_epargne.date_souscription.year == periode_annee:
-                        montant_dons = sum([d.montant for d in donations])
-                        # Soustraire les retraits de la période
-                        retraits = Retrait.objects.filter(
-                            souscriptEpargne=souscription_epargne,
-                            date_operation__month=periode_mois,
-                            date_operation__year=periode_annee
-                        )
-                        montant_retraits = sum([r.montant for r in retraits])
-                        montant_comptes_vue += montant_dons - montant_retraits
-                    # Si l'année ne correspond pas, on n'ajoute rien (0 pour cette période)
-            elif periode_annee:
-                # Si seulement l'année est fournie, sommer tous les mois de l'année
-                for month_num in range(1, 13):
-                    mois_nom = MOIS_MAPPING.get(month_num)
-                    if mois_nom:
-                        donations = DonnatEpargne.objects.filter(
-                            souscriptEpargne=souscription_epargne,
-                            mois=mois_nom
-                        )
-                        if souscription_epargne.date_souscription.year == periode_annee:
-                            montant_dons = sum([d.montant for d in donations])
-                            # Soustraire les retraits du mois
-                            retraits = Retrait.objects.filter(
-                                souscriptEpargne=souscription_epargne,
-                                date_operation__month=month_num,
-                                date_operation__year=periode_annee
-                            )
-                            montant_retraits = sum([r.montant for r in retraits])
-                            montant_comptes_vue += montant_dons - montant_retraits
-            else:
-                # Toutes les donations (cumul depuis le début) - utiliser solde_epargne
-                montant_comptes_vue += souscription_epargne.solde_epargne
-    
-    # Note: Les dépôts directs sur comptes VUE (sans souscription d'épargne) 
-    # sont gérés via DonnatEpargne liés à des souscriptions d'épargne.
-    # Le modèle Mouvement a été supprimé, donc on ne calcule que les épargnes via DonnatEpargne.
-    
-    # === CALCULER LES CRÉDITS ACTIFS DU MEMBRE ===
+    # === 4. CRÉDITS ACTIFS (GROUP BY membre) ===
     # Les crédits actifs (EN_COURS ou ECHEANCE_DEPASSEE) représentent l'argent prêté
-    # On soustrait le solde_restant (argent encore dû) des apports
     credits_actifs = Credit.objects.filter(
-        membre=membre,
+        membre__isnull=False,
         statut__in=['EN_COURS', 'ECHEANCE_DEPASSEE']
     )
-    total_credits_actifs = sum([c.solde_restant for c in credits_actifs])
+    if membre_ids is not None:
+        credits_actifs = credits_actifs.filter(membre_id__in=membre_ids)
+    
+    for ligne in credits_actifs.order_by().values('membre_id').annotate(total=Sum('solde_restant')):
+        apports[ligne['membre_id']]['total_credits_actifs'] += ligne['total'] or Decimal('0.00')
+    
+    return apports
+
+
+def _nom_membre(membre):
+    """Nom affiché d'un membre selon son type (physique ou morale)"""
+    if membre.type_membre == 'MORALE':
+        return membre.raison_sociale or membre.sigle or 'Entreprise'
+    return f"{membre.nom or ''} {membre.prenom or ''}".strip() or 'Personne physique'
+
+
+def _formater_apports_membre(membre, montants):
+    """Construit le dictionnaire d'apports d'un membre à partir des montants agrégés"""
+    montant_parts_sociales = montants['montant_parts_sociales']
+    montant_epargnes_bloquees = montants['montant_epargnes_bloquees']
+    montant_comptes_vue = montants['montant_comptes_vue']
+    total_credits_actifs = montants['total_credits_actifs']
     
     # Calculer le total des apports bruts
     total_apports_bruts = montant_parts_sociales + montant_epargnes_bloquees + montant_comptes_vue
@@ -488,16 +653,10 @@ def calculer_apports_membre(membre, periode_mois=None, periode_annee=None):
     # Soustraire les crédits actifs pour obtenir l'argent disponible
     total_apports = max(Decimal('0.00'), total_apports_bruts - total_credits_actifs)
     
-    # Gérer le nom selon le type de membre (physique ou morale)
-    if membre.type_membre == 'MORALE':
-        membre_nom = membre.raison_sociale or membre.sigle or 'Entreprise'
-    else:
-        membre_nom = f"{membre.nom or ''} {membre.prenom or ''}".strip() or 'Personne physique'
-    
     return {
         'membre_id': membre.id,
         'membre_numero': membre.numero_compte,
-        'membre_nom': membre_nom,
+        'membre_nom': _nom_membre(membre),
         'montant_parts_sociales': float(montant_parts_sociales),
         'montant_epargnes_bloquees': float(montant_epargnes_bloquees),
         'montant_comptes_vue': float(montant_comptes_vue),
@@ -505,6 +664,59 @@ def calculer_apports_membre(membre, periode_mois=None, periode_annee=None):
         'total_apports': float(total_apports)
     }
 
+
+@memoiser
+def calculer_apports_membre(membre, periode_mois=None, periode_annee=None):
+    """
+    Calcule les apports d'un membre (parts sociales + épargnes bloquées + comptes en vue).
+    
+    IMPORTANT : 
+    - Les épargnes de type "BLOQUE" sont prises en compte via les donations d'épargne
+    - Les comptes en vue (VUE) sont pris en compte via les donations d'épargne
+    - Les retraits de la période sont soustraits ; les crédits actifs (solde_restant) aussi
+    - Utilise le moteur groupé _agreger_apports_par_membre (nombre de requêtes constant)
+    
+    Args:
+        membre (Membre): Le membre concerné
+        periode_mois (int, optional): Mois pour filtrer (1-12)
+        periode_annee (int, optional): Année pour filtrer
+    
+    Returns:
+        dict: Dictionnaire avec les apports calculés
+    """
+    apports = _agreger_apports_par_membre(periode_mois, periode_annee, membre_ids=[membre.id])
+    return _formater_apports_membre(membre, apports[membre.id])
+
+
+@memoiser
+def _total_credits_actifs_global():
+    """
+    Total des crédits actifs (EN_COURS ou ECHEANCE_DEPASSEE) calculé en SQL.
+    IMPORTANT : Le montant dépend de la méthode d'intérêt :
+    - PRECOMPTE : montant_effectif (montant - interet) car c'est ce qui est réellement sorti
+    - POSTCOMPTE : montant (montant emprunté) car c'est ce qui est réellement sorti
+    """
+    from django.db.models import F, Sum, Value, DecimalField, Case, When, ExpressionWrapper
+    
+    decimal_field = DecimalField(max_digits=20, decimal_places=4)
+    montant_sorti = Case(
+        When(
+            methode_interet='PRECOMPTE',
+            then=ExpressionWrapper(
+                F('montant') - F('montant') * F('taux_interet') / Value(Decimal('100')),
+                output_field=decimal_field
+            )
+        ),
+        default=F('montant'),
+        output_field=decimal_field,
+    )
+    total = Credit.objects.filter(
+        statut__in=['EN_COURS', 'ECHEANCE_DEPASSEE']
+    ).aggregate(total=Sum(montant_sorti))['total']
+    return Decimal(str(total or 0))
+
+
+@memoiser
 def calculer_apports_tous_membres(periode_mois=None, periode_annee=None):
     """
     Calcule les apports de tous les membres ayant des apports (épargnes, parts sociales).
@@ -515,6 +727,7 @@ def calculer_apports_tous_membres(periode_mois=None, periode_annee=None):
     - Si un membre n'a pas d'apports dans cette période, il n'apparaît pas dans les résultats.
     - Le total_apports_global représente l'argent disponible dans la caisse après avoir soustrait
       les crédits actifs (EN_COURS ou ECHEANCE_DEPASSEE). C'est l'argent disponible pour prêter.
+    - Nombre de requêtes constant (requêtes GROUP BY), quel que soit le nombre de membres.
     
     Args:
         periode_mois (int, optional): Mois pour filtrer (1-12)
@@ -525,64 +738,37 @@ def calculer_apports_tous_membres(periode_mois=None, periode_annee=None):
             - total_apports_global: Apports bruts - crédits actifs (argent disponible)
             - total_credits_actifs: Total des crédits actifs (argent prêté)
     """
-    # Inclure tous les membres qui ont des apports (épargnes, parts sociales)
-    # même s'ils ne sont pas encore actifs, car l'argent est dans la caisse
-    membres_actifs = Membre.objects.all()
+    apports_agreges = _agreger_apports_par_membre(periode_mois, periode_annee)
+    
+    # Ne garder que les membres qui ont des apports dans la période
+    # (même s'ils ne sont pas encore actifs, car l'argent est dans la caisse)
+    membre_ids_avec_apports = [
+        membre_id for membre_id, montants in apports_agreges.items()
+        if montants['montant_parts_sociales'] + montants['montant_epargnes_bloquees'] + montants['montant_comptes_vue'] != 0
+    ]
+    membres = Membre.objects.filter(id__in=membre_ids_avec_apports).only(
+        'id', 'numero_compte', 'type_membre', 'raison_sociale', 'sigle', 'nom', 'prenom'
+    )
     
     apports_par_membre = []
     total_parts_sociales = Decimal('0.00')
     total_epargnes_bloquees = Decimal('0.00')
     total_comptes_vue = Decimal('0.00')
     
-    for membre in membres_actifs:
-        # Calculer les apports du membre pour la période spécifiée
-        # Si période spécifiée et membre n'a pas donné dans cette période, apports = 0
-        apports = calculer_apports_membre(membre, periode_mois, periode_annee)
-        
-        # Calculer le total des apports du membre
-        total_apports_membre = (
-            apports['montant_parts_sociales'] + 
-            apports['montant_epargnes_bloquees'] + 
-            apports.get('montant_comptes_vue', 0)
-        )
-        
-        # Si une période est spécifiée et que le membre n'a aucun apport dans cette période,
-        # on ne l'inclut pas dans les résultats
-        if periode_mois is not None or periode_annee is not None:
-            if total_apports_membre == 0:
-                # Ne pas inclure ce membre s'il n'a pas d'apports dans la période
-                continue
-        else:
-            # Même sans période, ne pas inclure les membres qui n'ont aucun apport
-            if total_apports_membre == 0:
-                continue
+    for membre in membres:
+        montants = apports_agreges[membre.id]
+        apports_par_membre.append(_formater_apports_membre(membre, montants))
         
-        # Ajouter le membre avec ses apports
-        apports_par_membre.append(apports)
-        
-        total_parts_sociales += Decimal(str(apports['montant_parts_sociales']))
-        total_epargnes_bloquees += Decimal(str(apports['montant_epargnes_bloquees']))
-        total_comptes_vue += Decimal(str(apports.get('montant_comptes_vue', 0)))
+        total_parts_sociales += montants['montant_parts_sociales']
+        total_epargnes_bloquees += montants['montant_epargnes_bloquees']
+        total_comptes_vue += montants['montant_comptes_vue']
     
     # Calculer le total des apports bruts
     total_apports_bruts = total_parts_sociales + total_epargnes_bloquees + total_comptes_vue
     
     # Calculer le total des crédits actifs (EN_COURS ou ECHEANCE_DEPASSEE)
     # Ce sont les crédits qui représentent de l'argent prêté et non encore remboursé
-    # IMPORTANT : Le montant soustrait dépend de la méthode d'intérêt :
-    # - PRECOMPTE : on soustrait montant_effectif (montant - interet) car c'est ce qui est réellement sorti
-    # - POSTCOMPTE : on soustrait montant (montant emprunté) car c'est ce qui est réellement sorti
-    credits_actifs = Credit.objects.filter(
-        statut__in=['EN_COURS', 'ECHEANCE_DEPASSEE']
-    )
-    total_credits_actifs = Decimal('0.00')
-    for credit in credits_actifs:
-        if credit.methode_interet == 'PRECOMPTE':
-            # Pour PRECOMPTE : on soustrait montant_effectif (montant - interet)
-            total_credits_actifs += credit.montant_effectif
-        else:  # POSTCOMPTE
-            # Pour POSTCOMPTE : on soustrait montant (montant emprunté)
-            total_credits_actifs += credit.montant
+    total_credits_actifs = _total_credits_actifs_global()
     
     # Le total_apports_global représente l'argent disponible dans la caisse
     # après avoir soustrait les crédits actifs (argent prêté)
@@ -603,10 +789,194 @@ def calculer_apports_tous_membres(periode_mois=None, periode_annee=None):
         'periode_annee': periode_annee
     }
 
+def _agreger_apports_mensuels_par_membre(periode_annee):
+    """
+    Pivot mensuel des apports d'une année : calcule, pour chacun des 12 mois, les apports
+    de chaque membre avec les mêmes règles que le mode « mois + année » de
+    _agreger_apports_par_membre, mais en une seule passe (4 requêtes GROUP BY au total,
+    groupées par membre / type de compte / mois) au lieu de 12 calculs complets.
+    
+    Args:
+        periode_annee (int): Année
+    
+    Returns:
+        tuple: (apports_par_mois, credits_actifs_par_membre)
+            - apports_par_mois: {mois (1-12): {membre_id: {'montant_parts_sociales', 'montant_epargnes_bloquees', 'montant_comptes_vue'}}}
+            - credits_actifs_par_membre: {membre_id: Decimal}
+    """
+    from collections import defaultdict
+    from django.db.models import Sum
+    from django.db.models.functions import ExtractMonth
+    
+    numero_par_mois = {nom: numero for numero, nom in MOIS_MAPPING.items()}
+    champ_par_type_compte = {
+        'BLOQUE': 'montant_epargnes_bloquees',
+        'VUE': 'montant_comptes_vue',
+    }
+    apports_par_mois = defaultdict(lambda: defaultdict(lambda: {
+        'montant_parts_sociales': Decimal('0.00'),
+        'montant_epargnes_bloquees': Decimal('0.00'),
+        'montant_comptes_vue': Decimal('0.00'),
+    }))
+    
+    # === 1. PARTS SOCIALES (GROUP BY membre, mois) ===
+    dons_parts = DonnatPartSocial.objects.filter(
+        souscription_part_social__isnull=False,
+        mois__in=list(MOIS_MAPPING.values()),
+        date_donnat__year=periode_annee
+    )
+    for ligne in dons_parts.order_by().values('souscription_part_social__membre_id', 'mois').annotate(total=Sum('montant')):
+        mois = numero_par_mois[ligne['mois']]
+        apports_par_mois[mois][ligne['souscription_part_social__membre_id']]['montant_parts_sociales'] += ligne['total'] or Decimal('0.00')
+    
+    cle_membre = 'souscriptEpargne__compte__titulaire_membre_id'
+    cle_type = 'souscriptEpargne__compte__type_compte'
+    
+    # === 2. DONS D'ÉPARGNE (GROUP BY membre, type de compte, mois) ===
+    # Seules les souscriptions d'épargne souscrites dans l'année sont prises en compte
+    dons_epargne = DonnatEpargne.objects.filter(
+        souscriptEpargne__compte__titulaire_membre__isnull=False,
+        mois__in=list(MOIS_MAPPING.values()),
+        souscriptEpargne__date_souscription__year=periode_annee
+    )
+    for ligne in dons_epargne.order_by().values(cle_membre, cle_type, 'mois').annotate(total=Sum('montant')):
+        champ = champ_par_type_compte.get(ligne[cle_type])
+        if champ:
+            apports_par_mois[numero_par_mois[ligne['mois']]][ligne[cle_membre]][champ] += ligne['total'] or Decimal('0.00')
+    
+    # === 3. RETRAITS (GROUP BY membre, type de compte, mois de l'opération) ===
+    retraits = Retrait.objects.filter(
+        souscriptEpargne__compte__titulaire_membre__isnull=False,
+        date_operation__year=periode_annee,
+        souscriptEpargne__date_souscription__year=periode_annee
+    ).annotate(mois_operation=ExtractMonth('date_operation'))
+    for ligne in retraits.order_by().values(cle_membre, cle_type, 'mois_operation').annotate(total=Sum('montant')):
+        champ = champ_par_type_compte.get(ligne[cle_type])
+        if champ:
+            apports_par_mois[ligne['mois_operation']][ligne[cle_membre]][champ] -= ligne['total'] or Decimal('0.00')
+    
+    # === 4. CRÉDITS ACTIFS (GROUP BY membre) - indépendants du mois ===
+    credits_actifs_par_membre = {
+        ligne['membre_id']: ligne['total'] or Decimal('0.00')
+        for ligne in Credit.objects.filter(
+            membre__isnull=False,
+            statut__in=['EN_COURS', 'ECHEANCE_DEPASSEE']
+        ).order_by().values('membre_id').annotate(total=Sum('solde_restant'))
+    }
+    
+    return apports_par_mois, credits_actifs_par_membre
+
+
+@memoiser
+def calculer_apports_annuels_membres(periode_annee):
+    """
+    Calcule les apports annuels de tous les membres : somme des apports mensuels de l'année
+    (même résultat que l'addition des 12 appels calculer_apports_tous_membres(mois, annee)),
+    calculée en une seule passe grâce au pivot mensuel _agreger_apports_mensuels_par_membre.
+    
+    IMPORTANT :
+    - Pour chaque mois, un membre sans apport dans le mois n'est pas compté pour ce mois
+    - total_apports d'un membre = somme sur les mois de max(0, apports bruts du mois - crédits actifs)
+    - total_apports_global = parts sociales + épargnes bloquées + comptes en vue (sans déduire les crédits)
+    
+    Args:
+        periode_annee (int): Année
+    
+    Returns:
+        dict: apports_par_membre, total_parts_sociales, total_epargnes_bloquees,
+              total_comptes_vue, total_apports_global
+    """
+    apports_par_mois, credits_actifs_par_membre = _agreger_apports_mensuels_par_membre(periode_annee)
+    
+    membre_ids = set()
+    for apports_mois in apports_par_mois.values():
+        membre_ids.update(apports_mois.keys())
+    membres = list(Membre.objects.filter(id__in=membre_ids).only(
+        'id', 'numero_compte', 'type_membre', 'raison_sociale', 'sigle', 'nom', 'prenom'
+    ))
+    
+    apports_par_membre_annuel = {}
+    total_parts_sociales_annuel = Decimal('0.00')
+    total_epargnes_bloquees_annuel = Decimal('0.00')
+    total_comptes_vue_annuel = Decimal('0.00')
+    
+    for mois in range(1, 13):
+        apports_mois = apports_par_mois.get(mois, {})
+        for membre in membres:
+            montants = apports_mois.get(membre.id)
+            if montants is None:
+                continue
+            total_apports_bruts = (
+                montants['montant_parts_sociales'] +
+                montants['montant_epargnes_bloquees'] +
+                montants['montant_comptes_vue']
+            )
+            # Membre sans apport dans ce mois : non compté pour ce mois
+            if total_apports_bruts == 0:
+                continue
+            
+            if membre.id not in apports_par_membre_annuel:
+                apports_par_membre_annuel[membre.id] = {
+                    'membre_id': membre.id,
+                    'membre_numero': membre.numero_compte,
+                    'membre_nom': _nom_membre(membre),
+                    'montant_parts_sociales': Decimal('0.00'),
+                    'montant_epargnes_bloquees': Decimal('0.00'),
+                    'montant_comptes_vue': Decimal('0.00'),
+                    'total_apports': Decimal('0.00')
+                }
+            
+            credits_actifs = credits_actifs_par_membre.get(membre.id, Decimal('0.00'))
+            donnees = apports_par_membre_annuel[membre.id]
+            donnees['montant_parts_sociales'] += montants['montant_parts_sociales']
+            donnees['montant_epargnes_bloquees'] += montants['montant_epargnes_bloquees']
+            donnees['montant_comptes_vue'] += montants['montant_comptes_vue']
+            donnees['total_apports'] += max(Decimal('0.00'), total_apports_bruts - credits_actifs)
+            
+            total_parts_sociales_annuel += montants['montant_parts_sociales']
+            total_epargnes_bloquees_annuel += montants['montant_epargnes_bloquees']
+            total_comptes_vue_annuel += montants['montant_comptes_vue']
+    
+    # Convertir en format attendu
+    apports_par_membre_list = []
+    for data in apports_par_membre_annuel.values():
+        apports_par_membre_list.append({
+            'membre_id': data['membre_id'],
+            'membre_numero': data['membre_numero'],
+            'membre_nom': data['membre_nom'],
+            'montant_parts_sociales': float(data['montant_parts_sociales']),
+            'montant_epargnes_bloquees': float(data['montant_epargnes_bloquees']),
+            'montant_comptes_vue': float(data['montant_comptes_vue']),
+            'total_apports': float(data['total_apports'])
+        })
+    
+    total_apports_global = total_parts_sociales_annuel + total_epargnes_bloquees_annuel + total_comptes_vue_annuel
+    return {
+        'apports_par_membre': apports_par_membre_list,
+        'total_parts_sociales': float(total_parts_sociales_annuel),
+        'total_epargnes_bloquees': float(total_epargnes_bloquees_annuel),
+        'total_comptes_vue': float(total_comptes_vue_annuel),
+        'total_apports_global': float(total_apports_global)
+    }
+
 # ============================================================================
 # SERVICE 4 : RÉPARTITION DES INTÉRÊTS AUX MEMBRES
 # ============================================================================
 
+def _normaliser_periode_repartition(periode_mois=None, periode_annee=None):
+    """
+    Période par défaut de la répartition :
+    - Aucune période : mois et année courants
+    - Mois sans année : année courante
+    """
+    if periode_mois is None and periode_annee is None:
+        aujourd_hui = date.today()
+        return aujourd_hui.month, aujourd_hui.year
+    if periode_annee is None:
+        return periode_mois, date.today().year
+    return periode_mois, periode_annee
+
+@memoiser
 def repartir_interets_aux_membres(pourcentage_frais_gestion=20, periode_mois=None, periode_annee=None):
     """
     Répartit les intérêts aux membres selon leurs apports (parts sociales + épargnes bloquées).
@@ -633,18 +1003,13 @@ def repartir_interets_aux_membres(pourcentage_frais_gestion=20, periode_mois=Non
         dict: Dictionnaire avec la répartition complète
     """
     # Si aucune période n'est spécifiée, utiliser le mois et l'année courants
-    from datetime import date
-    if periode_mois is None and periode_annee is None:
-        aujourd_hui = date.today()
-        periode_mois = aujourd_hui.month
-        periode_annee = aujourd_hui.year
-    elif periode_annee is None:
-        aujourd_hui = date.today()
-        periode_annee = aujourd_hui.year
+    periode_mois, periode_annee = _normaliser_periode_repartition(periode_mois, periode_annee)
     
     # 1. Calculer les intérêts et frais de gestion (filtrés par année si periode_annee est spécifié)
-    resultats_interets = calculer_interets_tous_credits(periode_annee=periode_annee)
-    resultats_frais = calculer_frais_gestion(pourcentage_frais_gestion, periode_annee=periode_annee)
+    # Les intérêts ne sont calculés qu'une fois : calculer_frais_gestion les reprend de la mémoïsation
+    with memoisation_calculs():
+        resultats_interets = calculer_interets_tous_credits(periode_annee=periode_annee)
+        resultats_frais = calculer_frais_gestion(pourcentage_frais_gestion, periode_annee=periode_annee)
     
     interet_total_global = Decimal(str(resultats_interets['interet_total_global']))
     frais_gestion_total_global = Decimal(str(resultats_frais['frais_gestion_total_global']))
@@ -653,60 +1018,9 @@ def repartir_interets_aux_membres(pourcentage_frais_gestion=20, periode_mois=Non
     # 2. Calculer les apports de tous les membres
     # Si periode_mois est None mais periode_annee est spécifié, calculer le total de toute l'année
     if periode_mois is None and periode_annee is not None:
-        # Calculer la somme de tous les mois de l'année
-        apports_par_membre_annuel = {}
-        total_parts_sociales_annuel = Decimal('0.00')
-        total_epargnes_bloquees_annuel = Decimal('0.00')
-        total_comptes_vue_annuel = Decimal('0.00')
-        
-        for mois in range(1, 13):
-            apports_mois = calculer_apports_tous_membres(mois, periode_annee)
-            
-            for membre_apports in apports_mois['apports_par_membre']:
-                membre_id = membre_apports['membre_id']
-                
-                if membre_id not in apports_par_membre_annuel:
-                    apports_par_membre_annuel[membre_id] = {
-                        'membre_id': membre_apports['membre_id'],
-                        'membre_numero': membre_apports['membre_numero'],
-                        'membre_nom': membre_apports['membre_nom'],
-                        'montant_parts_sociales': Decimal('0.00'),
-                        'montant_epargnes_bloquees': Decimal('0.00'),
-                        'montant_comptes_vue': Decimal('0.00'),
-                        'total_apports': Decimal('0.00')
-                    }
-                
-                apports_par_membre_annuel[membre_id]['montant_parts_sociales'] += Decimal(str(membre_apports['montant_parts_sociales']))
-                apports_par_membre_annuel[membre_id]['montant_epargnes_bloquees'] += Decimal(str(membre_apports['montant_epargnes_bloquees']))
-                apports_par_membre_annuel[membre_id]['montant_comptes_vue'] += Decimal(str(membre_apports.get('montant_comptes_vue', 0)))
-                apports_par_membre_annuel[membre_id]['total_apports'] += Decimal(str(membre_apports['total_apports']))
-            
-            total_parts_sociales_annuel += Decimal(str(apports_mois['total_parts_sociales']))
-            total_epargnes_bloquees_annuel += Decimal(str(apports_mois['total_epargnes_bloquees']))
-            total_comptes_vue_annuel += Decimal(str(apports_mois.get('total_comptes_vue', 0)))
-        
-        # Convertir en format attendu
-        apports_par_membre_list = []
-        for membre_id, data in apports_par_membre_annuel.items():
-            apports_par_membre_list.append({
-                'membre_id': data['membre_id'],
-                'membre_numero': data['membre_numero'],
-                'membre_nom': data['membre_nom'],
-                'montant_parts_sociales': float(data['montant_parts_sociales']),
-                'montant_epargnes_bloquees': float(data['montant_epargnes_bloquees']),
-                'montant_comptes_vue': float(data.get('montant_comptes_vue', 0)),
-                'total_apports': float(data['total_apports'])
-            })
-        
-        # total_comptes_vue_annuel est déjà calculé dans la boucle des mois ci-dessus
-        total_apports_global = total_parts_sociales_annuel + total_epargnes_bloquees_annuel + total_comptes_vue_annuel
-        apports = {
-            'apports_par_membre': apports_par_membre_list,
-            'total_parts_sociales': float(total_parts_sociales_annuel),
-            'total_epargnes_bloquees': float(total_epargnes_bloquees_annuel),
-            'total_comptes_vue': float(total_comptes_vue_annuel),
-            'total_apports_global': float(total_apports_global)
-        }
+        # Total annuel calculé en une seule passe (pivot mensuel des dons et retraits)
+        apports = calculer_apports_annuels_membres(periode_annee)
+        total_apports_global = Decimal(str(apports['total_apports_global']))
         periode_mois = None  # Indiquer que c'est le total annuel
     else:
         # Calculer les apports FILTRÉS PAR PÉRIODE (mois/année) si une période est spécifiée
@@ -754,3 +1068,216 @@ def repartir_interets_aux_membres(pourcentage_frais_gestion=20, periode_mois=Non
         'repartitions': repartitions,
         'pourcentage_frais_gestion_utilise': pourcentage_frais_gestion
     }
+
+
+# ============================================================================
+# SERVICE 5 : SNAPSHOTS DE LA RÉPARTITION DES INTÉRÊTS
+# ============================================================================
+
+def _generation_repartition(verrouiller=False):
+    """Génération courante des snapshots de répartition (ligne unique créée au besoin)"""
+    from caisse.models import GenerationRepartition
+    
+    requete = GenerationRepartition.objects.select_for_update() if verrouiller else GenerationRepartition.objects
+    compteur, _ = requete.get_or_create(pk=1)
+    return compteur.generation
+
+def obtenir_repartition_interets(pourcentage_frais_gestion=20, periode_mois=None, periode_annee=None):
+    """
+    Retourne la répartition des intérêts depuis le snapshot matérialisé (RepartitionSnapshot)
+    de la période, ou la calcule (repartir_interets_aux_membres) et l'enregistre s'il n'existe pas.
+    
+    Les snapshots sont invalidés à chaque écriture financière (voir caisse/signals.py). Le
+    calcul n'est enregistré que si aucune invalidation n'a eu lieu pendant qu'il s'exécutait
+    (compteur GenerationRepartition) : un snapshot ne reflète jamais un état antérieur à la
+    dernière écriture.
+    
+    Args:
+        pourcentage_frais_gestion (float): Pourcentage des frais de gestion (défaut: 20%)
+        periode_mois (int, optional): Mois (1-12). None + année : total annuel
+        periode_annee (int, optional): Année
+    
+    Returns:
+        dict: Même structure que repartir_interets_aux_membres
+    """
+    from django.db import transaction
+    from caisse.models import RepartitionSnapshot
+    
+    periode_mois, periode_annee = _normaliser_periode_repartition(periode_mois, periode_annee)
+    pourcentage = Decimal(str(pourcentage_frais_gestion)).quantize(Decimal('0.01'))
+    cle = {
+        'pourcentage_frais_gestion': pourcentage,
+        # 0 pour le total annuel (colonne non NULL, couverte par la contrainte unique)
+        'periode_mois': periode_mois or 0,
+        'periode_annee': periode_annee,
+    }
+    
+    snapshot = RepartitionSnapshot.objects.filter(**cle).only('resultat').first()
+    if snapshot is not None:
+        return snapshot.resultat
+    
+    generation = _generation_repartition()
+    resultats = repartir_interets_aux_membres(pourcentage_frais_gestion, periode_mois, periode_annee)
+    
+    with transaction.atomic():
+        # Le verrou sur le compteur ordonne l'enregistrement par rapport aux invalidations
+        if _generation_repartition(verrouiller=True) == generation:
+            RepartitionSnapshot.objects.update_or_create(defaults={'resultat': resultats}, **cle)
+    
+    return resultats
+
+
+def invalider_snapshots_repartition():
+    """
+    Supprime tous les snapshots de répartition des intérêts et passe à la génération suivante
+    (les calculs en cours ne seront pas enregistrés).
+    Appelé après toute écriture financière qui modifie les intérêts, les frais de gestion
+    ou les apports des membres.
+    """
+    from django.db import transaction
+    from django.db.models import F
+    from caisse.models import RepartitionSnapshot, GenerationRepartition
+    
+    with transaction.atomic():
+        if not GenerationRepartition.objects.filter(pk=1).update(generation=F('generation') + 1):
+            GenerationRepartition.objects.get_or_create(pk=1, defaults={'generation': 1})
+        RepartitionSnapshot.objects.all().delete()
+
+
+# ============================================================================
+# SERVICE 6 : HISTORIQUE PAGINÉ DES MOUVEMENTS D'UN TYPE DE CAISSE
+# ============================================================================
+
+# Jointures nécessaires pour formater une ligne d'historique sans requête supplémentaire
+RELATIONS_HISTORIQUE = (
+    'credit',
+    'remboursement__credit',
+    'donnatepargne__souscriptEpargne',
+    'donnatpartsocial__souscription_part_social__partSocial',
+    'fraisadhesion',
+    'depense',
+    'retrait',
+    'dondirect',
+)
+
+# Relations de Caissetypemvt exposées dans chaque ligne d'historique (<relation>_id)
+CHAMPS_IDS_HISTORIQUE = (
+    'credit', 'remboursement', 'donnatepargne', 'donnatpartsocial',
+    'fraisadhesion', 'depense', 'retrait', 'dondirect',
+)
+
+
+def formater_operation_historique(mouvement, caissetype):
+    """
+    Formate un Caissetypemvt en ligne d'historique (type d'opération, sens, montant, libellé).
+    Le mouvement doit avoir été chargé avec select_related(*RELATIONS_HISTORIQUE).
+    """
+    operation = {
+        'id': mouvement.id,
+        'date': mouvement.date.isoformat() if mouvement.date else None,
+        'caissetype_id': caissetype.id,
+        'caissetype_nom': caissetype.nom,
+    }
+    
+    if mouvement.remboursement_id:
+        remboursement = mouvement.remboursement
+        operation.update({
+            'type_operation': 'Remboursement',
+            'sous_type': 'ENTREE',
+            'montant': float(remboursement.montant),
+            'libelle': f'Remboursement crédit #{remboursement.credit_id if remboursement.credit_id else "N/A"}',
+        })
+    elif mouvement.donnatepargne_id:
+        donnatepargne = mouvement.donnatepargne
+        operation.update({
+            'type_operation': 'Don d\'épargne',
+            'sous_type': 'ENTREE',
+            'montant': float(donnatepargne.montant),
+            'libelle': f'Don d\'épargne - {donnatepargne.souscriptEpargne.designation if donnatepargne.souscriptEpargne else "N/A"}',
+        })
+    elif mouvement.donnatpartsocial_id:
+        souscription = mouvement.donnatpartsocial.souscription_part_social
+        operation.update({
+            'type_operation': 'Don de part sociale',
+            'sous_type': 'ENTREE',
+            'montant': float(mouvement.donnatpartsocial.montant),
+            'libelle': f'Don de part sociale - {souscription.partSocial.annee if souscription and souscription.partSocial else "N/A"}',
+        })
+    elif mouvement.fraisadhesion_id:
+        operation.update({
+            'type_operation': 'Frais d\'adhésion',
+            'sous_type': 'ENTREE',
+            'montant': float(mouvement.fraisadhesion.montant),
+            'libelle': 'Frais d\'adhésion',
+        })
+    elif mouvement.dondirect_id:
+        dondirect = mouvement.dondirect
+        operation.update({
+            'type_operation': 'Don direct',
+            'sous_type': 'ENTREE',
+            'montant': float(dondirect.montant),
+            'libelle': f'Don direct - {dondirect.donateur_nom or "Anonyme"}' + (f' ({dondirect.libelle})' if dondirect.libelle else ''),
+        })
+    elif mouvement.depense_id:
+        depense = mouvement.depense
+        operation.update({
+            'type_operation': 'Dépense',
+            'sous_type': 'SORTIE',
+            'montant': float(depense.pt),  # Prix total
+            'libelle': f'{depense.libelle} - {depense.quantite} {depense.uniter}',
+        })
+    elif mouvement.retrait_id:
+        operation.update({
+            'type_operation': 'Retrait',
+            'sous_type': 'SORTIE',
+            'montant': float(mouvement.retrait.montant),
+            'libelle': f'Retrait - {mouvement.retrait.motif or "Sans motif"}',
+        })
+    elif mouvement.credit_id:
+        credit = mouvement.credit
+        # Montant réellement sorti de caisse (voir calculer_contribution_objet)
+        _, sortie = calculer_contribution_objet('credit', credit)
+        operation.update({
+            'type_operation': 'Crédit',
+            'sous_type': 'SORTIE',
+            'montant': float(sortie),
+            'libelle': f'Octroi crédit #{credit.id} ({credit.get_methode_interet_display()})',
+        })
+    
+    for champ in CHAMPS_IDS_HISTORIQUE:
+        operation[f'{champ}_id'] = getattr(mouvement, f'{champ}_id')
+    
+    return operation
+
+
+def historique_caissetype_queryset(caissetype, date_debut=None, date_fin=None):
+    """
+    Mouvements d'un type de caisse pour l'historique, du plus récent au plus ancien.
+    
+    L'ordre (date, created_at, id) décroissant est total et couvert par l'index
+    caisse_mvt_historique_idx : le queryset se pagine par clé (coopec.pagination.KeysetPagination),
+    la page 200 coûte donc autant que la page 1.
+    """
+    from caisse.models import Caissetypemvt
+    
+    mouvements = Caissetypemvt.objects.filter(caissetype=caissetype)
+    if date_debut:
+        mouvements = mouvements.filter(date__gte=date_debut)
+    if date_fin:
+        mouvements = mouvements.filter(date__lte=date_fin)
+    return mouvements.select_related(*RELATIONS_HISTORIQUE).order_by('-date', '-created_at', '-id')
+
+
+def compter_historique_caissetype(caissetype, mouvements, date_debut=None, date_fin=None):
+    """
+    Nombre de mouvements de l'historique : lu dans le solde persisté (SoldeCaisseType)
+    quand il n'y a pas de filtre de dates, sinon COUNT sur la plage de dates.
+    """
+    from caisse.models import SoldeCaisseType
+    
+    count = None
+    if not date_debut and not date_fin:
+        count = SoldeCaisseType.objects.filter(caissetype=caissetype).values_list('nombre_mouvements', flat=True).first()
+    if count is None:
+        count = mouvements.count()
+    return count
@@ -1,7 +1,164 @@
 """
 Signals pour gérer automatiquement les mouvements de caisse via Caissetypemvt.
 Tous les mouvements sont maintenant centralisés dans Caissetypemvt.
+
+Le solde persisté de chaque type de caisse (SoldeCaisseType) est maintenu ici de façon
+incrémentale :
+- création / modification / suppression d'un Caissetypemvt
+- modification du montant d'une opération déjà liée à un Caissetypemvt
+  (remboursement, crédit, dépense, retrait, etc.)
+
+Les snapshots de répartition des intérêts (RepartitionSnapshot) sont invalidés à chaque
+écriture financière (Credit, DonnatEpargne, DonnatPartSocial, Retrait, FraisAdhesion, Depenses)
+et à chaque modification d'un Membre ou d'un Compte.
+
+Note : les opérations en masse (QuerySet.update(), bulk_create()) ne déclenchent pas
+de signals ; utiliser ensuite : python manage.py recalculer_soldes_caisse
 """
+from decimal import Decimal
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.db import transaction
+from django.dispatch import receiver
+from caisse.models import Caissetypemvt
+from caisse.services import (
+    calculer_contribution_objet,
+    calculer_contribution_mouvement,
+    appliquer_delta_solde_caissetype,
+    invalider_snapshots_repartition,
+)
+from caisse.memoisation import vider_memoisation
+
+
+# Relation de Caissetypemvt -> modèle de l'opération liée
+MODELES_OPERATIONS_CAISSE = {
+    'remboursement': 'credits.Remboursement',
+    'credit': 'credits.Credit',
+    'donnatepargne': 'membres.DonnatEpargne',
+    'donnatpartsocial': 'membres.DonnatPartSocial',
+    'fraisadhesion': 'membres.FraisAdhesion',
+    'depense': 'caisse.Depenses',
+    'retrait': 'membres.Retrait',
+    'dondirect': 'caisse.DonDirect',
+}
+
+
+# ============================================================================
+# MOUVEMENTS DE CAISSE
+# ============================================================================
+
+@receiver(pre_save, sender=Caissetypemvt)
+def memoriser_ancien_mouvement(sender, instance, **kwargs):
+    """Mémorise la caisse et la contribution de l'ancienne version du mouvement (modification)"""
+    instance._ancien_solde_mouvement = None
+    if instance.pk is None:
+        return
+    ancien = Caissetypemvt.objects.filter(pk=instance.pk).first()
+    if ancien is not None:
+        instance._ancien_solde_mouvement = (ancien.caissetype_id, calculer_contribution_mouvement(ancien))
+
+
+@receiver(post_save, sender=Caissetypemvt)
+def mettre_a_jour_solde_apres_mouvement(sender, instance, created, **kwargs):
+    """Met à jour le solde persisté de la caisse après création ou modification d'un mouvement"""
+    entree, sortie = calculer_contribution_mouvement(instance)
+    ancien = getattr(instance, '_ancien_solde_mouvement', None)
+
+    if created or ancien is None:
+        appliquer_delta_solde_caissetype(instance.caissetype_id, entree, sortie, 1)
+        return
+
+    ancien_caissetype_id, (ancienne_entree, ancienne_sortie) = ancien
+    if ancien_caissetype_id == instance.caissetype_id:
+        if entree != ancienne_entree or sortie != ancienne_sortie:
+            appliquer_delta_solde_caissetype(instance.caissetype_id, entree - ancienne_entree, sortie - ancienne_sortie, 0)
+    else:
+        # Le mouvement a changé de caisse
+        appliquer_delta_solde_caissetype(ancien_caissetype_id, -ancienne_entree, -ancienne_sortie, -1)
+        appliquer_delta_solde_caissetype(instance.caissetype_id, entree, sortie, 1)
+    instance._ancien_solde_mouvement = None
+
+
+@receiver(pre_delete, sender=Caissetypemvt)
+def memoriser_mouvement_supprime(sender, instance, **kwargs):
+    """
+    Calcule la contribution avant suppression : en cas de suppression en cascade,
+    l'opération liée est encore présente en base à ce moment-là.
+    """
+    instance._contribution_supprimee = calculer_contribution_mouvement(instance)
+
+
+@receiver(post_delete, sender=Caissetypemvt)
+def mettre_a_jour_solde_apres_suppression(sender, instance, **kwargs):
+    """Retire la contribution du mouvement supprimé du solde persisté de la caisse"""
+    entree, sortie = getattr(instance, '_contribution_supprimee', (Decimal('0.00'), Decimal('0.00')))
+    appliquer_delta_solde_caissetype(instance.caissetype_id, -entree, -sortie, -1)
+
+
+# ============================================================================
+# OPÉRATIONS LIÉES (modification du montant après création du mouvement)
+# ============================================================================
+
+def _connecter_signals_operation(champ, modele):
+    """Connecte les signals qui répercutent la modification d'une opération sur le solde des caisses"""
+
+    def memoriser_ancienne_operation(sender, instance, **kwargs):
+        instance._ancienne_contribution_caisse = None
+        if instance.pk is None:
+            return
+        ancienne = sender.objects.filter(pk=instance.pk).first()
+        if ancienne is not None:
+            instance._ancienne_contribution_caisse = calculer_contribution_objet(champ, ancienne)
+
+    def repercuter_operation(sender, instance, created, **kwargs):
+        ancienne = getattr(instance, '_ancienne_contribution_caisse', None)
+        instance._ancienne_contribution_caisse = None
+        if created or ancienne is None:
+            return
+        entree, sortie = calculer_contribution_objet(champ, instance)
+        ancienne_entree, ancienne_sortie = ancienne
+        if entree == ancienne_entree and sortie == ancienne_sortie:
+            return
+        caissetype_ids = Caissetypemvt.objects.filter(**{champ: instance}).values_list('caissetype_id', flat=True)
+        for caissetype_id in caissetype_ids:
+            appliquer_delta_solde_caissetype(caissetype_id, entree - ancienne_entree, sortie - ancienne_sortie, 0)
+
+    pre_save.connect(memoriser_ancienne_operation, sender=modele, weak=False, dispatch_uid=f'solde_caisse_pre_{champ}')
+    post_save.connect(repercuter_operation, sender=modele, weak=False, dispatch_uid=f'solde_caisse_post_{champ}')
+
+
+for _champ, _modele in MODELES_OPERATIONS_CAISSE.items():
+    _connecter_signals_operation(_champ, _modele)
+
+
+# ============================================================================
+# INVALIDATION DES SNAPSHOTS DE RÉPARTITION DES INTÉRÊTS
+# ============================================================================
+
+# Modèles dont les écritures modifient les intérêts, les frais de gestion, les apports
+# ou les informations des membres enregistrées dans un snapshot
+MODELES_REPARTITION = (
+    'credits.Credit',
+    'membres.DonnatEpargne',
+    'membres.DonnatPartSocial',
+    'membres.Retrait',
+    'membres.FraisAdhesion',
+    'caisse.Depenses',
+    # Nom et numéro du membre copiés dans le snapshot
+    'users.Membre',
+    # type_compte détermine la catégorie des apports (parts sociales, épargne bloquée, vue)
+    'membres.Compte',
+)
+
+
+def invalider_repartition_apres_ecriture(sender, instance, **kwargs):
+    """
+    Invalide les snapshots de répartition une fois la transaction validée, et les calculs
+    mémoïsés de l'unité de travail en cours immédiatement (lectures dans la même transaction)
+    """
+    vider_memoisation()
+    transaction.on_commit(invalider_snapshots_repartition)
 
-# Les signaux seront réimplémentés pour utiliser Caissetypemvt
 
+for _modele in MODELES_REPARTITION:
+    post_save.connect(invalider_repartition_apres_ecriture, sender=_modele, dispatch_uid=f'repartition_post_save_{_modele}')
+    post_delete.connect(invalider_repartition_apres_ecriture, sender=_modele, dispatch_uid=f'repartition_post_delete_{_modele}')
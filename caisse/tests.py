@@ -1,3 +1,137 @@
+import json
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import F
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import ParseError
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from coopec.pagination import KeysetPagination
+from .models import CaisseType, Caissetypemvt, DonDirect
+from .views import CaissetypemvtViewSet
+
+
+class KeysetPaginationTests(TestCase):
+    """Pagination par clé (coopec.pagination) : champ NULL, égalités, aller-retour"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Donateur NULL et montants égaux : l'ordre dépend de la position des NULL et du départage par pk
+        donateurs = [None, 'A', None, 'B', 'A', None, 'C', 'A', 'B', None, 'A', 'C', None]
+        montants = ['10', '20', '10', '5', '20', '10', '5', '10', '5', '20', '20', '5', '10']
+        for donateur, montant in zip(donateurs, montants):
+            DonDirect.objects.create(montant=Decimal(montant), donateur_nom=donateur)
+
+    def page(self, queryset, taille, curseur=None):
+        params = {'page_size': taille}
+        if curseur is not None:
+            params['cursor'] = curseur
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(queryset, Request(APIRequestFactory().get('/', params)))
+        return [objet.pk for objet in page], paginator
+
+    def parcourir(self, queryset, attendu, taille):
+        # En avant : pages successives via next
+        ids, paginator = self.page(queryset, taille)
+        self.assertIsNone(paginator.previous_cursor)
+        vus = list(ids)
+        pages = [ids]
+        while paginator.next_cursor:
+            # Une page qui se répète ferait boucler le parcours indéfiniment
+            self.assertLessEqual(len(vus), len(attendu))
+            ids, paginator = self.page(queryset, taille, paginator.next_cursor)
+            vus.extend(ids)
+            pages.append(ids)
+        self.assertEqual(vus, attendu)
+
+        # En arrière depuis la dernière page : mêmes pages via previous
+        retour = [pages[-1]]
+        while paginator.previous_cursor:
+            self.assertLess(len(retour), len(pages))
+            ids, paginator = self.page(queryset, taille, paginator.previous_cursor)
+            retour.insert(0, ids)
+        self.assertEqual(retour, pages)
+
+    def test_ordre_croissant_null_en_premier(self):
+        queryset = DonDirect.objects.order_by('donateur_nom', '-montant')
+        attendu = list(
+            DonDirect.objects.order_by(F('donateur_nom').asc(nulls_first=True), '-montant', '-pk')
+            .values_list('pk', flat=True)
+        )
+        for taille in (1, 3, 4, 13, 20):
+            with self.subTest(taille=taille):
+                self.parcourir(queryset, attendu, taille)
+
+    def test_ordre_decroissant_null_en_dernier(self):
+        queryset = DonDirect.objects.order_by('-donateur_nom', 'montant')
+        attendu = list(
+            DonDirect.objects.order_by(F('donateur_nom').desc(nulls_last=True), 'montant', 'pk')
+            .values_list('pk', flat=True)
+        )
+        for taille in (1, 2, 5, 13):
+            with self.subTest(taille=taille):
+                self.parcourir(queryset, attendu, taille)
+
+    def test_curseur_invalide(self):
+        queryset = DonDirect.objects.order_by('donateur_nom')
+        for curseur in ('invalide', 'e30', 'eyJ2IjpbMV19'):
+            with self.subTest(curseur=curseur), self.assertRaises(ParseError) as erreur:
+                self.page(queryset, 5, curseur)
+            self.assertEqual(erreur.exception.status_code, 400)
+
+    def test_curseur_invalide_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_superuser('admin', 'admin@example.org', 'secret'))
+        reponse = client.get('/api/caisse/dons-directs/', {'cursor': 'invalide'})
+        self.assertEqual(reponse.status_code, 400)
+        self.assertEqual(reponse.json(), {'error': KeysetPagination.invalid_cursor_message})
+
+
+class ExportMouvementsTests(TestCase):
+    """Export en flux (coopec.exports) : lecture par lots sur la clé primaire"""
+
+    def setUp(self):
+        caissetype = CaisseType.objects.create(nom='Banque')
+        for montant in range(1, 8):
+            Caissetypemvt.objects.create(
+                caissetype=caissetype,
+                dondirect=DonDirect.objects.create(montant=Decimal(montant))
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_superuser('admin', 'admin@example.org', 'secret'))
+
+    def exporter(self, **params):
+        with CaptureQueriesContext(connection) as requetes:
+            reponse = self.client.get('/api/caisse/caissetypemvt/export/', params)
+            contenu = b''.join(reponse.streaming_content).decode('utf-8')
+        lectures = [
+            requete['sql'] for requete in requetes.captured_queries
+            if 'caisse_caissetypemvt' in requete['sql'] and requete['sql'].startswith('SELECT')
+        ]
+        return reponse, contenu, lectures
+
+    def test_lecture_par_lots(self):
+        with mock.patch.object(CaissetypemvtViewSet, 'export_chunk_size', 3):
+            reponse, contenu, lectures = self.exporter(export_format='ndjson')
+        self.assertEqual(reponse.status_code, 200)
+        lignes = [json.loads(ligne) for ligne in contenu.splitlines()]
+        ids = list(Caissetypemvt.objects.order_by('pk').values_list('pk', flat=True))
+        # Chaque ligne une seule fois, dans l'ordre des clés, sans la clé technique du lot
+        self.assertEqual([ligne['id'] for ligne in lignes], ids)
+        self.assertNotIn('_export_pk', lignes[0])
+        # 7 lignes par lots de 3 : 3 requêtes (3 + 3 + 1), chacune limitée à un lot
+        self.assertEqual(len(lectures), 3)
+        for sql in lectures:
+            self.assertIn('LIMIT 3', sql)
 
-# Create your tests here.
+    def test_lot_complet_en_fin_de_table(self):
+        with mock.patch.object(CaissetypemvtViewSet, 'export_chunk_size', 7):
+            reponse, contenu, lectures = self.exporter()
+        # En-tête + 7 lignes ; le lot plein est suivi d'une requête vide
+        self.assertEqual(len(contenu.splitlines()), 8)
+        self.assertEqual(len(lectures), 2)
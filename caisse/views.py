@@ -8,9 +8,11 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.urls import reverse
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
-from coopec.pagination import StandardResultsSetPagination
+from coopec.pagination import StandardResultsSetPagination, KeysetPagination
+from coopec.exports import ExportMixin
 from users.permissions import IsAdminOrSuperAdmin
 from .models import Depenses, CaisseType, Caissetypemvt, DonDirect
 from .serializers import DepensesSerializer, CaisseTypeSerializer, CaissetypemvtSerializer, DonDirectSerializer
@@ -19,7 +21,14 @@ from .services import (
     calculer_frais_gestion,
     calculer_apports_tous_membres,
     calculer_apports_membre,
-    repartir_interets_aux_membres
+    repartir_interets_aux_membres,
+    calculer_totaux_par_caissetype,
+    obtenir_repartition_interets,
+    interets_credits_queryset,
+    formater_interet_credit,
+    historique_caissetype_queryset,
+    compter_historique_caissetype,
+    formater_operation_historique
 )
 from decimal import Decimal
 
@@ -45,15 +54,19 @@ class CalculsFinanciersViewSet(viewsets.ViewSet):
         - CLIENT : voit uniquement les intérêts de ses propres crédits
         
         Retourne :
-        - Intérêts par crédit
-        - Intérêts par membre
+        - Intérêts par crédit (MEMBRE, CLIENT ; pour ADMIN et SUPERADMIN le détail est paginé :
+          GET /api/caisse/calculs/interets/credits/, lien dans interets_par_credit_url)
+        - Intérêts par membre (et par client pour ADMIN et SUPERADMIN)
         - Intérêt total global
         """
         user = request.user
         
-        # ADMIN et SUPERADMIN voient tous les intérêts
+        # ADMIN et SUPERADMIN voient tous les intérêts (totaux calculés en SQL, détail paginé à part)
         if user.user_type in ['ADMIN', 'SUPERADMIN']:
-            resultats = calculer_interets_tous_credits()
+            resultats = dict(calculer_interets_tous_credits())
+            resultats['interets_par_credit_url'] = request.build_absolute_uri(
+                reverse('calculs-financiers-interets-credits')
+            )
             return Response(resultats)
         
         # MEMBRE voit uniquement ses propres intérêts
@@ -130,6 +143,84 @@ class CalculsFinanciersViewSet(viewsets.ViewSet):
             status=status.HTTP_403_FORBIDDEN
         )
     
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name='periode_annee',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description='Année d\'octroi des crédits (optionnel)',
+                required=False
+            ),
+            OpenApiParameter(
+                name='membre_id',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description='Crédits d\'un membre (ADMIN et SUPERADMIN uniquement)',
+                required=False
+            ),
+            OpenApiParameter(
+                name='client_id',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description='Crédits d\'un client (ADMIN et SUPERADMIN uniquement)',
+                required=False
+            ),
+            OpenApiParameter(
+                name='cursor',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Pagination par curseur (valeur renvoyée dans next / previous) ; sinon ?page=',
+                required=False
+            ),
+            OpenApiParameter(
+                name='page_size',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description='Nombre de crédits par page (défaut 15, max 100)',
+                required=False
+            ),
+        ]
+    )
+    @action(detail=False, methods=['get'], url_path='interets/credits')
+    def interets_credits(self, request):
+        """
+        Détail paginé des intérêts par crédit.
+        
+        GET /api/caisse/calculs/interets/credits/?periode_annee=2025&page=2
+        GET /api/caisse/calculs/interets/credits/?cursor=
+        
+        - ADMIN et SUPERADMIN : tous les crédits (filtrables par membre_id / client_id)
+        - MEMBRE et CLIENT : uniquement leurs propres crédits
+        """
+        user = request.user
+        
+        try:
+            periode_annee = int(request.query_params['periode_annee']) if request.query_params.get('periode_annee') else None
+            membre_id = int(request.query_params['membre_id']) if request.query_params.get('membre_id') else None
+            client_id = int(request.query_params['client_id']) if request.query_params.get('client_id') else None
+        except (ValueError, TypeError):
+            return Response(
+                {'error': 'periode_annee, membre_id et client_id doivent être des nombres entiers.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # MEMBRE et CLIENT ne voient que leurs propres crédits
+        if user.user_type == 'MEMBRE' and user.membre:
+            membre_id, client_id = user.membre.id, None
+        elif user.user_type == 'CLIENT' and user.client:
+            membre_id, client_id = None, user.client.id
+        elif user.user_type not in ['ADMIN', 'SUPERADMIN']:
+            return Response(
+                {'error': 'Vous n\'avez pas accès à ces informations.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        credits = interets_credits_queryset(periode_annee, membre_id, client_id)
+        paginator = StandardResultsSetPagination()
+        page = paginator.paginate_queryset(credits, request, view=self)
+        return paginator.get_paginated_response([formater_interet_credit(credit) for credit in page])
+    
     @action(detail=False, methods=['get'])
     def frais_gestion(self, request):
         """
@@ -448,14 +539,16 @@ class CalculsFinanciersViewSet(viewsets.ViewSet):
             periode_annee = aujourd_hui.year
         
         # ADMIN et SUPERADMIN voient la répartition pour tous les membres
+        # La répartition complète est lue depuis le snapshot matérialisé de la période
+        # (recalculée uniquement après une écriture financière)
         if user.user_type in ['ADMIN', 'SUPERADMIN']:
-            resultats = repartir_interets_aux_membres(pourcentage, periode_mois, periode_annee)
+            resultats = obtenir_repartition_interets(pourcentage, periode_mois, periode_annee)
             return Response(resultats)
         
         # MEMBRE voit uniquement sa propre répartition
         if user.user_type == 'MEMBRE' and user.membre:
             # Obtenir la répartition pour tous les membres (pour avoir les totaux globaux)
-            resultats_complets = repartir_interets_aux_membres(pourcentage, periode_mois, periode_annee)
+            resultats_complets = obtenir_repartition_interets(pourcentage, periode_mois, periode_annee)
             
             # Filtrer pour ne garder que le membre connecté dans les répartitions
             membre_id = user.membre.id
@@ -713,81 +806,20 @@ class CaisseTypeViewSet(viewsets.ModelViewSet):
         # Récupérer tous les types de caisse
         caissetypes = CaisseType.objects.all().order_by('nom')
         
+        # Totaux de tous les types de caisse en une seule requête SQL groupée
+        totaux_par_caissetype = calculer_totaux_par_caissetype(date_debut=date_debut, date_fin=date_fin)
+        totaux_vides = {
+            'total_entrees': Decimal('0.00'),
+            'total_sorties': Decimal('0.00'),
+            'total_montant': Decimal('0.00'),
+            'nombre_mouvements': 0,
+        }
+        
         # Préparer les résultats
         results = []
         
         for caissetype in caissetypes:
-            # Filtrer les mouvements par type de caisse et date
-            mouvements = Caissetypemvt.objects.filter(caissetype=caissetype)
-            
-            # Appliquer le filtrage par date si fourni
-            if date_debut:
-                mouvements = mouvements.filter(date__gte=date_debut)
-            if date_fin:
-                mouvements = mouvements.filter(date__lte=date_fin)
-            
-            # Calculer le total en additionnant/soustrayant les montants selon le type
-            total_montant = Decimal('0.00')
-            total_entrees = Decimal('0.00')
-            total_sorties = Decimal('0.00')
-            
-            for mouvement in mouvements:
-                # Utiliser directement les autres relations (remboursement, donations, etc.)
-                # Remboursement - toujours ajouter (entrée d'argent)
-                if mouvement.remboursement:
-                    montant_remb = Decimal(str(mouvement.remboursement.montant))
-                    total_montant += montant_remb
-                    total_entrees += montant_remb
-                
-                # Donation épargne - toujours ajouter (entrée d'argent)
-                if mouvement.donnatepargne:
-                    montant_epargne = Decimal(str(mouvement.donnatepargne.montant))
-                    total_montant += montant_epargne
-                    total_entrees += montant_epargne
-                
-                # Donation part sociale - toujours ajouter (entrée d'argent)
-                if mouvement.donnatpartsocial:
-                    montant_part = Decimal(str(mouvement.donnatpartsocial.montant))
-                    total_montant += montant_part
-                    total_entrees += montant_part
-                
-                # Frais d'adhésion - toujours ajouter (entrée d'argent)
-                if mouvement.fraisadhesion:
-                    montant_frais = Decimal(str(mouvement.fraisadhesion.montant))
-                    total_montant += montant_frais
-                    total_entrees += montant_frais
-                
-                # Dépense - toujours soustraire (sortie d'argent)
-                if mouvement.depense:
-                    montant_depense = Decimal(str(mouvement.depense.pt))  # Utiliser la propriété pt (prix total)
-                    total_montant -= montant_depense
-                    total_sorties += montant_depense
-                
-                # Retrait - toujours soustraire (sortie d'argent)
-                if mouvement.retrait:
-                    montant_retrait = Decimal(str(mouvement.retrait.montant))
-                    total_montant -= montant_retrait
-                    total_sorties += montant_retrait
-                
-                # Don direct - toujours ajouter (entrée d'argent)
-                if mouvement.dondirect:
-                    montant_don = Decimal(str(mouvement.dondirect.montant))
-                    total_montant += montant_don
-                    total_entrees += montant_don
-                
-                # Crédit - toujours soustraire (sortie d'argent)
-                # IMPORTANT : Le montant soustrait dépend de la méthode d'intérêt :
-                # - PRECOMPTE : on soustrait montant_effectif (montant - intérêt) car c'est ce qui est réellement sorti
-                # - POSTCOMPTE : on soustrait montant (montant demandé) car c'est ce qui est réellement sorti
-                if mouvement.credit:
-                    if mouvement.credit.methode_interet == 'PRECOMPTE':
-                        # Pour PRECOMPTE : montant effectivement sorti = montant - intérêt
-                        montant_credit = Decimal(str(mouvement.credit.montant_effectif))
-                    else:  # POSTCOMPTE
-                        # Pour POSTCOMPTE : montant effectivement sorti = montant demandé
-                        montant_credit = Decimal(str(mouvement.credit.montant))
-                    total_montant -= montant_credit
-                    total_sorties += montant_credit
+            totaux = totaux_par_caissetype.get(caissetype.id, totaux_vides)
             
             # Construire l'URL de l'image si elle existe
             image_url = None
@@ -799,23 +831,18 @@ class CaisseTypeViewSet(viewsets.ModelViewSet):
                 'nom': caissetype.nom,
                 'description': caissetype.description or '',
                 'image_url': image_url,
-                'total_montant': float(total_montant),
-                'total_entrees': float(total_entrees),
-                'total_sorties': float(total_sorties),
-                'nombre_mouvements': mouvements.count(),
+                'total_montant': float(totaux['total_montant']),
+                'total_entrees': float(totaux['total_entrees']),
+                'total_sorties': float(totaux['total_sorties']),
+                'nombre_mouvements': totaux['nombre_mouvements'],
                 'last_updated': caissetype.last_updated,
                 'created_at': caissetype.created_at
             })
         
         # Calculer le total général (différence entre toutes les entrées et sorties de tous les types de caisse)
-        total_general_entrees = Decimal('0.00')
-        total_general_sorties = Decimal('0.00')
-        total_general = Decimal('0.00')
-        
-        for result in results:
-            total_general_entrees += Decimal(str(result['total_entrees']))
-            total_general_sorties += Decimal(str(result['total_sorties']))
-            total_general += Decimal(str(result['total_montant']))
+        total_general_entrees = sum((t['total_entrees'] for t in totaux_par_caissetype.values()), Decimal('0.00'))
+        total_general_sorties = sum((t['total_sorties'] for t in totaux_par_caissetype.values()), Decimal('0.00'))
+        total_general = total_general_entrees - total_general_sorties
         
         # Pagination
         paginator = StandardResultsSetPagination()
@@ -840,7 +867,7 @@ class CaisseTypeViewSet(viewsets.ModelViewSet):
         return Response(response_data, status=status.HTTP_200_OK)
 
 @extend_schema(tags=['Mouvements de Type de Caisse'])
-class CaissetypemvtViewSet(viewsets.ModelViewSet):
+class CaissetypemvtViewSet(ExportMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les mouvements de type de caisse.
     Permet de lier un type de caisse à une donnation/remboursement/dépense/retrait.
@@ -859,11 +886,29 @@ class CaissetypemvtViewSet(viewsets.ModelViewSet):
     - `fraisadhesion` : ID des frais d'adhésion
     - `depense` : ID de la dépense
     - `retrait` : ID du retrait
+    
+    **Export en flux (auditeurs) :** GET /api/caisse/caissetypemvt/export/
+    (`export_format=csv|ndjson`, `gzip=1`, `date_debut`, `date_fin` + filtres ci-dessus)
     """
     queryset = Caissetypemvt.objects.all()
     serializer_class = CaissetypemvtSerializer
     permission_classes = [IsAdminOrSuperAdmin]
     pagination_class = StandardResultsSetPagination
+    export_filename = 'mouvements_caisse'
+    export_date_field = 'date'
+    export_fields = (
+        'id', 'date', 'created_at', 'caissetype_id', 'caissetype__nom', 'entree', 'sortie',
+        'credit_id', 'remboursement_id', 'donnatepargne_id', 'donnatpartsocial_id',
+        'fraisadhesion_id', 'depense_id', 'retrait_id', 'dondirect_id',
+    )
+    
+    def get_export_queryset(self, queryset):
+        """Ajoute les montants entrés / sortis de caisse calculés en SQL"""
+        from .services import _expression_entrees_mouvement, _expression_sorties_mouvement
+        return queryset.annotate(
+            entree=_expression_entrees_mouvement(),
+            sortie=_expression_sorties_mouvement()
+        )
     
     def get_queryset(self):
         """
@@ -905,12 +950,19 @@ class CaissetypemvtViewSet(viewsets.ModelViewSet):
         - `date_debut` : Date de début (format: YYYY-MM-DD)
         - `date_fin` : Date de fin (format: YYYY-MM-DD)
         
+        **Pagination par curseur :**
+        - `page_size` : Nombre d'opérations par page (défaut 15, max 100)
+        - `cursor` : Curseur opaque renvoyé dans `next` / `previous`
+        Les pages sont lues directement depuis la position du curseur (date, created_at, id) :
+        le coût d'une page ne dépend pas de sa profondeur dans l'historique.
+        
         **Types d'opérations retournés :**
         - Crédit (SORTIE)
         - Remboursement
         - Don d'épargne
         - Don de part sociale
         - Frais d'adhésion
+        - Don direct
         - Dépense
         - Retrait
         
@@ -942,6 +994,20 @@ class CaissetypemvtViewSet(viewsets.ModelViewSet):
                 description='Date de fin pour le filtrage (format: YYYY-MM-DD)',
                 required=False
             ),
+            OpenApiParameter(
+                name='cursor',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Curseur de pagination (valeur renvoyée dans next / previous)',
+                required=False
+            ),
+            OpenApiParameter(
+                name='page_size',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description='Nombre d\'opérations par page (défaut 15, max 100)',
+                required=False
+            ),
         ],
         responses={
             200: {
@@ -951,21 +1017,25 @@ class CaissetypemvtViewSet(viewsets.ModelViewSet):
                         'caissetype_id': 1,
                         'caissetype_nom': 'Airtel Money',
                         'count': 45,
+                        'next': 'http://localhost:8000/api/caisse/caissetypemvt/historique/?caissetype=1&cursor=eyJkIjog...',
+                        'previous': None,
+                        'page_size': 15,
                         'results': [
                             {
                                 'id': 1,
                                 'date': '2025-01-15',
                                 'type_operation': 'Crédit',
-                                'sous_type': 'ENTREE',
+                                'sous_type': 'SORTIE',
                                 'montant': 1000.00,
-                                'libelle': 'Versement initial',
+                                'libelle': 'Octroi crédit #5 (Intérêt postcompté (à l\'échéance))',
                                 'credit_id': 5,
                                 'remboursement_id': None,
                                 'donnatepargne_id': None,
                                 'donnatpartsocial_id': None,
                                 'fraisadhesion_id': None,
                                 'depense_id': None,
-                                'retrait_id': None
+                                'retrait_id': None,
+                                'dondirect_id': None
                             }
                         ]
                     }
@@ -1035,136 +1105,15 @@ class CaissetypemvtViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Filtrer les mouvements
-        mouvements = Caissetypemvt.objects.filter(caissetype=caissetype).select_related(
-            'remboursement', 'donnatepargne', 
-            'donnatpartsocial', 'fraisadhesion', 'depense', 'retrait'
-        )
-        
-        if date_debut:
-            mouvements = mouvements.filter(date__gte=date_debut)
-        if date_fin:
-            mouvements = mouvements.filter(date__lte=date_fin)
-        
-        # Construire l'historique détaillé
-        historique = []
-        
-        for mouvement in mouvements.order_by('-date', '-created_at'):
-            operation = {
-                'id': mouvement.id,
-                'date': mouvement.date.isoformat() if mouvement.date else None,
-                'caissetype_id': caissetype.id,
-                'caissetype_nom': caissetype.nom,
-            }
-            
-            # Utiliser directement les autres relations (remboursement, donations, etc.)
-
-            if mouvement.remboursement:
-                operation.update({
-                    'type_operation': 'Remboursement',
-                    'sous_type': 'ENTREE',
-                    'montant': float(mouvement.remboursement.montant),
-                    'libelle': f'Remboursement crédit #{mouvement.remboursement.credit.id if mouvement.remboursement.credit else "N/A"}',
-                                        'remboursement_id': mouvement.remboursement.id,
-                    'donnatepargne_id': None,
-                    'donnatpartsocial_id': None,
-                    'fraisadhesion_id': None,
-                    'depense_id': None,
-                    'retrait_id': None,
-                })
-            
-            # Don d'épargne
-            elif mouvement.donnatepargne:
-                operation.update({
-                    'type_operation': 'Don d\'épargne',
-                    'sous_type': 'ENTREE',
-                    'montant': float(mouvement.donnatepargne.montant),
-                    'libelle': f'Don d\'épargne - {mouvement.donnatepargne.souscriptEpargne.designation if mouvement.donnatepargne.souscriptEpargne else "N/A"}',
-                                        'remboursement_id': None,
-                    'donnatepargne_id': mouvement.donnatepargne.id,
-                    'donnatpartsocial_id': None,
-                    'fraisadhesion_id': None,
-                    'depense_id': None,
-                    'retrait_id': None,
-                })
-            
-            # Don de part sociale
-            elif mouvement.donnatpartsocial:
-                operation.update({
-                    'type_operation': 'Don de part sociale',
-                    'sous_type': 'ENTREE',
-                    'montant': float(mouvement.donnatpartsocial.montant),
-                    'libelle': f'Don de part sociale - {mouvement.donnatpartsocial.souscription_part_social.partSocial.annee if mouvement.donnatpartsocial.souscription_part_social and mouvement.donnatpartsocial.souscription_part_social.partSocial else "N/A"}',
-                                        'remboursement_id': None,
-                    'donnatepargne_id': None,
-                    'donnatpartsocial_id': mouvement.donnatpartsocial.id,
-                    'fraisadhesion_id': None,
-                    'depense_id': None,
-                    'retrait_id': None,
-                })
-            
-            # Frais d'adhésion
-            elif mouvement.fraisadhesion:
-                operation.update({
-                    'type_operation': 'Frais d\'adhésion',
-                    'sous_type': 'ENTREE',
-                    'montant': float(mouvement.fraisadhesion.montant),
-                    'libelle': f'Frais d\'adhésion',
-                                        'remboursement_id': None,
-                    'donnatepargne_id': None,
-                    'donnatpartsocial_id': None,
-                    'fraisadhesion_id': mouvement.fraisadhesion.id,
-                    'depense_id': None,
-                    'retrait_id': None,
-                })
-            
-            # Dépense
-            elif mouvement.depense:
-                operation.update({
-                    'type_operation': 'Dépense',
-                    'sous_type': 'SORTIE',
-                    'montant': float(mouvement.depense.pt),  # Prix total
-                    'libelle': f'{mouvement.depense.libelle} - {mouvement.depense.quantite} {mouvement.depense.uniter}',
-                                        'remboursement_id': None,
-                    'donnatepargne_id': None,
-                    'donnatpartsocial_id': None,
-                    'fraisadhesion_id': None,
-                    'depense_id': mouvement.depense.id,
-                    'retrait_id': None,
-                })
-            
-            # Retrait
-            elif mouvement.retrait:
-                operation.update({
-                    'type_operation': 'Retrait',
-                    'sous_type': 'SORTIE',
-                    'montant': float(mouvement.retrait.montant),
-                    'libelle': f'Retrait - {mouvement.retrait.motif or "Sans motif"}',
-                                        'remboursement_id': None,
-                    'donnatepargne_id': None,
-                    'donnatpartsocial_id': None,
-                    'fraisadhesion_id': None,
-                    'depense_id': None,
-                    'retrait_id': mouvement.retrait.id,
-                })
-            
-            historique.append(operation)
-        
-        # Pagination
-        paginator = StandardResultsSetPagination()
-        paginated_results = paginator.paginate_queryset(historique, request)
-        
-        response_data = {
-            'caissetype_id': caissetype.id,
-            'caissetype_nom': caissetype.nom,
-            'count': len(historique),
-            'results': paginated_results if paginated_results is not None else historique
-        }
-        
-        if paginated_results is not None:
-            paginated_response = paginator.get_paginated_response(paginated_results)
-            paginated_response.data['caissetype_id'] = caissetype.id
-            paginated_response.data['caissetype_nom'] = caissetype.nom
-            return paginated_response
+        # Page lue en base à partir du curseur (pagination par clé, sans OFFSET)
+        mouvements = historique_caissetype_queryset(caissetype, date_debut, date_fin)
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(mouvements, request)
+        paginator.count = compter_historique_caissetype(caissetype, mouvements, date_debut, date_fin)
         
-        return Response(response_data, status=status.HTTP_200_OK)
\ No newline at end of file
+        response = paginator.get_paginated_response(
+            [formater_operation_historique(mouvement, caissetype) for mouvement in page]
+        )
+        response.data['caissetype_id'] = caissetype.id
+        response.data['caissetype_nom'] = caissetype.nom
+        return response
\ No newline at end of file
@@ -0,0 +1,208 @@
+"""
+Exports en flux (CSV / NDJSON) pour l'API COOPEC
+
+ExportMixin ajoute une action GET .../export/ aux ViewSets : le queryset de la vue (avec son
+filtrage par utilisateur) est projeté avec values() et lu par lots sur la clé primaire
+(WHERE pk > dernier ORDER BY pk LIMIT n, une requête par lot), puis envoyé au fur et à mesure
+dans une StreamingHttpResponse. La mémoire utilisée reste constante, quel que soit le nombre de
+lignes exportées (ex : une année de mouvements de caisse).
+
+QuerySet.iterator() ne suffit pas : sur MySQL, Django n'utilise pas de curseur côté serveur et
+le pilote charge tout le résultat en mémoire avant de rendre la première ligne.
+
+Paramètres de requête :
+- export_format : csv (défaut) ou ndjson (un objet JSON par ligne)
+- gzip : 1 / true pour compresser le flux (fichier .gz)
+- date_debut / date_fin : bornes incluses sur export_date_field (format YYYY-MM-DD)
+"""
+import csv
+import io
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+
+FORMATS_EXPORT = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson; charset=utf-8', 'ndjson'),
+}
+
+
+# Alias de la clé primaire ajouté aux lignes lues (position du lot suivant), retiré avant l'export
+CLE_LOT = '_export_pk'
+
+
+def _lignes_par_lots(queryset, colonnes, taille_lot):
+    """
+    Lit les lignes values(*colonnes) par lots de taille_lot, par clé primaire croissante
+
+    Chaque lot est une requête indépendante (pk > dernière clé lue) : seul le lot courant est
+    en mémoire, quel que soit le SGBD.
+    """
+    queryset = queryset.values(*colonnes, **{CLE_LOT: F('pk')}).order_by('pk')
+    dernier = None
+    while True:
+        lot_qs = queryset if dernier is None else queryset.filter(pk__gt=dernier)
+        lot = list(lot_qs[:taille_lot])
+        if not lot:
+            return
+        dernier = lot[-1][CLE_LOT]
+        for ligne in lot:
+            del ligne[CLE_LOT]
+            yield ligne
+        if len(lot) < taille_lot:
+            return
+
+
+def _lignes_csv(lignes, colonnes, taille_lot):
+    """Génère le CSV par lots de lignes (en-tête compris)"""
+    tampon = io.StringIO()
+    writer = csv.writer(tampon)
+    writer.writerow(colonnes)
+    for numero, ligne in enumerate(lignes, start=1):
+        writer.writerow([ligne[colonne] for colonne in colonnes])
+        if numero % taille_lot == 0:
+            yield tampon.getvalue()
+            tampon.seek(0)
+            tampon.truncate(0)
+    yield tampon.getvalue()
+
+
+def _lignes_ndjson(lignes, taille_lot):
+    """Génère le NDJSON (un objet JSON par ligne) par lots de lignes"""
+    lot = []
+    for ligne in lignes:
+        lot.append(json.dumps(ligne, cls=DjangoJSONEncoder, ensure_ascii=False))
+        if len(lot) >= taille_lot:
+            yield '\n'.join(lot) + '\n'
+            lot = []
+    if lot:
+        yield '\n'.join(lot) + '\n'
+
+
+def _compresser_gzip(morceaux):
+    """Compresse un flux de texte au format gzip, morceau par morceau"""
+    compresseur = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31 = en-tête gzip
+    for morceau in morceaux:
+        donnees = compresseur.compress(morceau.encode('utf-8'))
+        if donnees:
+            yield donnees
+    yield compresseur.flush()
+
+
+class ExportMixin:
+    """
+    Ajoute l'action d'export en flux (CSV / NDJSON) à un ViewSet.
+
+    Attributs à définir dans le ViewSet :
+    - export_fields : colonnes exportées (lookups values(), ex: 'membre__numero_compte')
+    - export_date_field : champ de date pour date_debut / date_fin (optionnel)
+    - export_filename : préfixe du nom de fichier
+    La méthode get_export_queryset(queryset) permet d'ajouter des annotations exportables.
+    """
+    export_fields = ()
+    export_date_field = None
+    export_filename = 'export'
+    export_chunk_size = 2000
+
+    def get_export_queryset(self, queryset):
+        return queryset
+
+    @extend_schema(
+        summary="Export en flux (CSV / NDJSON)",
+        parameters=[
+            OpenApiParameter(
+                name='export_format',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Format du fichier : csv (défaut) ou ndjson',
+                required=False,
+                enum=list(FORMATS_EXPORT)
+            ),
+            OpenApiParameter(
+                name='gzip',
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description='Compresser le fichier (gzip)',
+                required=False
+            ),
+            OpenApiParameter(
+                name='date_debut',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description='Date de début incluse (format: YYYY-MM-DD)',
+                required=False
+            ),
+            OpenApiParameter(
+                name='date_fin',
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description='Date de fin incluse (format: YYYY-MM-DD)',
+                required=False
+            ),
+        ],
+        responses={(200, 'text/csv'): OpenApiTypes.BINARY, (200, 'application/x-ndjson'): OpenApiTypes.BINARY}
+    )
+    @action(detail=False, methods=['get'], url_path='export', pagination_class=None)
+    def export(self, request):
+        """
+        Exporte toutes les lignes visibles par l'utilisateur, en flux, au format CSV ou NDJSON.
+        """
+        format_export = request.query_params.get('export_format', 'csv').lower()
+        if format_export not in FORMATS_EXPORT:
+            return Response(
+                {'error': f"Format d'export invalide. Valeurs possibles : {', '.join(FORMATS_EXPORT)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        compresser = request.query_params.get('gzip', '').lower() in ('1', 'true', 'oui')
+
+        queryset = self.get_export_queryset(self.filter_queryset(self.get_queryset()))
+
+        if self.export_date_field:
+            bornes = {'date_debut': 'gte', 'date_fin': 'lte'}
+            for parametre, operateur in bornes.items():
+                valeur = request.query_params.get(parametre)
+                if not valeur:
+                    continue
+                try:
+                    date_valeur = parse_date(valeur)
+                except ValueError:
+                    date_valeur = None
+                if date_valeur is None:
+                    return Response(
+                        {'error': f'Format de {parametre} invalide. Utilisez le format YYYY-MM-DD.'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                champ_date = self.export_date_field
+                if queryset.model._meta.get_field(champ_date).get_internal_type() == 'DateTimeField':
+                    champ_date = f'{champ_date}__date'
+                queryset = queryset.filter(**{f'{champ_date}__{operateur}': date_valeur})
+
+        colonnes = list(self.export_fields)
+        lignes = _lignes_par_lots(queryset, colonnes, self.export_chunk_size)
+
+        if format_export == 'csv':
+            morceaux = _lignes_csv(lignes, colonnes, self.export_chunk_size)
+        else:
+            morceaux = _lignes_ndjson(lignes, self.export_chunk_size)
+
+        content_type, extension = FORMATS_EXPORT[format_export]
+        nom_fichier = f"{self.export_filename}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+        if compresser:
+            morceaux = _compresser_gzip(morceaux)
+            content_type = 'application/gzip'
+            nom_fichier += '.gz'
+
+        response = StreamingHttpResponse(morceaux, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{nom_fichier}"'
+        return response
@@ -0,0 +1,23 @@
+"""
+Mixins de modèles partagés par les applications COOPEC
+"""
+
+
+class ChampsMaintenusMixin:
+    """
+    Protège les champs maintenus en base par des mises à jour incrémentales (signals,
+    QuerySet.update(F(...) + delta)) : un save() complet d'une instance existante n'écrit jamais
+    ces champs, dont la valeur en mémoire peut être obsolète.
+
+    Les modèles déclarent les champs protégés dans CHAMPS_MAINTENUS. Un save(update_fields=...)
+    explicite n'est pas modifié.
+    """
+    CHAMPS_MAINTENUS = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and self.pk and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.CHAMPS_MAINTENUS
+            ]
+        super().save(*args, **kwargs)
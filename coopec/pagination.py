@@ -1,9 +1,281 @@
 """
 Pagination personnalisée pour l'API COOPEC
 15 enregistrements par page
+
+Deux modes, choisis par la requête :
+- pagination par numéro de page (défaut) : ?page=2&page_size=15
+- pagination par curseur (keyset) : ?cursor=  puis ?cursor=<valeur de next>
+  Chaque page est lue à partir de la dernière clé de tri vue (pas d'OFFSET ni de COUNT(*)) :
+  adapté aux longs historiques (synchronisation mobile des mouvements, dons, retraits...).
 """
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import datetime
+import hashlib
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import ParseError
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Pagination par clé (keyset / seek) sur l'ordre de tri du queryset.
+    
+    - L'ordre est celui du queryset (order_by) ou du Meta.ordering du modèle ; la clé primaire
+      est ajoutée en dernier critère pour garantir un ordre total.
+    - Le curseur est opaque : il encode les valeurs de tri du dernier (ou premier) élément vu
+      et le sens de lecture.
+    - Le nombre total n'est calculé que sur demande (?count=1) et mis en cache
+      (KEYSET_COUNT_CACHE_TIMEOUT secondes, 60 par défaut).
+    
+    Seuls les champs du modèle lui-même peuvent servir au tri (pas de relations ni d'expressions) ;
+    utiliser peut_paginer() pour le vérifier.
+    """
+    page_size = 15
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Curseur de pagination invalide.'
+    
+    # ------------------------------------------------------------------
+    # Ordre de tri
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def get_ordering(queryset):
+        """
+        Retourne l'ordre de tri du queryset sous forme de liste [(champ, décroissant)],
+        complété par la clé primaire, ou None si cet ordre ne permet pas la pagination par clé.
+        """
+        model = queryset.model
+        if queryset.query.extra_order_by:
+            return None
+        ordre = list(queryset.query.order_by) or (list(model._meta.ordering) if queryset.query.default_ordering else [])
+        
+        ordering = []
+        for terme in ordre:
+            if not isinstance(terme, str) or terme == '?' or '__' in terme:
+                return None
+            decroissant = terme.startswith('-')
+            nom = terme.lstrip('-+')
+            try:
+                champ = model._meta.pk if nom == 'pk' else model._meta.get_field(nom)
+            except FieldDoesNotExist:
+                return None
+            if not getattr(champ, 'concrete', False) or champ.many_to_many:
+                return None
+            ordering.append((champ, decroissant))
+        
+        if not any(champ.primary_key for champ, _ in ordering):
+            decroissant = ordering[-1][1] if ordering else False
+            ordering.append((model._meta.pk, decroissant))
+        return ordering
+    
+    @classmethod
+    def peut_paginer(cls, queryset):
+        """Indique si le queryset peut être paginé par clé"""
+        return hasattr(queryset, 'query') and cls.get_ordering(queryset) is not None
+    
+    @staticmethod
+    def _expression_tri(champ, decroissant):
+        if not champ.null:
+            return f"-{champ.attname}" if decroissant else champ.attname
+        # Position des NULL explicite pour que le curseur reste cohérent quel que soit le SGBD
+        if decroissant:
+            return F(champ.attname).desc(nulls_last=True)
+        return F(champ.attname).asc(nulls_first=True)
+    
+    @staticmethod
+    def _apres(champ, decroissant, valeur):
+        """Condition « strictement après valeur » pour un critère de tri"""
+        nom = champ.attname
+        if decroissant:
+            # NULL en dernier
+            if valeur is None:
+                return Q(pk__in=[])
+            condition = Q(**{f'{nom}__lt': valeur})
+            return condition | Q(**{f'{nom}__isnull': True}) if champ.null else condition
+        # NULL en premier
+        if valeur is None:
+            return Q(**{f'{nom}__isnull': False})
+        return Q(**{f'{nom}__gt': valeur})
+    
+    @staticmethod
+    def _egal(champ, valeur):
+        if valeur is None:
+            return Q(**{f'{champ.attname}__isnull': True})
+        return Q(**{champ.attname: valeur})
+    
+    def _filtrer_apres(self, queryset, ordering, valeurs):
+        """Filtre lexicographique : éléments strictement après la position (valeurs) dans l'ordre donné"""
+        condition = Q(pk__in=[])
+        prefixe = Q()
+        for (champ, decroissant), valeur in zip(ordering, valeurs):
+            condition |= prefixe & self._apres(champ, decroissant, valeur)
+            prefixe &= self._egal(champ, valeur)
+        return queryset.filter(condition)
+    
+    # ------------------------------------------------------------------
+    # Curseur
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def _encoder_valeur(valeur):
+        if isinstance(valeur, (datetime.datetime, datetime.date, datetime.time)):
+            return valeur.isoformat()
+        if isinstance(valeur, Decimal):
+            return str(valeur)
+        return valeur
+    
+    def encode_cursor(self, instance, ordering, precedent=False):
+        valeurs = [self._encoder_valeur(getattr(instance, champ.attname)) for champ, _ in ordering]
+        donnees = json.dumps({'v': valeurs, 'p': precedent}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(donnees.encode()).decode().rstrip('=')
+    
+    def decode_cursor(self, curseur, ordering):
+        """
+        Returns:
+            tuple: (valeurs, precedent)
+        
+        Raises:
+            ParseError: si le curseur est invalide (HTTP 400, corps {'error': ...})
+        """
+        try:
+            remplissage = '=' * (-len(curseur) % 4)
+            donnees = json.loads(base64.urlsafe_b64decode((curseur + remplissage).encode()).decode())
+            valeurs = donnees['v']
+            if len(valeurs) != len(ordering):
+                raise ValueError
+            valeurs = [
+                None if valeur is None else champ.to_python(valeur)
+                for (champ, _), valeur in zip(ordering, valeurs)
+            ]
+            return valeurs, bool(donnees.get('p', False))
+        except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError, ValidationError):
+            raise ParseError({'error': self.invalid_cursor_message})
+    
+    # ------------------------------------------------------------------
+    # Pagination
+    # ------------------------------------------------------------------
+    
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                taille = int(request.query_params[self.page_size_query_param])
+                if taille > 0:
+                    return min(taille, self.max_page_size)
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+    
+    def get_count(self, queryset):
+        """Nombre total d'éléments, mis en cache par requête SQL"""
+        try:
+            cle = 'keyset_count:' + hashlib.md5(str(queryset.query).encode()).hexdigest()
+        except Exception:
+            return queryset.count()
+        count = cache.get(cle)
+        if count is None:
+            count = queryset.count()
+            cache.set(cle, count, getattr(settings, 'KEYSET_COUNT_CACHE_TIMEOUT', 60))
+        return count
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        ordering = self.get_ordering(queryset)
+        if ordering is None:
+            raise ValueError('Le queryset ne peut pas être paginé par clé (ordre de tri non supporté).')
+        self.ordering = ordering
+        
+        compter = request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'oui')
+        self.count = self.get_count(queryset) if compter else None
+        
+        curseur = request.query_params.get(self.cursor_query_param)
+        precedent = False
+        if curseur:
+            valeurs, precedent = self.decode_cursor(curseur, ordering)
+            # Page précédente : lecture dans l'ordre inverse à partir de la position
+            sens = [(champ, not decroissant) for champ, decroissant in ordering] if precedent else ordering
+            queryset = self._filtrer_apres(queryset, sens, valeurs)
+        else:
+            sens = ordering
+        
+        queryset = queryset.order_by(*[self._expression_tri(champ, decroissant) for champ, decroissant in sens])
+        page = list(queryset[:self.page_size + 1])
+        a_plus = len(page) > self.page_size
+        page = page[:self.page_size]
+        if precedent:
+            page.reverse()
+        
+        self.next_cursor = None
+        self.previous_cursor = None
+        if page:
+            if a_plus or precedent:
+                self.next_cursor = self.encode_cursor(page[-1], ordering)
+            if (a_plus and precedent) or (curseur and not precedent):
+                self.previous_cursor = self.encode_cursor(page[0], ordering, precedent=True)
+        return page
+    
+    def _lien(self, curseur):
+        if curseur is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, curseur)
+    
+    def get_next_link(self):
+        return self._lien(self.next_cursor)
+    
+    def get_previous_link(self):
+        return self._lien(self.previous_cursor)
+    
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.count,  # Nombre total (uniquement avec ?count=1)
+            'next': self.get_next_link(),  # URL de la page suivante
+            'previous': self.get_previous_link(),  # URL de la page précédente
+            'page_size': self.page_size,  # Taille de la page
+            'results': data  # Les données de la page actuelle
+        })
+    
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'count': {'type': 'integer', 'nullable': True},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'page_size': {'type': 'integer'},
+                'results': schema,
+            },
+        }
+    
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Curseur de pagination (vide pour la première page, puis valeur de next / previous)',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.count_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Inclure le nombre total d\'éléments (1 / true) en mode curseur',
+                'schema': {'type': 'boolean'},
+            },
+        ]
 
 
 class StandardResultsSetPagination(PageNumberPagination):
@@ -12,15 +284,31 @@ class StandardResultsSetPagination(PageNumberPagination):
     Page 1 : enregistrements 1-15 (les 15 derniers)
     Page 2 : enregistrements 16-30
     etc.
+    
+    Avec le paramètre ?cursor (même vide), la pagination bascule en mode curseur (KeysetPagination)
+    lorsque l'ordre de tri du queryset le permet.
     """
     page_size = 15
     page_size_query_param = 'page_size'
     max_page_size = 100
+    keyset_pagination_class = KeysetPagination
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if (self.keyset_pagination_class.cursor_query_param in request.query_params
+                and self.keyset_pagination_class.peut_paginer(queryset)):
+            self.keyset = self.keyset_pagination_class()
+            self.keyset.page_size = self.page_size
+            self.keyset.max_page_size = self.max_page_size
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
     
     def get_paginated_response(self, data):
         """
         Retourne une réponse paginée avec les métadonnées
         """
+        if getattr(self, 'keyset', None) is not None:
+            return self.keyset.get_paginated_response(data)
         return Response({
             'count': self.page.paginator.count,  # Nombre total d'enregistrements
             'next': self.get_next_link(),  # URL de la page suivante
@@ -30,4 +318,7 @@ class StandardResultsSetPagination(PageNumberPagination):
             'total_pages': self.page.paginator.num_pages,  # Nombre total de pages
             'results': data  # Les données de la page actuelle
         })
-
+    
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + \
+            self.keyset_pagination_class().get_schema_operation_parameters(view)
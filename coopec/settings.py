@@ -48,6 +48,9 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Pagination par curseur (coopec/pagination.py) : durée de cache du nombre total (?cursor=&count=1)
+KEYSET_COUNT_CACHE_TIMEOUT = 60
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Coopec API',
     'DESCRIPTION': 'API de la COOPEC - Système de gestion de coopérative d\'épargne et de crédit',
@@ -88,6 +91,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'caisse.middleware.MemoisationCalculsMiddleware',  # Calculs financiers mémoïsés par requête GET
 ]
 
 
@@ -190,6 +194,10 @@ DEFAULT_FROM_EMAIL = 'pima62016@gmail.com'  # Remplacez par l'email de la coopé
 # 4. Créez un nouveau mot de passe d'application pour "Mail"
 # 5. Utilisez ce mot de passe dans EMAIL_HOST_PASSWORD
 
+# Pool de connexions SMTP (users/email_config.py) : connexions authentifiées réutilisées entre envois
+SMTP_POOL_TAILLE = 4  # Nombre maximum de connexions inactives conservées
+SMTP_POOL_INACTIVITE = 60  # Secondes d'inactivité avant fermeture d'une connexion du pool
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Note: 'corsheaders' is already included in INSTALLED_APPS above; removed duplicate block to avoid syntax errors.
 # Pendant le développement, vous pouvez autoriser l'origine de votre front-end :
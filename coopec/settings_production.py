@@ -97,6 +97,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'caisse.middleware.MemoisationCalculsMiddleware',  # Calculs financiers mémoïsés par requête GET
 ]
 
 ROOT_URLCONF = 'coopec.urls'
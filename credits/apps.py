@@ -5,4 +5,5 @@ class CreditsConfig(AppConfig):
     name = 'credits'
     
     def ready(self):
+        import credits.signals
         import credits.signals_emails
\ No newline at end of file
@@ -0,0 +1,55 @@
+"""
+Commande Django pour le balayage quotidien des échéances de crédit (à planifier chaque jour, cron)
+Usage:
+    python manage.py balayer_echeances_credits
+    python manage.py balayer_echeances_credits --sans-notifications
+    python manage.py balayer_echeances_credits --date 2025-01-31
+
+- passe en ECHEANCE_DEPASSEE, en une requête UPDATE, les crédits EN_COURS dont la date de fin est dépassée
+- met en file les rappels des crédits arrivant à échéance le jour même (envoyés par traiter_file_emails)
+"""
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from credits.tasks import balayer_echeances_credits
+
+
+class Command(BaseCommand):
+    help = 'Met à jour le statut des crédits échus et met en file les rappels des échéances du jour'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            type=str,
+            help='Date du balayage (YYYY-MM-DD, défaut: aujourd\'hui)'
+        )
+        parser.add_argument(
+            '--sans-notifications',
+            action='store_true',
+            help='Mettre à jour les statuts sans mettre les rappels en file'
+        )
+        parser.add_argument(
+            '--taille-lot',
+            type=int,
+            default=500,
+            help='Nombre de rappels insérés par requête (défaut: 500)'
+        )
+
+    def handle(self, *args, **options):
+        aujourd_hui = None
+        if options['date']:
+            try:
+                aujourd_hui = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError('Format de date invalide. Utilisez YYYY-MM-DD')
+        if options['taille_lot'] < 1:
+            raise CommandError('--taille-lot doit être supérieur à 0')
+
+        resultat = balayer_echeances_credits(
+            aujourd_hui,
+            notifier=not options['sans_notifications'],
+            taille_lot=options['taille_lot']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultat['statuts_mis_a_jour']} crédit(s) passé(s) en ECHEANCE_DEPASSEE, "
+            f"{resultat['rappels_en_file']} rappel(s) d'échéance mis en file"
+        ))
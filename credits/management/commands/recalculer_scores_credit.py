@@ -0,0 +1,85 @@
+"""
+Commande Django pour recalculer le résumé du score de crédit des membres et clients
+Usage:
+    python manage.py recalculer_scores_credit
+    python manage.py recalculer_scores_credit --verifier
+"""
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from users.models import Membre, Client
+from credits.models import Credit
+
+
+DECIMAL_FIELD = DecimalField(max_digits=12, decimal_places=1)
+
+
+def somme_scores(champ):
+    """Sous-requête : somme des scores des crédits du titulaire courant"""
+    sous_requete = (
+        Credit.objects.filter(**{champ: OuterRef('pk')})
+        .order_by().values(champ).annotate(total=Sum('score')).values('total')
+    )
+    return Coalesce(Subquery(sous_requete, output_field=DECIMAL_FIELD), Value(Decimal('0.0')), output_field=DECIMAL_FIELD)
+
+
+def nombre_credits(champ):
+    """Sous-requête : nombre de crédits du titulaire courant"""
+    sous_requete = (
+        Credit.objects.filter(**{champ: OuterRef('pk')})
+        .order_by().values(champ).annotate(nombre=Count('id')).values('nombre')
+    )
+    return Coalesce(Subquery(sous_requete, output_field=IntegerField()), Value(0))
+
+
+class Command(BaseCommand):
+    help = 'Recalcule le résumé du score de crédit (somme des scores, nombre de crédits) des membres et clients'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verifier',
+            action='store_true',
+            help='Vérifie seulement la cohérence sans rien modifier'
+        )
+
+    def handle(self, *args, **options):
+        incoherences = {}
+        for modele, champ in ((Membre, 'membre'), (Client, 'client')):
+            incoherences[modele] = list(
+                modele.objects.annotate(
+                    score_total_attendu=somme_scores(champ),
+                    score_nombre_credits_attendu=nombre_credits(champ),
+                ).exclude(
+                    Q(score_total=F('score_total_attendu'))
+                    & Q(score_nombre_credits=F('score_nombre_credits_attendu'))
+                ).values('id', 'score_total', 'score_nombre_credits', 'score_total_attendu', 'score_nombre_credits_attendu')
+            )
+            for ligne in incoherences[modele]:
+                self.stdout.write(self.style.WARNING(
+                    f"{modele.__name__} {ligne['id']}: score_total={ligne['score_total']} "
+                    f"(attendu {ligne['score_total_attendu']}), score_nombre_credits="
+                    f"{ligne['score_nombre_credits']} (attendu {ligne['score_nombre_credits_attendu']})"
+                ))
+
+        total_incoherences = sum(len(lignes) for lignes in incoherences.values())
+        if total_incoherences == 0:
+            self.stdout.write(self.style.SUCCESS('Tous les résumés de score sont cohérents.'))
+            return
+
+        if options['verifier']:
+            raise CommandError(
+                f"{total_incoherences} titulaire(s) avec un résumé de score incohérent. "
+                f"Relancez sans --verifier pour les recalculer."
+            )
+
+        with transaction.atomic():
+            for modele, lignes in incoherences.items():
+                for ligne in lignes:
+                    modele.objects.filter(pk=ligne['id']).update(
+                        score_total=ligne['score_total_attendu'] or Decimal('0.0'),
+                        score_nombre_credits=ligne['score_nombre_credits_attendu'] or 0,
+                    )
+
+        self.stdout.write(self.style.SUCCESS(f'{total_incoherences} résumé(s) de score recalculé(s).'))
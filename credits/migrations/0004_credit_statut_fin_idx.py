@@ -0,0 +1,17 @@
+# Generated by Django 4.2.25 on 2026-10-16 23:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('credits', '0003_alter_credit_options_alter_remboursement_options'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='credit',
+            index=models.Index(fields=['statut', 'date_fin'], name='credits_statut_fin_idx'),
+        ),
+    ]
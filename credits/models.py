@@ -218,6 +218,10 @@ class Credit(models.Model):
         verbose_name = "Crédit"
         verbose_name_plural = "Crédits"
         ordering = ['-date_octroi', '-id']  # Trier par date d'octroi décroissante, puis par ID décroissant
+        indexes = [
+            # Balayage quotidien des échéances (credits.tasks) et filtres des rapports sur le statut
+            models.Index(fields=['statut', 'date_fin'], name='credits_statut_fin_idx'),
+        ]
 
 
 class Remboursement(models.Model):
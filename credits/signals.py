@@ -0,0 +1,81 @@
+"""
+Signaux Django qui maintiennent le résumé du score de crédit des membres et clients
+(Membre.score_total / score_nombre_credits, Client.score_total / score_nombre_credits).
+
+Le résumé est recalculé pour le titulaire concerné à la création et à la suppression d'un crédit,
+et quand le score ou le titulaire d'un crédit change (Remboursement.save fixe le score final
+du crédit puis l'enregistre).
+
+Note : les opérations en masse (QuerySet.update(), bulk_create()) ne déclenchent pas
+de signals ; utiliser ensuite : python manage.py recalculer_scores_credit
+"""
+from decimal import Decimal
+from django.db.models import Count, Sum
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from users.models import Membre, Client
+from .models import Credit
+
+
+def recalculer_score_titulaire(modele, champ, titulaire_id):
+    """
+    Recalcule le résumé du score d'un membre ou d'un client à partir de ses crédits
+
+    Args:
+        modele: Membre ou Client
+        champ (str): Champ de Credit vers le titulaire ('membre' ou 'client')
+        titulaire_id (int): ID du titulaire (ignoré si None)
+    """
+    if titulaire_id is None:
+        return
+    resume = Credit.objects.filter(**{f'{champ}_id': titulaire_id}).aggregate(
+        total=Sum('score'),
+        nombre=Count('id')
+    )
+    modele.objects.filter(pk=titulaire_id).update(
+        score_total=resume['total'] or Decimal('0.0'),
+        score_nombre_credits=resume['nombre']
+    )
+
+
+def _recalculer_scores_titulaires(membre_ids, client_ids):
+    for membre_id in set(membre_ids):
+        recalculer_score_titulaire(Membre, 'membre', membre_id)
+    for client_id in set(client_ids):
+        recalculer_score_titulaire(Client, 'client', client_id)
+
+
+@receiver(pre_save, sender=Credit)
+def memoriser_ancien_score_credit(sender, instance, **kwargs):
+    """Mémorise le titulaire et le score de l'ancienne version du crédit (modification)"""
+    instance._ancien_score_credit = None
+    if instance.pk is None:
+        return
+    instance._ancien_score_credit = (
+        Credit.objects.filter(pk=instance.pk).values_list('membre_id', 'client_id', 'score').first()
+    )
+
+
+@receiver(post_save, sender=Credit)
+def mettre_a_jour_score_apres_credit(sender, instance, created, **kwargs):
+    """Met à jour le résumé du score du titulaire après création ou modification d'un crédit"""
+    ancien = getattr(instance, '_ancien_score_credit', None)
+    instance._ancien_score_credit = None
+
+    if created or ancien is None:
+        _recalculer_scores_titulaires([instance.membre_id], [instance.client_id])
+        return
+
+    ancien_membre_id, ancien_client_id, ancien_score = ancien
+    if (ancien_membre_id, ancien_client_id, ancien_score) == (instance.membre_id, instance.client_id, instance.score):
+        return
+    _recalculer_scores_titulaires(
+        [ancien_membre_id, instance.membre_id],
+        [ancien_client_id, instance.client_id]
+    )
+
+
+@receiver(post_delete, sender=Credit)
+def mettre_a_jour_score_apres_suppression(sender, instance, **kwargs):
+    """Retire le crédit supprimé du résumé du score de son titulaire"""
+    _recalculer_scores_titulaires([instance.membre_id], [instance.client_id])
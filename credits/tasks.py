@@ -1,7 +1,76 @@
+"""
+Tâches planifiées sur les crédits (python manage.py balayer_echeances_credits)
+
+Le statut ECHEANCE_DEPASSEE n'est calculé par Credit.save() qu'à l'enregistrement d'un crédit :
+le balayage quotidien le met à jour pour tous les crédits en une seule requête UPDATE, puis met
+en file (EnvoiEmail) les rappels des crédits arrivant à échéance le jour même. Les emails sont
+envoyés par le worker de la file (python manage.py traiter_file_emails), une connexion SMTP par lot.
+"""
 from django.utils import timezone
+from rapports.models import EnvoiEmail
+from rapports.email_services import mettre_en_file_emails
 from .models import Credit
 
-def notifier_credits_echeance():
-    for credit in Credit.objects.filter(statut='EN_COURS'):
-        if credit.jours_restants == 0:
-            credit.check_and_notify_echeance()
+
+TYPE_EMAIL_ECHEANCE = 'echeance_credit'
+
+
+def mettre_a_jour_statuts_echeance(aujourd_hui=None):
+    """
+    Passe en ECHEANCE_DEPASSEE les crédits EN_COURS dont la date de fin est dépassée
+    (UPDATE ... WHERE statut = 'EN_COURS' AND date_fin < aujourd'hui, sans charger les crédits)
+
+    Returns:
+        int: Nombre de crédits mis à jour
+    """
+    from caisse.services import invalider_snapshots_repartition
+
+    aujourd_hui = aujourd_hui or timezone.now().date()
+    mis_a_jour = Credit.objects.filter(
+        statut='EN_COURS',
+        date_fin__lt=aujourd_hui,
+        solde_restant__gt=0
+    ).update(statut='ECHEANCE_DEPASSEE')
+    if mis_a_jour:
+        # UPDATE en masse : pas de signal post_save, invalider explicitement les répartitions
+        invalider_snapshots_repartition()
+    return mis_a_jour
+
+
+def notifier_credits_echeance(aujourd_hui=None, taille_lot=500):
+    """
+    Met en file les rappels des crédits EN_COURS arrivant à échéance aujourd'hui
+
+    Un crédit ne reçoit qu'un rappel : ceux ayant déjà un rappel en file ou envoyé (quelle que
+    soit sa date de création) sont ignorés, le balayage peut être relancé.
+
+    Returns:
+        int: Nombre de rappels mis en file
+    """
+    aujourd_hui = aujourd_hui or timezone.now().date()
+    # operation_id non NULL : un NULL dans la sous-requête NOT IN exclurait tous les crédits
+    deja_notifies = EnvoiEmail.objects.filter(
+        type_operation=TYPE_EMAIL_ECHEANCE,
+        operation_id__isnull=False
+    ).values('operation_id')
+    credit_ids = list(
+        Credit.objects.filter(statut='EN_COURS', date_fin=aujourd_hui, solde_restant__gt=0)
+        .exclude(id__in=deja_notifies)
+        .order_by('id')
+        .values_list('id', flat=True)
+    )
+    return mettre_en_file_emails(TYPE_EMAIL_ECHEANCE, credit_ids, taille_lot=taille_lot)
+
+
+def balayer_echeances_credits(aujourd_hui=None, notifier=True, taille_lot=500):
+    """
+    Balayage quotidien : statuts des crédits échus puis rappels des échéances du jour
+
+    Returns:
+        dict: {'statuts_mis_a_jour': int, 'rappels_en_file': int}
+    """
+    aujourd_hui = aujourd_hui or timezone.now().date()
+    return {
+        'statuts_mis_a_jour': mettre_a_jour_statuts_echeance(aujourd_hui),
+        'rappels_en_file': notifier_credits_echeance(aujourd_hui, taille_lot) if notifier else 0,
+    }
@@ -2,23 +2,32 @@ from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
 from drf_spectacular.utils import extend_schema
 from coopec.pagination import StandardResultsSetPagination
+from coopec.exports import ExportMixin
 from users.permissions import IsAdminOrSuperAdmin
 from .models import  Credit, Remboursement
 from .serializers import CreditSerializer, RemboursementSerializer
 
 
 @extend_schema(tags=['Crédits'])
-class CreditViewSet(viewsets.ModelViewSet):
+class CreditViewSet(ExportMixin, viewsets.ModelViewSet):
     """
     ViewSet pour les crédits.
     - ADMIN et SUPERADMIN : voient tous les crédits
     - MEMBRE : voit uniquement ses propres crédits
     - CLIENT : voit uniquement ses propres crédits
+    Export en flux : GET /api/credits/export/?export_format=csv|ndjson&gzip=1&date_debut=&date_fin=
     """
     queryset = Credit.objects.all()
     serializer_class = CreditSerializer
     pagination_class = StandardResultsSetPagination
     permission_classes = [IsAuthenticated]
+    export_filename = 'credits'
+    export_date_field = 'date_octroi'
+    export_fields = (
+        'id', 'membre_id', 'membre__numero_compte', 'client_id', 'client__numero_compte',
+        'montant', 'taux_interet', 'methode_interet', 'duree', 'duree_type',
+        'date_octroi', 'date_fin', 'solde_restant', 'statut', 'score', 'date_remboursement_final',
+    )
     
     def get_queryset(self):
         """
@@ -43,17 +52,24 @@ class CreditViewSet(viewsets.ModelViewSet):
 
 
 @extend_schema(tags=['Crédits'])
-class RemboursementViewSet(viewsets.ModelViewSet):
+class RemboursementViewSet(ExportMixin, viewsets.ModelViewSet):
     """
     ViewSet pour les remboursements.
     - ADMIN et SUPERADMIN : voient tous les remboursements
     - MEMBRE : voit uniquement les remboursements de ses crédits
     - CLIENT : voit uniquement les remboursements de ses crédits
+    Export en flux : GET /api/remboursements/export/?export_format=csv|ndjson&gzip=1&date_debut=&date_fin=
     """
     queryset = Remboursement.objects.all()
     serializer_class = RemboursementSerializer
     pagination_class = StandardResultsSetPagination
     permission_classes = [IsAuthenticated]
+    export_filename = 'remboursements'
+    export_date_field = 'echeance'
+    export_fields = (
+        'id', 'credit_id', 'credit__membre__numero_compte', 'credit__client__numero_compte',
+        'montant', 'echeance',
+    )
     
     def get_queryset(self):
         """
@@ -0,0 +1,111 @@
+"""
+Commande Django pour vérifier (et corriger) les totaux stockés des souscriptions
+Usage:
+    python manage.py verifier_totaux_souscriptions
+    python manage.py verifier_totaux_souscriptions --corriger
+"""
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from membres.models import SouscriptEpargne, DonnatEpargne, Retrait, SouscriptionPartSocial, DonnatPartSocial
+
+
+DECIMAL_FIELD = DecimalField(max_digits=15, decimal_places=2)
+
+
+def somme_montants(modele, champ_fk):
+    """Sous-requête : somme des montants des opérations liées à la souscription courante"""
+    sous_requete = (
+        modele.objects.filter(**{champ_fk: OuterRef('pk')})
+        .order_by().values(champ_fk).annotate(total=Sum('montant')).values('total')
+    )
+    return Coalesce(Subquery(sous_requete, output_field=DECIMAL_FIELD), Value(Decimal('0.00')), output_field=DECIMAL_FIELD)
+
+
+def nombre_operations(modele, champ_fk):
+    """Sous-requête : nombre d'opérations liées à la souscription courante"""
+    sous_requete = (
+        modele.objects.filter(**{champ_fk: OuterRef('pk')})
+        .order_by().values(champ_fk).annotate(nombre=Count('id')).values('nombre')
+    )
+    return Coalesce(Subquery(sous_requete, output_field=IntegerField()), Value(0))
+
+
+class Command(BaseCommand):
+    help = 'Vérifie que les totaux stockés des souscriptions (épargne, parts sociales) correspondent aux opérations'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--corriger',
+            action='store_true',
+            help='Corrige les totaux incohérents'
+        )
+
+    def handle(self, *args, **options):
+        corriger = options['corriger']
+
+        # === SOUSCRIPTIONS D'ÉPARGNE ===
+        epargnes_incoherentes = list(
+            SouscriptEpargne.objects.annotate(
+                total_donne_attendu=somme_montants(DonnatEpargne, 'souscriptEpargne'),
+                total_retire_attendu=somme_montants(Retrait, 'souscriptEpargne'),
+            ).exclude(
+                Q(total_donne=F('total_donne_attendu'))
+                & Q(total_retire=F('total_retire_attendu'))
+                & Q(solde_epargne=F('total_donne_attendu') - F('total_retire_attendu'))
+            ).values('id', 'total_donne', 'total_retire', 'solde_epargne', 'total_donne_attendu', 'total_retire_attendu')
+        )
+
+        for ligne in epargnes_incoherentes:
+            self.stdout.write(self.style.WARNING(
+                f"SouscriptEpargne {ligne['id']}: total_donne={ligne['total_donne']} (attendu {ligne['total_donne_attendu']}), "
+                f"total_retire={ligne['total_retire']} (attendu {ligne['total_retire_attendu']}), "
+                f"solde_epargne={ligne['solde_epargne']}"
+            ))
+
+        # === SOUSCRIPTIONS DE PARTS SOCIALES ===
+        parts_incoherentes = list(
+            SouscriptionPartSocial.objects.annotate(
+                montant_total_verse_attendu=somme_montants(DonnatPartSocial, 'souscription_part_social'),
+                nombre_versements_attendu=nombre_operations(DonnatPartSocial, 'souscription_part_social'),
+            ).exclude(
+                Q(montant_total_verse=F('montant_total_verse_attendu'))
+                & Q(nombre_versements_effectues=F('nombre_versements_attendu'))
+            ).values('id', 'montant_total_verse', 'nombre_versements_effectues', 'montant_total_verse_attendu', 'nombre_versements_attendu')
+        )
+        for ligne in parts_incoherentes:
+            self.stdout.write(self.style.WARNING(
+                f"SouscriptionPartSocial {ligne['id']}: montant_total_verse={ligne['montant_total_verse']} "
+                f"(attendu {ligne['montant_total_verse_attendu']}), nombre_versements_effectues="
+                f"{ligne['nombre_versements_effectues']} (attendu {ligne['nombre_versements_attendu']})"
+            ))
+
+        total_incoherences = len(epargnes_incoherentes) + len(parts_incoherentes)
+        if total_incoherences == 0:
+            self.stdout.write(self.style.SUCCESS('Tous les totaux stockés des souscriptions sont cohérents.'))
+            return
+
+        if not corriger:
+            raise CommandError(
+                f"{total_incoherences} souscription(s) avec des totaux incohérents. "
+                f"Relancez avec --corriger pour les recalculer."
+            )
+
+        with transaction.atomic():
+            for ligne in epargnes_incoherentes:
+                total_donne = ligne['total_donne_attendu'] or Decimal('0.00')
+                total_retire = ligne['total_retire_attendu'] or Decimal('0.00')
+                SouscriptEpargne.objects.filter(pk=ligne['id']).update(
+                    total_donne=total_donne,
+                    total_retire=total_retire,
+                    solde_epargne=total_donne - total_retire,
+                )
+            for ligne in parts_incoherentes:
+                SouscriptionPartSocial.objects.filter(pk=ligne['id']).update(
+                    montant_total_verse=ligne['montant_total_verse_attendu'] or Decimal('0.00'),
+                    nombre_versements_effectues=ligne['nombre_versements_attendu'] or 0,
+                )
+
+        self.stdout.write(self.style.SUCCESS(f'{total_incoherences} souscription(s) corrigée(s).'))
@@ -0,0 +1,77 @@
+# Generated by Django 4.2.25 on 2026-10-16 22:39
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def initialiser_totaux(apps, schema_editor):
+    """Initialise les totaux stockés à partir des donations et retraits existants"""
+    from django.db.models import Count, DecimalField, F, IntegerField, OuterRef, Subquery, Sum, Value
+    from django.db.models.functions import Coalesce
+
+    SouscriptEpargne = apps.get_model('membres', 'SouscriptEpargne')
+    DonnatEpargne = apps.get_model('membres', 'DonnatEpargne')
+    Retrait = apps.get_model('membres', 'Retrait')
+    SouscriptionPartSocial = apps.get_model('membres', 'SouscriptionPartSocial')
+    DonnatPartSocial = apps.get_model('membres', 'DonnatPartSocial')
+
+    decimal_field = DecimalField(max_digits=15, decimal_places=2)
+    zero = Value(Decimal('0.00'), output_field=decimal_field)
+
+    def somme(modele, champ_fk):
+        sous_requete = (
+            modele.objects.filter(**{champ_fk: OuterRef('pk')})
+            .order_by().values(champ_fk).annotate(total=Sum('montant')).values('total')
+        )
+        return Coalesce(Subquery(sous_requete, output_field=decimal_field), zero, output_field=decimal_field)
+
+    SouscriptEpargne.objects.update(
+        total_donne=somme(DonnatEpargne, 'souscriptEpargne'),
+        total_retire=somme(Retrait, 'souscriptEpargne'),
+    )
+    SouscriptEpargne.objects.update(solde_epargne=F('total_donne') - F('total_retire'))
+
+    nombre_versements = (
+        DonnatPartSocial.objects.filter(souscription_part_social=OuterRef('pk'))
+        .order_by().values('souscription_part_social').annotate(nombre=Count('id')).values('nombre')
+    )
+    SouscriptionPartSocial.objects.update(
+        montant_total_verse=somme(DonnatPartSocial, 'souscription_part_social'),
+        nombre_versements_effectues=Coalesce(Subquery(nombre_versements, output_field=IntegerField()), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('membres', '0003_alter_compte_options_alter_donnatepargne_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='souscriptepargne',
+            name='solde_epargne',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, help_text='Solde actuel : total_donne - total_retire (maintenu automatiquement)', max_digits=15),
+        ),
+        migrations.AddField(
+            model_name='souscriptepargne',
+            name='total_donne',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, help_text='Montant total des donations (maintenu automatiquement)', max_digits=15),
+        ),
+        migrations.AddField(
+            model_name='souscriptepargne',
+            name='total_retire',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, help_text='Montant total des retraits (maintenu automatiquement)', max_digits=15),
+        ),
+        migrations.AddField(
+            model_name='souscriptionpartsocial',
+            name='montant_total_verse',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, help_text='Montant total déjà versé (maintenu automatiquement)', max_digits=15),
+        ),
+        migrations.AddField(
+            model_name='souscriptionpartsocial',
+            name='nombre_versements_effectues',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Nombre de versements déjà effectués (maintenu automatiquement)'),
+        ),
+        migrations.RunPython(initialiser_totaux, migrations.RunPython.noop),
+    ]
@@ -6,6 +6,7 @@ from datetime import date
 from django.db import models
 from django.utils import timezone
 from decimal import Decimal
+from coopec.mixins import ChampsMaintenusMixin
 from users import *
 from users.models import *
 
@@ -48,42 +49,91 @@ class FraisAdhesion(models.Model):
             return f"FraisAdhesion({self.titulaire_client}, {self.montant}, {self.date_paiement})"
         return f"FraisAdhesion({self.montant}, {self.date_paiement})"
 
-# Create your models here.
-class SouscriptEpargne(models.Model):
-    designation = models.CharField(max_length=100)
-    compte = models.ForeignKey(Compte, on_delete=models.CASCADE)
-    date_souscription = models.DateField(default=get_default_date, help_text="Date de souscription (automatique)")
-    montant_souscrit = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, help_text="Montant cible (optionnel, null = épargne illimitée)")
-    
-    @property
-    def total_donne(self):
+class SouscriptEpargneQuerySet(models.QuerySet):
+    def ouvertes(self):
         """
-        Calcule le montant total déjà donné sur cette souscription.
-        
-        Returns:
-            Decimal: Montant total des donations
+        Souscriptions pouvant encore recevoir des dons :
+        épargne illimitée (montant_souscrit NULL) ou montant souscrit non atteint (total_donne < montant_souscrit).
         """
-        return sum([d.montant for d in self.donnatepargne_set.all()])
+        from django.db.models import Q, F
+        
+        return self.filter(Q(montant_souscrit__isnull=True) | Q(montant_souscrit__gt=F('total_donne')))
     
-    @property
-    def total_retire(self):
+    def with_balances(self):
+        """
+        Annote les soldes calculés en SQL (à partir des totaux stockés) et charge les relations
+        affichées par les serializers, pour des listes à nombre de requêtes constant :
+        - montant_restant_annote : montant_souscrit - total_donne (min 0), NULL si épargne illimitée
         """
-        Calcule le montant total retiré sur cette souscription.
+        from django.db.models import Case, When, Value, F, DecimalField
+        from django.db.models.functions import Greatest
         
-        Returns:
-            Decimal: Montant total des retraits
+        decimal_field = DecimalField(max_digits=15, decimal_places=2)
+        return self.select_related(
+            'compte', 'compte__titulaire_membre', 'compte__titulaire_client'
+        ).annotate(
+            montant_restant_annote=Case(
+                When(montant_souscrit__isnull=True, then=Value(None, output_field=decimal_field)),
+                default=Greatest(
+                    F('montant_souscrit') - F('total_donne'),
+                    Value(Decimal('0.00'), output_field=decimal_field),
+                    output_field=decimal_field
+                ),
+                output_field=decimal_field,
+            )
+        )
+
+
+class SouscriptionPartSocialQuerySet(models.QuerySet):
+    def with_balances(self):
         """
-        return sum([r.montant for r in self.retrait_set.all()])
-    
-    @property
-    def solde_epargne(self):
+        Annote les valeurs calculées en SQL (à partir des totaux stockés) et charge les relations
+        affichées par les serializers, pour des listes à nombre de requêtes constant :
+        - montant_cible_annote : partSocial.montant_souscrit × nombre_versements_prevu
+        - est_complete_annote : montant_total_verse >= montant_cible
+        - montant_restant_annote : montant_cible - montant_total_verse (min 0)
         """
-        Calcule le solde actuel de l'épargne (dons - retraits).
+        from django.db.models import Case, When, Value, F, Q, BooleanField, DecimalField, ExpressionWrapper
+        from django.db.models.functions import Greatest
         
-        Returns:
-            Decimal: Solde actuel (total_donne - total_retire)
-        """
-        return self.total_donne - self.total_retire
+        decimal_field = DecimalField(max_digits=15, decimal_places=2)
+        return self.select_related('membre', 'partSocial').annotate(
+            montant_cible_annote=ExpressionWrapper(
+                F('partSocial__montant_souscrit') * F('nombre_versements_prevu'),
+                output_field=decimal_field
+            ),
+        ).annotate(
+            est_complete_annote=Case(
+                When(montant_total_verse__gte=F('montant_cible_annote'), then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+            montant_restant_annote=Greatest(
+                F('montant_cible_annote') - F('montant_total_verse'),
+                Value(Decimal('0.00'), output_field=decimal_field),
+                output_field=decimal_field
+            ),
+        )
+
+
+# Create your models here.
+class SouscriptEpargne(ChampsMaintenusMixin, models.Model):
+    designation = models.CharField(max_length=100)
+    compte = models.ForeignKey(Compte, on_delete=models.CASCADE)
+    date_souscription = models.DateField(default=get_default_date, help_text="Date de souscription (automatique)")
+    montant_souscrit = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, help_text="Montant cible (optionnel, null = épargne illimitée)")
+    
+    # Totaux stockés, maintenus de façon transactionnelle par les signals (membres/signals.py)
+    # à chaque création / modification / suppression de DonnatEpargne et de Retrait.
+    # Utilisables dans filter() / order_by(). Vérification : python manage.py verifier_totaux_souscriptions
+    total_donne = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'), editable=False, help_text="Montant total des donations (maintenu automatiquement)")
+    total_retire = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'), editable=False, help_text="Montant total des retraits (maintenu automatiquement)")
+    solde_epargne = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'), editable=False, help_text="Solde actuel : total_donne - total_retire (maintenu automatiquement)")
+    
+    objects = SouscriptEpargneQuerySet.as_manager()
+    
+    # Jamais écrits par un save() complet (voir ChampsMaintenusMixin)
+    CHAMPS_MAINTENUS = ('total_donne', 'total_retire', 'solde_epargne')
     
     @property
     def montant_restant(self):
@@ -150,7 +200,7 @@ class PartSocial(models.Model):
     def __str__(self):
         return f"PartSocial {self.annee} - {self.montant_souscrit} FCFA"
 
-class SouscriptionPartSocial(models.Model):
+class SouscriptionPartSocial(ChampsMaintenusMixin, models.Model):
     """
     Table intermédiaire entre PartSocial et DonnatPartSocial.
     Lie un membre à une part sociale et spécifie le nombre de versements prévus.
@@ -166,15 +216,16 @@ class SouscriptionPartSocial(models.Model):
     def __str__(self):
         return f"{self.membre} - PartSocial {self.partSocial.annee} ({self.nombre_versements_prevu} versements)"
     
-    @property
-    def nombre_versements_effectues(self):
-        """Retourne le nombre de versements déjà effectués"""
-        return self.donnatpartsocial_set.count()
+    # Totaux stockés, maintenus de façon transactionnelle par les signals (membres/signals.py)
+    # à chaque création / modification / suppression de DonnatPartSocial.
+    # Utilisables dans filter() / order_by(). Vérification : python manage.py verifier_totaux_souscriptions
+    nombre_versements_effectues = models.PositiveIntegerField(default=0, editable=False, help_text="Nombre de versements déjà effectués (maintenu automatiquement)")
+    montant_total_verse = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'), editable=False, help_text="Montant total déjà versé (maintenu automatiquement)")
     
-    @property
-    def montant_total_verse(self):
-        """Retourne le montant total déjà versé"""
-        return sum([d.montant for d in self.donnatpartsocial_set.all()])
+    objects = SouscriptionPartSocialQuerySet.as_manager()
+    
+    # Jamais écrits par un save() complet (voir ChampsMaintenusMixin)
+    CHAMPS_MAINTENUS = ('nombre_versements_effectues', 'montant_total_verse')
     
     @property
     def montant_cible(self):
@@ -145,14 +145,24 @@ class SouscriptionPartSocialSerializer(serializers.ModelSerializer):
     partSocial_id = serializers.PrimaryKeyRelatedField(queryset=PartSocial.objects.all(), write_only=True, source='partSocial')
     nombre_versements_effectues = serializers.ReadOnlyField()
     montant_total_verse = serializers.ReadOnlyField()
-    montant_cible = serializers.ReadOnlyField()
-    est_complete = serializers.ReadOnlyField()
-    montant_restant = serializers.ReadOnlyField()
+    montant_cible = serializers.SerializerMethodField()
+    est_complete = serializers.SerializerMethodField()
+    montant_restant = serializers.SerializerMethodField()
     
     class Meta:
         model = SouscriptionPartSocial
         fields = '__all__'
     
+    # Utiliser les valeurs annotées par SouscriptionPartSocial.objects.with_balances() si présentes
+    def get_montant_cible(self, obj):
+        return obj.montant_cible_annote if hasattr(obj, 'montant_cible_annote') else obj.montant_cible
+    
+    def get_est_complete(self, obj):
+        return obj.est_complete_annote if hasattr(obj, 'est_complete_annote') else obj.est_complete
+    
+    def get_montant_restant(self, obj):
+        return obj.montant_restant_annote if hasattr(obj, 'montant_restant_annote') else obj.montant_restant
+    
     def validate(self, data):
         membre_num = data.pop('membre_numero', None)
         if not membre_num:
@@ -221,7 +231,7 @@ class SouscriptEpargneSerializer(serializers.ModelSerializer):
     total_donne = serializers.ReadOnlyField(help_text="Montant total déjà donné")
     total_retire = serializers.ReadOnlyField(help_text="Montant total retiré")
     solde_epargne = serializers.ReadOnlyField(help_text="Solde actuel de l'épargne (dons - retraits)")
-    montant_restant = serializers.ReadOnlyField(help_text="Montant restant à verser (None si épargne illimitée)")
+    montant_restant = serializers.SerializerMethodField(help_text="Montant restant à verser (None si épargne illimitée)")
     date_souscription = serializers.DateField(read_only=True, help_text="Date de souscription (automatique, non modifiable)")
     compte = CompteSerializer(read_only=True)
     compte_numero = serializers.CharField(write_only=True, required=False, allow_null=True)
@@ -235,6 +245,12 @@ class SouscriptEpargneSerializer(serializers.ModelSerializer):
             'date_souscription': {'read_only': True},
         }
 
+    def get_montant_restant(self, obj):
+        # Utiliser la valeur annotée par SouscriptEpargne.objects.with_balances() si présente
+        if hasattr(obj, 'montant_restant_annote'):
+            return obj.montant_restant_annote
+        return obj.montant_restant
+
     def validate(self, data):
         compte_num = data.pop('compte_numero', None)
         if compte_num:
@@ -273,44 +289,16 @@ class SouscriptEpargneSerializer(serializers.ModelSerializer):
 # --- DonnatEpargneSerializer avec inner join sur souscriptEpargne ---
 class DonnatEpargneSerializer(serializers.ModelSerializer):
     souscriptEpargne = SouscriptEpargneSerializer(read_only=True)
+    # Seules les souscriptions encore ouvertes (illimitées ou montant_restant > 0) sont acceptées.
+    # Filtre SQL sur le total stocké, évalué uniquement lors de la validation d'une écriture.
     souscriptEpargne_id = serializers.PrimaryKeyRelatedField(
-        queryset=SouscriptEpargne.objects.all(), 
+        queryset=SouscriptEpargne.objects.ouvertes(), 
         write_only=True, 
         source='souscriptEpargne',
         help_text="ID de la souscription d'épargne (seules les souscriptions non complètes sont disponibles)"
     )
     montant_restant = serializers.SerializerMethodField(help_text="Montant restant à verser sur la souscription")
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        from decimal import Decimal
-        from .models import SouscriptEpargne
-        
-        # Filtrer les souscriptions qui ont atteint leur montant souscrit
-        # On garde seulement :
-        # - Les souscriptions avec montant_souscrit=None (illimitées)
-        # - Les souscriptions où montant_restant > 0
-        queryset = SouscriptEpargne.objects.all()
-        
-        # Filtrer manuellement pour exclure celles qui ont atteint leur but
-        souscriptions_valides = []
-        for souscription in queryset:
-            if souscription.montant_souscrit is None:
-                # Épargne illimitée, toujours valide
-                souscriptions_valides.append(souscription.id)
-            else:
-                # Vérifier si le montant restant > 0
-                montant_restant = souscription.montant_restant
-                if montant_restant is not None and montant_restant > Decimal('0.00'):
-                    souscriptions_valides.append(souscription.id)
-        
-        # Mettre à jour le queryset
-        if souscriptions_valides:
-            self.fields['souscriptEpargne_id'].queryset = SouscriptEpargne.objects.filter(id__in=souscriptions_valides)
-        else:
-            # Si aucune souscription valide, utiliser un queryset vide
-            self.fields['souscriptEpargne_id'].queryset = SouscriptEpargne.objects.none()
-
     class Meta:
         model = DonnatEpargne
         fields = '__all__'
@@ -1,6 +1,9 @@
-from django.db.models.signals import post_save, post_delete
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
-from .models import DonnatPartSocial, FraisAdhesion, SouscriptionPartSocial
+from .models import DonnatPartSocial, FraisAdhesion, SouscriptionPartSocial, SouscriptEpargne, DonnatEpargne, Retrait
 from users.models import Membre, Client
 
 def update_membre_actif(membre):
@@ -34,3 +37,80 @@ def frais_adhesion_changed(sender, instance, **kwargs):
         update_membre_actif(instance.titulaire_membre)
     if instance.titulaire_client:
         update_client_actif(instance.titulaire_client)
+
+
+# ============================================================================
+# TOTAUX STOCKÉS DES SOUSCRIPTIONS (épargne et parts sociales)
+# ============================================================================
+
+def _appliquer_deltas_totaux(modele_souscription, souscription_id, deltas):
+    """Applique des variations aux totaux stockés d'une souscription (F(), sans lecture préalable)"""
+    if souscription_id is None or not deltas:
+        return
+    modele_souscription.objects.filter(pk=souscription_id).update(
+        **{champ: F(champ) + valeur for champ, valeur in deltas.items()}
+    )
+
+
+def _connecter_totaux_souscription(modele, champ_fk, modele_souscription, calculer_deltas):
+    """
+    Maintient les totaux stockés de la souscription liée (champ_fk) à chaque création,
+    modification (montant ou souscription changés) et suppression d'une opération.
+    calculer_deltas(montant, nombre) retourne les variations à appliquer ({champ: valeur})
+    pour une variation de montant et du nombre d'opérations.
+    """
+    attname = modele._meta.get_field(champ_fk).attname
+    descripteur = getattr(modele, champ_fk)
+
+    def memoriser_ancienne_operation(sender, instance, **kwargs):
+        instance._ancienne_operation_totaux = None
+        if instance.pk is None:
+            return
+        instance._ancienne_operation_totaux = sender.objects.filter(pk=instance.pk).values_list(attname, 'montant').first()
+
+    def operation_enregistree(sender, instance, created, **kwargs):
+        ancienne = getattr(instance, '_ancienne_operation_totaux', None)
+        instance._ancienne_operation_totaux = None
+        souscription_id = getattr(instance, attname)
+        montant = Decimal(str(instance.montant or 0))
+
+        with transaction.atomic():
+            if ancienne is None:
+                _appliquer_deltas_totaux(modele_souscription, souscription_id, calculer_deltas(montant, 1))
+            else:
+                ancienne_souscription_id, ancien_montant = ancienne
+                ancien_montant = Decimal(str(ancien_montant or 0))
+                if ancienne_souscription_id == souscription_id:
+                    if ancien_montant != montant:
+                        _appliquer_deltas_totaux(modele_souscription, souscription_id, calculer_deltas(montant - ancien_montant, 0))
+                else:
+                    _appliquer_deltas_totaux(modele_souscription, ancienne_souscription_id, calculer_deltas(-ancien_montant, -1))
+                    _appliquer_deltas_totaux(modele_souscription, souscription_id, calculer_deltas(montant, 1))
+
+        # Refléter les nouveaux totaux sur la souscription déjà chargée en mémoire
+        if descripteur.is_cached(instance) and getattr(instance, champ_fk) is not None:
+            getattr(instance, champ_fk).refresh_from_db(fields=list(modele_souscription.CHAMPS_MAINTENUS))
+
+    def operation_supprimee(sender, instance, **kwargs):
+        _appliquer_deltas_totaux(
+            modele_souscription, getattr(instance, attname),
+            calculer_deltas(-Decimal(str(instance.montant or 0)), -1)
+        )
+
+    pre_save.connect(memoriser_ancienne_operation, sender=modele, weak=False, dispatch_uid=f'totaux_pre_save_{modele.__name__}')
+    post_save.connect(operation_enregistree, sender=modele, weak=False, dispatch_uid=f'totaux_post_save_{modele.__name__}')
+    post_delete.connect(operation_supprimee, sender=modele, weak=False, dispatch_uid=f'totaux_post_delete_{modele.__name__}')
+
+
+_connecter_totaux_souscription(
+    DonnatEpargne, 'souscriptEpargne', SouscriptEpargne,
+    lambda montant, nombre: {'total_donne': montant, 'solde_epargne': montant}
+)
+_connecter_totaux_souscription(
+    Retrait, 'souscriptEpargne', SouscriptEpargne,
+    lambda montant, nombre: {'total_retire': montant, 'solde_epargne': -montant}
+)
+_connecter_totaux_souscription(
+    DonnatPartSocial, 'souscription_part_social', SouscriptionPartSocial,
+    lambda montant, nombre: {'montant_total_verse': montant, 'nombre_versements_effectues': nombre}
+)
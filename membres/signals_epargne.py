@@ -4,6 +4,6 @@ from .models import DonnatEpargne
 
 @receiver(post_delete, sender=DonnatEpargne)
 def update_total_donne_on_delete(sender, instance, **kwargs):
-    # Rien à faire ici car total_donne est calculé dynamiquement dans le serializer
+    # Rien à faire ici : total_donne est maintenu par les signals de membres/signals.py
     # Mais si tu veux déclencher une action, tu peux le faire ici
     pass
@@ -1,3 +1,122 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
 
-# Create your tests here.
+from users.models import Membre
+from .models import (
+    Compte, SouscriptEpargne, DonnatEpargne, Retrait,
+    PartSocial, SouscriptionPartSocial, DonnatPartSocial
+)
+
+
+class TotauxSouscriptionsTests(TestCase):
+    """Totaux stockés des souscriptions maintenus par membres/signals.py"""
+
+    def setUp(self):
+        self.membre = Membre.objects.create(telephone='0990000000', password='secret', nom='Test', prenom='Membre')
+        compte = Compte.objects.create(titulaire_membre=self.membre, type_compte='VUE')
+        self.epargne_a = SouscriptEpargne.objects.create(designation='A', compte=compte)
+        self.epargne_b = SouscriptEpargne.objects.create(designation='B', compte=compte)
+        self.part = SouscriptionPartSocial.objects.create(
+            membre=self.membre,
+            partSocial=PartSocial.objects.create(annee=2025, montant_souscrit=Decimal('100.00')),
+            nombre_versements_prevu=10
+        )
+
+    def verifier(self):
+        """Les totaux stockés correspondent aux opérations (même contrôle que la commande)"""
+        call_command('verifier_totaux_souscriptions', stdout=StringIO())
+
+    def assertTotauxEpargne(self, souscription, total_donne, total_retire):
+        souscription.refresh_from_db()
+        self.assertEqual(souscription.total_donne, Decimal(total_donne))
+        self.assertEqual(souscription.total_retire, Decimal(total_retire))
+        self.assertEqual(souscription.solde_epargne, Decimal(total_donne) - Decimal(total_retire))
+
+    def test_creation(self):
+        DonnatEpargne.objects.create(souscriptEpargne=self.epargne_a, mois='JANVIER', montant=Decimal('50.00'))
+        DonnatEpargne.objects.create(souscriptEpargne=self.epargne_a, mois='FEVRIER', montant=Decimal('30.00'))
+        Retrait.objects.create(souscriptEpargne=self.epargne_a, montant=Decimal('20.00'))
+        DonnatPartSocial.objects.create(souscription_part_social=self.part, montant=Decimal('100.00'), mois='JANVIER')
+
+        self.assertTotauxEpargne(self.epargne_a, '80.00', '20.00')
+        self.part.refresh_from_db()
+        self.assertEqual(self.part.montant_total_verse, Decimal('100.00'))
+        self.assertEqual(self.part.nombre_versements_effectues, 1)
+        self.verifier()
+
+    def test_modification_montant(self):
+        don = DonnatEpargne.objects.create(souscriptEpargne=self.epargne_a, mois='JANVIER', montant=Decimal('50.00'))
+        retrait = Retrait.objects.create(souscriptEpargne=self.epargne_a, montant=Decimal('20.00'))
+        versement = DonnatPartSocial.objects.create(souscription_part_social=self.part, montant=Decimal('100.00'), mois='JANVIER')
+
+        don.montant = Decimal('75.00')
+        don.save()
+        retrait.montant = Decimal('5.00')
+        retrait.save()
+        versement.montant = Decimal('60.00')
+        versement.save()
+
+        self.assertTotauxEpargne(self.epargne_a, '75.00', '5.00')
+        self.part.refresh_from_db()
+        self.assertEqual(self.part.montant_total_verse, Decimal('60.00'))
+        self.assertEqual(self.part.nombre_versements_effectues, 1)
+        self.verifier()
+
+    def test_deplacement_vers_autre_souscription(self):
+        don = DonnatEpargne.objects.create(souscriptEpargne=self.epargne_a, mois='JANVIER', montant=Decimal('50.00'))
+        retrait = Retrait.objects.create(souscriptEpargne=self.epargne_a, montant=Decimal('20.00'))
+
+        don.souscriptEpargne = self.epargne_b
+        don.save()
+        retrait.souscriptEpargne = self.epargne_b
+        retrait.montant = Decimal('10.00')
+        retrait.save()
+
+        self.assertTotauxEpargne(self.epargne_a, '0.00', '0.00')
+        self.assertTotauxEpargne(self.epargne_b, '50.00', '10.00')
+        self.verifier()
+
+    def test_suppression(self):
+        don = DonnatEpargne.objects.create(souscriptEpargne=self.epargne_a, mois='JANVIER', montant=Decimal('50.00'))
+        DonnatEpargne.objects.create(souscriptEpargne=self.epargne_a, mois='FEVRIER', montant=Decimal('30.00'))
+        retrait = Retrait.objects.create(souscriptEpargne=self.epargne_a, montant=Decimal('20.00'))
+        versement = DonnatPartSocial.objects.create(souscription_part_social=self.part, montant=Decimal('100.00'), mois='JANVIER')
+
+        don.delete()
+        retrait.delete()
+        versement.delete()
+
+        self.assertTotauxEpargne(self.epargne_a, '30.00', '0.00')
+        self.part.refresh_from_db()
+        self.assertEqual(self.part.montant_total_verse, Decimal('0.00'))
+        self.assertEqual(self.part.nombre_versements_effectues, 0)
+        self.verifier()
+
+    def test_suppression_souscription_retrait_set_null(self):
+        DonnatEpargne.objects.create(souscriptEpargne=self.epargne_b, mois='JANVIER', montant=Decimal('40.00'))
+        retrait = Retrait.objects.create(souscriptEpargne=self.epargne_a, montant=Decimal('20.00'))
+        Retrait.objects.create(souscriptEpargne=self.epargne_b, montant=Decimal('15.00'))
+
+        self.epargne_a.delete()
+        retrait.refresh_from_db()
+        self.assertIsNone(retrait.souscriptEpargne_id)
+
+        # Le retrait détaché ne compte plus pour aucune souscription ; le supprimer ne touche à rien
+        retrait.delete()
+        self.assertTotauxEpargne(self.epargne_b, '40.00', '15.00')
+        self.verifier()
+
+    def test_save_complet_ne_reecrit_pas_les_totaux(self):
+        souscription = SouscriptEpargne.objects.get(pk=self.epargne_a.pk)
+        DonnatEpargne.objects.create(souscriptEpargne=self.epargne_a, mois='JANVIER', montant=Decimal('50.00'))
+
+        # Instance chargée avant le don : ses totaux en mémoire sont obsolètes
+        souscription.designation = 'A renommée'
+        souscription.save()
+
+        self.assertTotauxEpargne(self.epargne_a, '50.00', '0.00')
+        self.assertEqual(self.epargne_a.designation, 'A renommée')
+        self.verifier()
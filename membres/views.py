@@ -3,6 +3,7 @@ from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
 from drf_spectacular.utils import extend_schema
 from coopec.pagination import StandardResultsSetPagination
+from coopec.exports import ExportMixin
 from users.permissions import IsAdminOrSuperAdmin
 from .models import PartSocial, FraisAdhesion, DonnatPartSocial, SouscriptEpargne, DonnatEpargne, Compte, SouscriptionPartSocial, Retrait
 from .serializers import *
@@ -109,16 +110,19 @@ class SouscriptionPartSocialViewSet(viewsets.ModelViewSet):
 	permission_classes = [IsAuthenticated]
 	
 	def get_queryset(self):
-		"""Filtre les souscriptions selon le type d'utilisateur connecté"""
+		"""
+		Filtre les souscriptions selon le type d'utilisateur connecté.
+		with_balances() calcule montant_cible / est_complete / montant_restant en SQL.
+		"""
 		user = self.request.user
 		
 		# ADMIN et SUPERADMIN voient tout
 		if user.user_type in ['ADMIN', 'SUPERADMIN']:
-			return SouscriptionPartSocial.objects.all()
+			return SouscriptionPartSocial.objects.with_balances()
 		
 		# MEMBRE voit uniquement ses propres souscriptions
 		if user.user_type == 'MEMBRE' and user.membre:
-			return SouscriptionPartSocial.objects.filter(membre=user.membre)
+			return SouscriptionPartSocial.objects.with_balances().filter(membre=user.membre)
 		
 		# CLIENT n'a pas accès aux souscriptions de parts sociales
 		return SouscriptionPartSocial.objects.none()
@@ -166,36 +170,48 @@ class SouscriptEpargneViewSet(viewsets.ModelViewSet):
 	permission_classes = [IsAuthenticated]
 	
 	def get_queryset(self):
-		"""Filtre les souscriptions d'épargne selon le type d'utilisateur connecté"""
+		"""
+		Filtre les souscriptions d'épargne selon le type d'utilisateur connecté.
+		with_balances() calcule montant_restant en SQL.
+		"""
 		user = self.request.user
 		
 		# ADMIN et SUPERADMIN voient tout
 		if user.user_type in ['ADMIN', 'SUPERADMIN']:
-			return SouscriptEpargne.objects.all()
+			return SouscriptEpargne.objects.with_balances()
 		
 		# MEMBRE voit uniquement ses propres souscriptions d'épargne
 		if user.user_type == 'MEMBRE' and user.membre:
-			return SouscriptEpargne.objects.filter(compte__titulaire_membre=user.membre)
+			return SouscriptEpargne.objects.with_balances().filter(compte__titulaire_membre=user.membre)
 		
 		# CLIENT voit uniquement ses propres souscriptions d'épargne
 		if user.user_type == 'CLIENT' and user.client:
-			return SouscriptEpargne.objects.filter(compte__titulaire_client=user.client)
+			return SouscriptEpargne.objects.with_balances().filter(compte__titulaire_client=user.client)
 		
 		# Par défaut, retourner un queryset vide
 		return SouscriptEpargne.objects.none()
 
 @extend_schema(tags=['Membres'])
-class DonnatEpargneViewSet(viewsets.ModelViewSet):
+class DonnatEpargneViewSet(ExportMixin, viewsets.ModelViewSet):
 	"""
 	ViewSet pour les dons d'épargne.
 	- ADMIN et SUPERADMIN : voient tous les dons
 	- MEMBRE : voit uniquement les dons de ses propres souscriptions d'épargne
 	- CLIENT : voit uniquement les dons de ses propres souscriptions d'épargne
+	Export en flux : GET /api/donnatepargne/export/?export_format=csv|ndjson&gzip=1
 	"""
 	queryset = DonnatEpargne.objects.all()
 	serializer_class = DonnatEpargneSerializer
 	pagination_class = StandardResultsSetPagination
 	permission_classes = [IsAuthenticated]
+	export_filename = 'dons_epargne'
+	export_fields = (
+		'id', 'souscriptEpargne_id', 'souscriptEpargne__designation',
+		'souscriptEpargne__compte_id', 'souscriptEpargne__compte__type_compte',
+		'souscriptEpargne__compte__titulaire_membre__numero_compte',
+		'souscriptEpargne__compte__titulaire_client__numero_compte',
+		'mois', 'montant',
+	)
 	
 	def get_queryset(self):
 		"""Filtre les dons d'épargne selon le type d'utilisateur connecté"""
@@ -217,17 +233,26 @@ class DonnatEpargneViewSet(viewsets.ModelViewSet):
 		return DonnatEpargne.objects.none()
 
 @extend_schema(tags=['Membres'])
-class RetraitViewSet(viewsets.ModelViewSet):
+class RetraitViewSet(ExportMixin, viewsets.ModelViewSet):
 	"""
 	ViewSet pour les retraits d'épargne.
 	- ADMIN et SUPERADMIN : voient tous les retraits
 	- MEMBRE : voit uniquement les retraits de ses propres souscriptions d'épargne
 	- CLIENT : voit uniquement les retraits de ses propres souscriptions d'épargne
+	Export en flux : GET /api/retraits/export/?export_format=csv|ndjson&gzip=1&date_debut=&date_fin=
 	"""
 	queryset = Retrait.objects.all()
 	serializer_class = RetraitSerializer
 	pagination_class = StandardResultsSetPagination
 	permission_classes = [IsAuthenticated]
+	export_filename = 'retraits'
+	export_date_field = 'date_operation'
+	export_fields = (
+		'id', 'date_operation', 'montant', 'motif', 'souscriptEpargne_id',
+		'souscriptEpargne__designation', 'souscriptEpargne__compte_id',
+		'souscriptEpargne__compte__titulaire_membre__numero_compte',
+		'souscriptEpargne__compte__titulaire_client__numero_compte',
+	)
 	
 	def get_queryset(self):
 		"""Filtre les retraits selon le type d'utilisateur connecté"""
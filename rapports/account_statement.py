@@ -6,12 +6,16 @@ import os
 from decimal import Decimal
 from datetime import datetime, date, timedelta
 from collections import defaultdict
-from django.db.models import Q
+from django.db.models import CharField, DateField, ExpressionWrapper, F, IntegerField, Q, Sum, Value
+from django.db.models.functions import Cast, TruncDate
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
+from reportlab.platypus import (
+    BaseDocTemplate, PageTemplate, Frame, NextPageTemplate,
+    Paragraph, Spacer, Table, TableStyle, PageBreak
+)
 from reportlab.lib.enums import TA_LEFT, TA_RIGHT, TA_CENTER
 from reportlab.pdfgen import canvas
 from reportlab.lib.colors import HexColor
@@ -29,6 +33,15 @@ BLUE_LIGHT = HexColor('#4A90E2')  # Bleu clair
 BLUE_DARK = HexColor('#2E5C8A')   # Bleu foncé
 BLUE_MEDIUM = HexColor('#357ABD') # Bleu moyen
 
+# Tableau des opérations du relevé
+COLONNES_RELEVE = ['OPN NO', 'LIBELLE OPERATION', 'DATE TRANS', 'DATE VAL', 'ENTREES', 'SORTIES', 'SOLDE']
+# Largeur disponible en format portrait A4 (210mm) moins les marges (40mm total) : 170mm
+LARGEURS_COLONNES_RELEVE = [25*mm, 50*mm, 22*mm, 22*mm, 20*mm, 20*mm, 20*mm]
+# Nombre de lignes d'opérations par tableau : à chaque saut de page, ReportLab recalcule
+# toutes les lignes restantes du tableau coupé (coût quadratique pour un seul tableau
+# de dizaines de milliers de lignes). Nombre pair pour garder l'alternance des couleurs.
+LIGNES_PAR_TABLEAU = 200
+
 def get_cooperative_info():
     """Récupère les informations de la coopérative"""
     coop = Cooperative.objects.first()
@@ -55,147 +68,143 @@ def format_currency(amount):
     """Formate un montant en devise USD"""
     return f"{float(amount):,.2f}".replace(',', ' ').replace('.', ',')
 
-def collecter_toutes_OPERATIONS_membre(membre, date_debut=None, date_fin=None):
+# Types d'opérations du relevé : (préfixe du n° d'opération, libellé, sens)
+# L'ordre du dictionnaire départage les opérations d'une même date.
+TYPES_OPERATIONS = {
+    'VERSEMENT_PART_SOCIALE': ('PS', 'VERSEMENT PART SOCIALE {detail}', 1),
+    'DEPOT_EPARGNE': ('DE', 'DÉPÔT ÉPARGNE - {detail}', 1),
+    'RETRAIT': ('RT', 'RETRAIT - {detail}', -1),
+    'CREDIT': ('CR', 'OCTROI CRÉDIT N° {detail}', -1),
+    'REMBOURSEMENT': ('RB', 'REMBOURSEMENT CRÉDIT N° {detail}', 1),
+}
+
+
+def _requetes_operations(champ, titulaire):
     """
-    Collecte toutes les OPERATIONS d'un membre dans la coopérative
-    
+    Construit une requête par type d'opération du titulaire, avec des colonnes communes
+    (type_op, ordre, date_op, ref_id, montant_op, detail) pour pouvoir les réunir (UNION ALL).
+
     Args:
-        membre: Instance du Membre
+        champ: 'membre' ou 'client'
+        titulaire: Instance du Membre ou du Client
+
+    Returns:
+        list: Liste de (type d'opération, queryset non trié)
+    """
+    detail_field = CharField(max_length=100)
+    sources = []
+    if champ == 'membre':
+        # Les parts sociales ne concernent que les membres
+        sources.append(('VERSEMENT_PART_SOCIALE', DonnatPartSocial.objects.filter(
+            souscription_part_social__membre=titulaire
+        ), F('date_donnat'), Cast('souscription_part_social__partSocial__annee', detail_field)))
+    sources += [
+        ('DEPOT_EPARGNE', DonnatEpargne.objects.filter(
+            **{f'souscriptEpargne__compte__titulaire_{champ}': titulaire}
+        ), F('souscriptEpargne__date_souscription'), F('souscriptEpargne__designation')),
+        ('RETRAIT', Retrait.objects.filter(
+            **{f'souscriptEpargne__compte__titulaire_{champ}': titulaire}
+        ), TruncDate('date_operation'), F('souscriptEpargne__designation')),
+        ('CREDIT', Credit.objects.filter(
+            **{champ: titulaire}
+        ), F('date_octroi'), Cast('id', detail_field)),
+        ('REMBOURSEMENT', Remboursement.objects.filter(
+            **{f'credit__{champ}': titulaire}
+        ), F('echeance'), Cast('credit_id', detail_field)),
+    ]
+
+    ordres = list(TYPES_OPERATIONS)
+    requetes = []
+    for type_op, queryset, date_op, detail in sources:
+        requetes.append((type_op, queryset.order_by().annotate(
+            type_op=Value(type_op, output_field=CharField(max_length=30)),
+            ordre=Value(ordres.index(type_op), output_field=IntegerField()),
+            date_op=ExpressionWrapper(date_op, output_field=DateField()),
+            ref_id=F('id'),
+            montant_op=F('montant'),
+            detail=ExpressionWrapper(detail, output_field=detail_field),
+        )))
+    return requetes
+
+
+def collecter_operations(champ, titulaire, date_debut=None, date_fin=None):
+    """
+    Collecte les opérations d'un membre ou d'un client en une seule requête (UNION ALL),
+    filtrée par date et triée en SQL.
+
+    Args:
+        champ: 'membre' ou 'client'
+        titulaire: Instance du Membre ou du Client
         date_debut: Date de début (optionnel)
         date_fin: Date de fin (optionnel)
-    
+
     Returns:
         list: Liste de toutes les OPERATIONS triées par date
     """
-    OPERATIONS = []
-    
-    # 1. Versements de parts sociales (ENTREE)
-    # Récupérer toutes les souscriptions de parts sociales
-    souscriptions_parts = SouscriptionPartSocial.objects.filter(membre=membre)
-    
-    for souscription in souscriptions_parts:
-        donnats = DonnatPartSocial.objects.filter(souscription_part_social=souscription)
+    requetes = []
+    for _, queryset in _requetes_operations(champ, titulaire):
         if date_debut:
-            donnats = donnats.filter(date_donnat__gte=date_debut)
+            queryset = queryset.filter(date_op__gte=date_debut)
         if date_fin:
-            donnats = donnats.filter(date_donnat__lte=date_fin)
-        
-        for donnat in donnats:
-            OPERATIONS.append({
-                'date_trans': donnat.date_donnat,
-                'date_val': donnat.date_donnat,
-                'libelle': f'VERSEMENT PART SOCIALE {souscription.partSocial.annee}',
-                'entree': donnat.montant,
-                'sortie': Decimal('0.00'),
-                'opn_no': f'PS-{donnat.id:08d}',
-                'opr': 'SYSTEM',
-                'type': 'VERSEMENT_PART_SOCIALE',
-                'reference_id': donnat.id
-            })
-    
-    # 3. Dépôts d'épargne (ENTREE)
-    # Récupérer tous les comptes du membre
-    comptes = Compte.objects.filter(titulaire_membre=membre)
-    
-    for compte in comptes:
-        souscriptions_epargne = SouscriptEpargne.objects.filter(compte=compte)
-        
-        for souscription in souscriptions_epargne:
-            donnats = DonnatEpargne.objects.filter(souscriptEpargne=souscription)
-            if date_debut:
-                # Filtrer par date de souscription
-                donnats = donnats.filter(souscriptEpargne__date_souscription__gte=date_debut)
-            if date_fin:
-                donnats = donnats.filter(souscriptEpargne__date_souscription__lte=date_fin)
-            
-            for donnat in donnats:
-                # Utiliser la date de souscription comme date d'opération
-                date_txn = souscription.date_souscription
-                OPERATIONS.append({
-                    'date_trans': date_txn,
-                    'date_val': date_txn,
-                    'libelle': f'DÉPÔT ÉPARGNE - {souscription.designation}',
-                    'entree': donnat.montant,
-                    'sortie': Decimal('0.00'),
-                    'opn_no': f'DE-{donnat.id:08d}',
-                    'opr': 'SYSTEM',
-                    'type': 'DEPOT_EPARGNE',
-                    'reference_id': donnat.id
-                })
-    
-    # 2. Retraits (SORTIE)
-    for compte in comptes:
-        souscriptions_epargne = SouscriptEpargne.objects.filter(compte=compte)
-        
-        for souscription in souscriptions_epargne:
-            retraits = Retrait.objects.filter(souscriptEpargne=souscription)
-            if date_debut:
-                retraits = retraits.filter(date_operation__date__gte=date_debut)
-            if date_fin:
-                retraits = retraits.filter(date_operation__date__lte=date_fin)
-            
-            for retrait in retraits:
-                OPERATIONS.append({
-                    'date_trans': retrait.date_operation.date() if hasattr(retrait.date_operation, 'date') else retrait.date_operation,
-                    'date_val': retrait.date_operation.date() if hasattr(retrait.date_operation, 'date') else retrait.date_operation,
-                    'libelle': f'RETRAIT - {souscription.designation}',
-                    'entree': Decimal('0.00'),
-                    'sortie': retrait.montant,
-                    'opn_no': f'RT-{retrait.id:08d}',
-                    'opr': 'SYSTEM',
-                    'type': 'RETRAIT',
-                    'reference_id': retrait.id
-                })
-    
-    # 3. Crédits octroyés (SORTIE)
-    credits = Credit.objects.filter(membre=membre)
-    if date_debut:
-        credits = credits.filter(date_octroi__gte=date_debut)
-    if date_fin:
-        credits = credits.filter(date_octroi__lte=date_fin)
-    
-    for credit in credits:
+            queryset = queryset.filter(date_op__lte=date_fin)
+        requetes.append(queryset.values('type_op', 'ordre', 'date_op', 'ref_id', 'montant_op', 'detail'))
+
+    union = requetes[0].union(*requetes[1:], all=True).order_by('date_op', 'ordre', 'ref_id')
+
+    OPERATIONS = []
+    for ligne in union:
+        prefixe, libelle, sens = TYPES_OPERATIONS[ligne['type_op']]
+        montant = ligne['montant_op']
         OPERATIONS.append({
-            'date_trans': credit.date_octroi if credit.date_octroi else date.today(),
-            'date_val': credit.date_octroi if credit.date_octroi else date.today(),
-            'libelle': f'OCTROI CRÉDIT N° {credit.id}',
-            'entree': Decimal('0.00'),
-            'sortie': credit.montant,
-            'opn_no': f'CR-{credit.id:08d}',
+            'date_trans': ligne['date_op'],
+            'date_val': ligne['date_op'],
+            'libelle': libelle.format(detail=ligne['detail']),
+            'entree': montant if sens > 0 else Decimal('0.00'),
+            'sortie': montant if sens < 0 else Decimal('0.00'),
+            'opn_no': f"{prefixe}-{ligne['ref_id']:08d}",
             'opr': 'SYSTEM',
-            'type': 'CREDIT',
-            'reference_id': credit.id
+            'type': ligne['type_op'],
+            'reference_id': ligne['ref_id']
         })
+    return OPERATIONS
+
+
+def calculer_solde_initial(champ, titulaire, date_debut=None):
+    """
+    Calcule le solde d'ouverture du relevé : somme des opérations antérieures à date_debut,
+    en une seule requête (un agrégat par type d'opération, réunis par UNION ALL).
+
+    Returns:
+        Decimal: Solde avant date_debut (0 si pas de date de début)
+    """
+    if not date_debut:
+        return Decimal('0.00')
+
+    requetes = [
+        queryset.filter(date_op__lt=date_debut).values('type_op').annotate(total=Sum('montant_op')).values('type_op', 'total')
+        for _, queryset in _requetes_operations(champ, titulaire)
+    ]
+    solde = Decimal('0.00')
+    for ligne in requetes[0].union(*requetes[1:], all=True):
+        sens = TYPES_OPERATIONS[ligne['type_op']][2]
+        solde += sens * (ligne['total'] or Decimal('0.00'))
+    return solde
+
+
+def collecter_toutes_OPERATIONS_membre(membre, date_debut=None, date_fin=None):
+    """
+    Collecte toutes les OPERATIONS d'un membre dans la coopérative
     
-    # 4. Remboursements (ENTREE)
-    for credit in Credit.objects.filter(membre=membre):
-        remboursements = Remboursement.objects.filter(credit=credit)
-        if date_debut:
-            remboursements = remboursements.filter(echeance__gte=date_debut)
-        if date_fin:
-            remboursements = remboursements.filter(echeance__lte=date_fin)
-        
-        for remboursement in remboursements:
-            OPERATIONS.append({
-                'date_trans': remboursement.echeance if remboursement.echeance else date.today(),
-                'date_val': remboursement.echeance if remboursement.echeance else date.today(),
-                'libelle': f'REMBOURSEMENT CRÉDIT N° {credit.id}',
-                'entree': remboursement.montant,
-                'sortie': Decimal('0.00'),
-                'opn_no': f'RB-{remboursement.id:08d}',
-                'opr': 'SYSTEM',
-                'type': 'REMBOURSEMENT',
-                'reference_id': remboursement.id
-            })
-    
-    # 5. TODO: OPERATIONS de caisse liées (via FraisAdhesion) - Réimplémenter avec Caissetypemvt
-    # Les OPERATIONS sont maintenant gérées via Caissetypemvt
-    # Cette section sera réimplémentée pour utiliser Caissetypemvt
-    
-    # Trier par date (plus ancien en premier pour calculer le solde)
-    OPERATIONS.sort(key=lambda x: (x['date_trans'], x['date_val']))
+    Args:
+        membre: Instance du Membre
+        date_debut: Date de début (optionnel)
+        date_fin: Date de fin (optionnel)
     
-    return OPERATIONS
+    Returns:
+        list: Liste de toutes les OPERATIONS triées par date
+    """
+    # TODO: OPERATIONS de caisse liées (via FraisAdhesion) - Réimplémenter avec Caissetypemvt
+    return collecter_operations('membre', membre, date_debut, date_fin)
 
 def collecter_toutes_OPERATIONS_client(client, date_debut=None, date_fin=None):
     """
@@ -209,109 +218,8 @@ def collecter_toutes_OPERATIONS_client(client, date_debut=None, date_fin=None):
     Returns:
         list: Liste de toutes les OPERATIONS triées par date
     """
-    OPERATIONS = []
-    
-    # 1. Dépôts d'épargne (ENTREE)
-    comptes = Compte.objects.filter(titulaire_client=client)
-    
-    for compte in comptes:
-        souscriptions_epargne = SouscriptEpargne.objects.filter(compte=compte)
-        
-        for souscription in souscriptions_epargne:
-            donnats = DonnatEpargne.objects.filter(souscriptEpargne=souscription)
-            if date_debut:
-                donnats = donnats.filter(souscriptEpargne__date_souscription__gte=date_debut)
-            if date_fin:
-                donnats = donnats.filter(souscriptEpargne__date_souscription__lte=date_fin)
-            
-            for donnat in donnats:
-                # Utiliser la date de souscription comme date d'opération
-                date_txn = souscription.date_souscription
-                OPERATIONS.append({
-                    'date_trans': date_txn,
-                    'date_val': date_txn,
-                    'libelle': f'DÉPÔT ÉPARGNE - {souscription.designation}',
-                    'entree': donnat.montant,
-                    'sortie': Decimal('0.00'),
-                    'opn_no': f'DE-{donnat.id:08d}',
-                    'opr': 'SYSTEM',
-                    'type': 'DEPOT_EPARGNE',
-                    'reference_id': donnat.id
-                })
-    
-    # 3. Retraits (SORTIE)
-    for compte in comptes:
-        souscriptions_epargne = SouscriptEpargne.objects.filter(compte=compte)
-        
-        for souscription in souscriptions_epargne:
-            retraits = Retrait.objects.filter(souscriptEpargne=souscription)
-            if date_debut:
-                retraits = retraits.filter(date_operation__date__gte=date_debut)
-            if date_fin:
-                retraits = retraits.filter(date_operation__date__lte=date_fin)
-            
-            for retrait in retraits:
-                OPERATIONS.append({
-                    'date_trans': retrait.date_operation.date() if hasattr(retrait.date_operation, 'date') else retrait.date_operation,
-                    'date_val': retrait.date_operation.date() if hasattr(retrait.date_operation, 'date') else retrait.date_operation,
-                    'libelle': f'RETRAIT - {souscription.designation}',
-                    'entree': Decimal('0.00'),
-                    'sortie': retrait.montant,
-                    'opn_no': f'RT-{retrait.id:08d}',
-                    'opr': 'SYSTEM',
-                    'type': 'RETRAIT',
-                    'reference_id': retrait.id
-                })
-    
-    # 4. Crédits octroyés (SORTIE)
-    credits = Credit.objects.filter(client=client)
-    if date_debut:
-        credits = credits.filter(date_octroi__gte=date_debut)
-    if date_fin:
-        credits = credits.filter(date_octroi__lte=date_fin)
-    
-    for credit in credits:
-        OPERATIONS.append({
-            'date_trans': credit.date_octroi if credit.date_octroi else date.today(),
-            'date_val': credit.date_octroi if credit.date_octroi else date.today(),
-            'libelle': f'OCTROI CRÉDIT N° {credit.id}',
-            'entree': Decimal('0.00'),
-            'sortie': credit.montant,
-            'opn_no': f'CR-{credit.id:08d}',
-            'opr': 'SYSTEM',
-            'type': 'CREDIT',
-            'reference_id': credit.id
-        })
-    
-    # 5. Remboursements (ENTREE)
-    for credit in Credit.objects.filter(client=client):
-        remboursements = Remboursement.objects.filter(credit=credit)
-        if date_debut:
-            remboursements = remboursements.filter(echeance__gte=date_debut)
-        if date_fin:
-            remboursements = remboursements.filter(echeance__lte=date_fin)
-        
-        for remboursement in remboursements:
-            OPERATIONS.append({
-                'date_trans': remboursement.echeance if remboursement.echeance else date.today(),
-                'date_val': remboursement.echeance if remboursement.echeance else date.today(),
-                'libelle': f'REMBOURSEMENT CRÉDIT N° {credit.id}',
-                'entree': remboursement.montant,
-                'sortie': Decimal('0.00'),
-                'opn_no': f'RB-{remboursement.id:08d}',
-                'opr': 'SYSTEM',
-                'type': 'REMBOURSEMENT',
-                'reference_id': remboursement.id
-            })
-    
-    # 6. TODO: OPERATIONS de caisse liées - Réimplémenter avec Caissetypemvt
-    # Les OPERATIONS sont maintenant gérées via Caissetypemvt
-    # Cette section sera réimplémentée pour utiliser Caissetypemvt
-    
-    # Trier par date
-    OPERATIONS.sort(key=lambda x: (x['date_trans'], x['date_val']))
-    
-    return OPERATIONS
+    # TODO: OPERATIONS de caisse liées - Réimplémenter avec Caissetypemvt
+    return collecter_operations('client', client, date_debut, date_fin)
 
 def generate_account_statement_header(canvas_obj, doc, coop_info, numero_compte=None, intitule=None, type_titulaire=None, is_continuation=False):
     """Génère l'en-tête du relevé de compte"""
@@ -398,9 +306,76 @@ def generate_account_statement_footer(canvas_obj, doc, total_pages=None):
     text_width = canvas_obj.stringWidth(page_text, "Helvetica", 9)
     x_position = (width - text_width) / 2
     canvas_obj.drawString(x_position, 15*mm, page_text)
-    
+
     canvas_obj.restoreState()
 
+class CanvasReleve(canvas.Canvas):
+    """
+    Canvas du relevé : la pagination "Page X sur Y" est écrite à l'enregistrement du PDF
+
+    Les pages terminées sont mises de côté au lieu d'être écrites ; quand le nombre total
+    de pages est connu (save), le pied de page est ajouté à chacune. Le document n'est
+    construit qu'une seule fois.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pages_en_attente = []
+
+    def showPage(self):
+        self._pages_en_attente.append(dict(self.__dict__))
+        self._startPage()
+
+    def save(self):
+        total_pages = len(self._pages_en_attente)
+        for etat_page in self._pages_en_attente:
+            self.__dict__.update(etat_page)
+            generate_account_statement_footer(self, None, total_pages)
+            super().showPage()
+        super().save()
+
+def _tableau_operations(lignes, avec_en_tete):
+    """Tableau d'un morceau des opérations du relevé (en-tête seulement pour le premier morceau)"""
+    debut = 1 if avec_en_tete else 0
+    style = [
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('LEFTPADDING', (0, 0), (-1, -1), 5),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 5),
+
+        # Corps du tableau
+        ('FONTNAME', (0, debut), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, debut), (-1, -1), 7),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('ROWBACKGROUNDS', (0, debut), (-1, -1), [colors.white, colors.lightgrey]),
+        ('BOTTOMPADDING', (0, debut), (-1, -1), 8),
+        ('TOPPADDING', (0, debut), (-1, -1), 8),
+    ]
+    if avec_en_tete:
+        style += [
+            ('BACKGROUND', (0, 0), (-1, 0), BLUE_MEDIUM),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 8),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+            ('TOPPADDING', (0, 0), (-1, 0), 10),
+        ]
+        lignes = [COLONNES_RELEVE] + lignes
+    table = Table(lignes, colWidths=LARGEURS_COLONNES_RELEVE)
+    table.setStyle(TableStyle(style))
+    return table
+
+def tableaux_operations(lignes):
+    """
+    Découpe les lignes d'opérations en tableaux de LIGNES_PAR_TABLEAU lignes
+
+    Les tableaux se suivent sans espace ; sur les pages suivantes, l'en-tête des colonnes
+    est dessiné par le modèle de page (voir generer_releve_titulaire).
+    """
+    return [
+        _tableau_operations(lignes[i:i + LIGNES_PAR_TABLEAU], avec_en_tete=(i == 0))
+        for i in range(0, max(len(lignes), 1), LIGNES_PAR_TABLEAU)
+    ]
+
 def generate_account_statement(membre_id=None, client_id=None, date_debut=None, date_fin=None):
     """
     Génère un relevé de compte PDF pour un membre ou un client
@@ -416,32 +391,42 @@ def generate_account_statement(membre_id=None, client_id=None, date_debut=None,
     """
     # Récupérer le membre ou client
     if membre_id:
-        try:
-            titulaire = Membre.objects.get(id=membre_id)
-            OPERATIONS = collecter_toutes_OPERATIONS_membre(titulaire, date_debut, date_fin)
-            type_titulaire = 'MEMBRE'
-            numero_compte = titulaire.numero_compte
-            intitule = str(titulaire)
-        except Membre.DoesNotExist:
-            return None
+        champ = 'membre'
+        titulaire = Membre.objects.filter(id=membre_id).first()
     elif client_id:
-        try:
-            titulaire = Client.objects.get(id=client_id)
-            OPERATIONS = collecter_toutes_OPERATIONS_client(titulaire, date_debut, date_fin)
-            type_titulaire = 'CLIENT'
-            numero_compte = titulaire.numero_compte
-            intitule = str(titulaire)
-        except Client.DoesNotExist:
-            return None
+        champ = 'client'
+        titulaire = Client.objects.filter(id=client_id).first()
     else:
         return None
     
+    if titulaire is None:
+        return None
+    return generer_releve_titulaire(champ, titulaire, date_debut, date_fin)
+
+def generer_releve_titulaire(champ, titulaire, date_debut=None, date_fin=None):
+    """
+    Génère le relevé de compte PDF d'un membre ou d'un client déjà chargé
+    
+    Args:
+        champ: 'membre' ou 'client'
+        titulaire: Instance du Membre ou du Client
+        date_debut: Date de début (optionnel)
+        date_fin: Date de fin (optionnel)
+    
+    Returns:
+        BytesIO: Buffer contenant le PDF, ou None si aucune opération
+    """
+    OPERATIONS = collecter_operations(champ, titulaire, date_debut, date_fin)
+    type_titulaire = champ.upper()
+    numero_compte = titulaire.numero_compte
+    intitule = str(titulaire)
+    
     # Si pas de OPERATIONS, retourner None
     if not OPERATIONS:
         return None
     
-    # Calculer le solde initial (avant la première opération)
-    solde_initial = Decimal('0.00')
+    # Solde initial : opérations antérieures à la période du relevé
+    solde_initial = calculer_solde_initial(champ, titulaire, date_debut)
     
     # Calculer les soldes pour chaque opération
     solde_courant = solde_initial
@@ -451,7 +436,7 @@ def generate_account_statement(membre_id=None, client_id=None, date_debut=None,
     
     # Créer le PDF en format PORTRAIT avec marges plus grandes
     buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4,
+    doc = BaseDocTemplate(buffer, pagesize=A4,
                           rightMargin=20*mm, leftMargin=20*mm,
                           topMargin=60*mm, bottomMargin=30*mm)
     
@@ -498,13 +483,8 @@ def generate_account_statement(membre_id=None, client_id=None, date_debut=None,
     story.append(Paragraph(f"<b>Type:</b> {type_titulaire}", info_style))
     story.append(Spacer(1, 5*mm))
     
-    # En-tête du tableau (sans OPR)
-    header_data = [
-        ['OPN NO', 'LIBELLE OPERATION', 'DATE TRANS', 'DATE VAL', 'ENTREES', 'SORTIES', 'SOLDE']
-    ]
-    
-    # Données du tableau
-    table_data = [header_data[0]]
+    # Données du tableau (sans OPR)
+    table_data = []
     
     for txn in OPERATIONS:
         date_trans_str = txn['date_trans'].strftime('%d-%m-%Y') if isinstance(txn['date_trans'], date) else str(txn['date_trans'])
@@ -527,39 +507,11 @@ def generate_account_statement(membre_id=None, client_id=None, date_debut=None,
             solde_str
         ])
     
-    # Créer le tableau avec largeurs ajustées pour format PORTRAIT (sans OPR)
-    # Calculer la largeur disponible en format portrait A4 (210mm) moins les marges (40mm total)
-    # Largeur disponible: 210mm - 40mm = 170mm
-    col_widths = [25*mm, 50*mm, 22*mm, 22*mm, 20*mm, 20*mm, 20*mm]
-    table = Table(table_data, colWidths=col_widths, repeatRows=1)
-    
-    # Style du tableau avec padding pour éviter les coupures
-    table_style = TableStyle([
-        # En-tête
-        ('BACKGROUND', (0, 0), (-1, 0), BLUE_MEDIUM),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 8),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-        ('TOPPADDING', (0, 0), (-1, 0), 10),
-        ('LEFTPADDING', (0, 0), (-1, -1), 5),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 5),
-        
-        # Corps du tableau
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 7),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-        ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
-        ('TOPPADDING', (0, 1), (-1, -1), 8),
-        ('LEFTPADDING', (0, 1), (-1, -1), 5),
-        ('RIGHTPADDING', (0, 1), (-1, -1), 5),
-    ])
-    
-    table.setStyle(table_style)
-    story.append(table)
+    # Tableaux de LIGNES_PAR_TABLEAU lignes : le coût de mise en page reste linéaire
+    # même pour des relevés de dizaines de milliers d'opérations
+    story.extend(tableaux_operations(table_data))
+    # Après le dernier tableau (totaux), les pages suivantes n'ont plus l'en-tête des colonnes
+    story.append(NextPageTemplate('fin'))
     story.append(Spacer(1, 5*mm))
     
     # Totaux
@@ -568,6 +520,7 @@ def generate_account_statement(membre_id=None, client_id=None, date_debut=None,
     solde_final = OPERATIONS[-1]['solde'] if OPERATIONS else solde_initial
     
     totals_data = [
+        ['SOLDE INITIAL:', format_currency(solde_initial)],
         ['TOTAL ENTREES:', format_currency(total_entrees)],
         ['TOTAL SORTIES:', format_currency(total_sorties)],
         ['SOLDE FINAL:', format_currency(solde_final)]
@@ -589,21 +542,36 @@ def generate_account_statement(membre_id=None, client_id=None, date_debut=None,
     date_gen = datetime.now().strftime("%d-%m-%Y %H:%M:%S")
     story.append(Paragraph(f"<i>Généré le {date_gen}</i>", info_style))
     
-    # Estimation du nombre de pages basée sur le nombre de OPERATIONS
-    # Environ 20-25 lignes par page avec nos marges en format portrait
-    estimated_pages = max(1, (len(OPERATIONS) + 15) // 20)
+    # Pages suivantes : l'en-tête des colonnes du tableau est dessiné en haut de page,
+    # le cadre du contenu commence juste en dessous (sauf après le dernier tableau : modèle 'fin')
+    en_tete_colonnes = _tableau_operations([], avec_en_tete=True)
+    largeur_en_tete, hauteur_en_tete = en_tete_colonnes.wrap(doc.width, doc.height)
+    cadre_premiere = Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height, id='premiere')
+    cadre_suite = Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height - hauteur_en_tete, id='suite')
+    cadre_fin = Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height, id='fin')
     
     def on_first_page(canvas_obj, doc):
         generate_account_statement_header(canvas_obj, doc, coop_info, numero_compte, intitule, type_titulaire, False)
-        # Utiliser l'estimation pour afficher "Page X sur Y"
-        generate_account_statement_footer(canvas_obj, doc, estimated_pages)
     
     def on_later_pages(canvas_obj, doc):
         generate_account_statement_header(canvas_obj, doc, coop_info, numero_compte, intitule, type_titulaire, True)
-        generate_account_statement_footer(canvas_obj, doc, estimated_pages)
+        # Même position que le tableau centré dans le cadre
+        x = cadre_suite._x1 + cadre_suite._leftPadding + (cadre_suite._aW - largeur_en_tete) / 2
+        y = cadre_suite._y2 - cadre_suite._topPadding
+        en_tete_colonnes.drawOn(canvas_obj, x, y)
+    
+    def on_end_pages(canvas_obj, doc):
+        generate_account_statement_header(canvas_obj, doc, coop_info, numero_compte, intitule, type_titulaire, True)
+    
+    doc.addPageTemplates([
+        PageTemplate(id='premiere', frames=[cadre_premiere], onPage=on_first_page),
+        PageTemplate(id='suite', frames=[cadre_suite], onPage=on_later_pages),
+        PageTemplate(id='fin', frames=[cadre_fin], onPage=on_end_pages),
+    ])
+    story.insert(0, NextPageTemplate('suite'))
     
-    # Construire le PDF
-    doc.build(story, onFirstPage=on_first_page, onLaterPages=on_later_pages)
+    # Construire le PDF (une seule passe : "Page X sur Y" est ajouté par CanvasReleve)
+    doc.build(story, canvasmaker=CanvasReleve)
     
     buffer.seek(0)
     return buffer
@@ -2,7 +2,7 @@
 Configuration de l'admin pour l'application rapports
 """
 from django.contrib import admin
-from .models import Rapport, EnvoiEmail
+from .models import Rapport, EnvoiEmail, LotDocuments, TacheRapport
 
 
 @admin.register(Rapport)
@@ -15,7 +15,21 @@ class RapportAdmin(admin.ModelAdmin):
 
 @admin.register(EnvoiEmail)
 class EnvoiEmailAdmin(admin.ModelAdmin):
-    list_display = ['id', 'email_destinataire', 'sujet', 'statut', 'date_creation', 'date_envoi']
-    list_filter = ['statut', 'destinataire_type', 'date_creation']
+    list_display = ['id', 'email_destinataire', 'sujet', 'statut', 'type_operation', 'tentatives', 'date_creation', 'date_envoi']
+    list_filter = ['statut', 'destinataire_type', 'type_operation', 'date_creation']
     search_fields = ['email_destinataire', 'sujet']
     readonly_fields = ['date_creation', 'date_envoi']
+
+
+@admin.register(LotDocuments)
+class LotDocumentsAdmin(admin.ModelAdmin):
+    list_display = ['id', 'type_lot', 'date_debut', 'date_fin', 'statut', 'traites', 'total', 'erreurs', 'date_creation']
+    list_filter = ['type_lot', 'statut', 'date_creation']
+    readonly_fields = ['total', 'traites', 'generes', 'erreurs', 'erreur', 'fichier_zip', 'date_creation', 'date_debut_traitement', 'date_fin_traitement']
+
+
+@admin.register(TacheRapport)
+class TacheRapportAdmin(admin.ModelAdmin):
+    list_display = ['id', 'type_tache', 'statut', 'progression', 'etape', 'demandeur', 'date_creation', 'date_fin_traitement']
+    list_filter = ['type_tache', 'statut', 'date_creation']
+    readonly_fields = ['progression', 'etape', 'rapport', 'fichier', 'resultat', 'erreur', 'date_creation', 'date_debut_traitement', 'date_fin_traitement', 'date_progression']
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class RapportsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'rapports'
+
+    def ready(self):
+        import rapports.signals
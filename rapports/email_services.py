@@ -4,6 +4,9 @@ Services d'envoi automatique d'emails avec reçus PDF en pièce jointe
 from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
 from django.utils import timezone
+from django.db import transaction
+from django.db.models import F, Q
+from datetime import timedelta
 from users.email_config import get_smtp_backend, get_default_from_email
 from io import BytesIO
 from decimal import Decimal
@@ -17,19 +20,13 @@ from rapports.email_templates import (
     get_email_template_retrait,
     get_email_template_credit,
     get_email_template_remboursement,
-    get_email_template_frais_adhesion
-)
-from rapports.receipts import (
-    generate_receipt_depot_epargne,
-    generate_receipt_versement_part_sociale,
-    generate_receipt_retrait,
-    generate_receipt_credit,
-    generate_receipt_remboursement,
-    generate_receipt_frais_adhesion
+    get_email_template_frais_adhesion,
+    get_email_template_echeance_credit
 )
+from rapports.receipt_store import lire_recu
 
 
-def envoyer_email_avec_receipt(template_html, sujet, destinataire_email, destinataire_type, destinataire_id, pdf_buffer, operation_type, operation_id):
+def envoyer_email_avec_receipt(template_html, sujet, destinataire_email, destinataire_type, destinataire_id, pdf_buffer, operation_type, operation_id, envoi=None, connection=None):
     """
     Envoie un email HTML avec un reçu PDF en pièce jointe
     
@@ -42,26 +39,38 @@ def envoyer_email_avec_receipt(template_html, sujet, destinataire_email, destina
         pdf_buffer (BytesIO): Buffer du PDF à joindre
         operation_type (str): Type d'opération (pour le nom du fichier)
         operation_id (int): ID de l'opération (pour le nom du fichier)
+        envoi (EnvoiEmail): Envoi existant de la file d'envoi à compléter (optionnel)
+        connection: Connexion SMTP déjà ouverte à réutiliser (optionnel)
     
     Returns:
         EnvoiEmail: Instance de l'envoi créé
     """
     coop = Cooperative.objects.first()
     
-    # Créer l'enregistrement d'envoi
-    envoi = EnvoiEmail.objects.create(
-        rapport=None,
-        destinataire_type=destinataire_type,
-        destinataire_id=destinataire_id or 0,
-        email_destinataire=destinataire_email,
-        sujet=sujet,
-        message=template_html,
-        statut=StatutEnvoi.EN_COURS
-    )
+    if envoi is None:
+        # Créer l'enregistrement d'envoi
+        envoi = EnvoiEmail.objects.create(
+            rapport=None,
+            destinataire_type=destinataire_type,
+            destinataire_id=destinataire_id or 0,
+            email_destinataire=destinataire_email,
+            sujet=sujet,
+            message=template_html,
+            statut=StatutEnvoi.EN_COURS,
+            type_operation=operation_type,
+            operation_id=operation_id
+        )
+    else:
+        # Compléter l'envoi mis en file avec le destinataire et le contenu rendus
+        envoi.destinataire_type = destinataire_type
+        envoi.destinataire_id = destinataire_id or 0
+        envoi.email_destinataire = destinataire_email
+        envoi.sujet = sujet
+        envoi.message = template_html
     
     try:
-        # Utiliser la configuration SMTP dynamique ou celle par défaut
-        backend = get_smtp_backend()
+        # Utiliser la connexion fournie, sinon la configuration SMTP dynamique ou celle par défaut
+        backend = connection or get_smtp_backend()
         from_email = coop.email if coop and coop.email else get_default_from_email()
         
         # Créer l'email avec HTML
@@ -93,22 +102,22 @@ def envoyer_email_avec_receipt(template_html, sujet, destinataire_email, destina
         return envoi
         
     except Exception as e:
-        # Marquer comme échec
+        # Marquer comme échec (le worker de la file décide ensuite d'une nouvelle tentative)
         envoi.statut = StatutEnvoi.ECHEC
         envoi.erreur = str(e)
         envoi.save()
         return envoi
 
 
-def envoyer_email_depot_epargne(donnat_epargne_id):
+def preparer_email_depot_epargne(donnat_epargne_id):
     """
-    Envoie automatiquement un email avec reçu PDF après un dépôt d'épargne
+    Prépare l'email avec reçu PDF après un dépôt d'épargne
     
     Args:
         donnat_epargne_id (int): ID du DonnatEpargne
     
     Returns:
-        EnvoiEmail: Instance de l'envoi créé
+        dict: Paramètres de envoyer_email_avec_receipt, ou None si pas de destinataire
     """
     try:
         donnat_epargne = DonnatEpargne.objects.get(id=donnat_epargne_id)
@@ -127,8 +136,8 @@ def envoyer_email_depot_epargne(donnat_epargne_id):
     # Générer le template HTML
     template_html = get_email_template_depot_epargne(donnat_epargne, titulaire)
     
-    # Générer le PDF
-    pdf_buffer = generate_receipt_depot_epargne(donnat_epargne_id)
+    # Reçu PDF stocké (généré au premier envoi, réutilisé ensuite)
+    pdf_buffer = lire_recu('depot_epargne', donnat_epargne_id)
     
     # Déterminer le type de destinataire
     if compte.titulaire_membre:
@@ -141,30 +150,43 @@ def envoyer_email_depot_epargne(donnat_epargne_id):
     # Sujet de l'email
     sujet = f"Confirmation de votre dépôt d'épargne - {donnat_epargne.montant} USD"
     
-    # Envoyer l'email
-    envoi = envoyer_email_avec_receipt(
-        template_html=template_html,
-        sujet=sujet,
-        destinataire_email=titulaire.email,
-        destinataire_type=destinataire_type,
-        destinataire_id=destinataire_id,
-        pdf_buffer=pdf_buffer,
-        operation_type='depot_epargne',
-        operation_id=donnat_epargne_id
-    )
+    return {
+        'template_html': template_html,
+        'sujet': sujet,
+        'destinataire_email': titulaire.email,
+        'destinataire_type': destinataire_type,
+        'destinataire_id': destinataire_id,
+        'pdf_buffer': pdf_buffer,
+        'operation_type': 'depot_epargne',
+        'operation_id': donnat_epargne_id,
+    }
+
+
+def envoyer_email_depot_epargne(donnat_epargne_id):
+    """
+    Envoie automatiquement un email avec reçu PDF après un dépôt d'épargne
     
-    return envoi
+    Args:
+        donnat_epargne_id (int): ID du DonnatEpargne
+    
+    Returns:
+        EnvoiEmail: Instance de l'envoi créé
+    """
+    parametres = preparer_email_depot_epargne(donnat_epargne_id)
+    if parametres is None:
+        return None
+    return envoyer_email_avec_receipt(**parametres)
 
 
-def envoyer_email_versement_part_sociale(donnat_part_social_id):
+def preparer_email_versement_part_sociale(donnat_part_social_id):
     """
-    Envoie automatiquement un email avec reçu PDF après un versement de part sociale
+    Prépare l'email avec reçu PDF après un versement de part sociale
     
     Args:
         donnat_part_social_id (int): ID du DonnatPartSocial
     
     Returns:
-        EnvoiEmail: Instance de l'envoi créé
+        dict: Paramètres de envoyer_email_avec_receipt, ou None si pas de destinataire
     """
     try:
         donnat_part = DonnatPartSocial.objects.get(id=donnat_part_social_id)
@@ -181,36 +203,49 @@ def envoyer_email_versement_part_sociale(donnat_part_social_id):
     # Générer le template HTML
     template_html = get_email_template_versement_part_sociale(donnat_part, membre)
     
-    # Générer le PDF
-    pdf_buffer = generate_receipt_versement_part_sociale(donnat_part_social_id)
+    # Reçu PDF stocké (généré au premier envoi, réutilisé ensuite)
+    pdf_buffer = lire_recu('versement_part_sociale', donnat_part_social_id)
     
     # Sujet de l'email
     sujet = f"Confirmation de votre versement de part sociale - {donnat_part.montant} USD"
     
-    # Envoyer l'email
-    envoi = envoyer_email_avec_receipt(
-        template_html=template_html,
-        sujet=sujet,
-        destinataire_email=membre.email,
-        destinataire_type='MEMBRE',
-        destinataire_id=membre.id,
-        pdf_buffer=pdf_buffer,
-        operation_type='versement_part_sociale',
-        operation_id=donnat_part_social_id
-    )
+    return {
+        'template_html': template_html,
+        'sujet': sujet,
+        'destinataire_email': membre.email,
+        'destinataire_type': 'MEMBRE',
+        'destinataire_id': membre.id,
+        'pdf_buffer': pdf_buffer,
+        'operation_type': 'versement_part_sociale',
+        'operation_id': donnat_part_social_id,
+    }
+
+
+def envoyer_email_versement_part_sociale(donnat_part_social_id):
+    """
+    Envoie automatiquement un email avec reçu PDF après un versement de part sociale
     
-    return envoi
+    Args:
+        donnat_part_social_id (int): ID du DonnatPartSocial
+    
+    Returns:
+        EnvoiEmail: Instance de l'envoi créé
+    """
+    parametres = preparer_email_versement_part_sociale(donnat_part_social_id)
+    if parametres is None:
+        return None
+    return envoyer_email_avec_receipt(**parametres)
 
 
-def envoyer_email_retrait(retrait_id):
+def preparer_email_retrait(retrait_id):
     """
-    Envoie automatiquement un email avec reçu PDF après un retrait
+    Prépare l'email avec reçu PDF après un retrait
     
     Args:
         retrait_id (int): ID du Retrait
     
     Returns:
-        EnvoiEmail: Instance de l'envoi créé
+        dict: Paramètres de envoyer_email_avec_receipt, ou None si pas de destinataire
     """
     try:
         retrait = Retrait.objects.get(id=retrait_id)
@@ -229,8 +264,8 @@ def envoyer_email_retrait(retrait_id):
     # Générer le template HTML
     template_html = get_email_template_retrait(retrait, titulaire)
     
-    # Générer le PDF
-    pdf_buffer = generate_receipt_retrait(retrait_id)
+    # Reçu PDF stocké (généré au premier envoi, réutilisé ensuite)
+    pdf_buffer = lire_recu('retrait', retrait_id)
     
     # Déterminer le type de destinataire
     if compte.titulaire_membre:
@@ -243,30 +278,43 @@ def envoyer_email_retrait(retrait_id):
     # Sujet de l'email
     sujet = f"Confirmation de votre retrait - {retrait.montant} USD"
     
-    # Envoyer l'email
-    envoi = envoyer_email_avec_receipt(
-        template_html=template_html,
-        sujet=sujet,
-        destinataire_email=titulaire.email,
-        destinataire_type=destinataire_type,
-        destinataire_id=destinataire_id,
-        pdf_buffer=pdf_buffer,
-        operation_type='retrait',
-        operation_id=retrait_id
-    )
+    return {
+        'template_html': template_html,
+        'sujet': sujet,
+        'destinataire_email': titulaire.email,
+        'destinataire_type': destinataire_type,
+        'destinataire_id': destinataire_id,
+        'pdf_buffer': pdf_buffer,
+        'operation_type': 'retrait',
+        'operation_id': retrait_id,
+    }
+
+
+def envoyer_email_retrait(retrait_id):
+    """
+    Envoie automatiquement un email avec reçu PDF après un retrait
     
-    return envoi
+    Args:
+        retrait_id (int): ID du Retrait
+    
+    Returns:
+        EnvoiEmail: Instance de l'envoi créé
+    """
+    parametres = preparer_email_retrait(retrait_id)
+    if parametres is None:
+        return None
+    return envoyer_email_avec_receipt(**parametres)
 
 
-def envoyer_email_credit(credit_id):
+def preparer_email_credit(credit_id):
     """
-    Envoie automatiquement un email avec reçu PDF après l'octroi d'un crédit
+    Prépare l'email avec reçu PDF après l'octroi d'un crédit
     
     Args:
         credit_id (int): ID du Credit
     
     Returns:
-        EnvoiEmail: Instance de l'envoi créé
+        dict: Paramètres de envoyer_email_avec_receipt, ou None si pas de destinataire
     """
     try:
         credit = Credit.objects.get(id=credit_id)
@@ -283,8 +331,8 @@ def envoyer_email_credit(credit_id):
     # Générer le template HTML
     template_html = get_email_template_credit(credit, titulaire)
     
-    # Générer le PDF
-    pdf_buffer = generate_receipt_credit(credit_id)
+    # Reçu PDF stocké (généré au premier envoi, réutilisé ensuite)
+    pdf_buffer = lire_recu('credit', credit_id)
     
     # Déterminer le type de destinataire
     if credit.membre:
@@ -297,30 +345,43 @@ def envoyer_email_credit(credit_id):
     # Sujet de l'email
     sujet = f"Votre crédit a été octroyé - {credit.montant} USD"
     
-    # Envoyer l'email
-    envoi = envoyer_email_avec_receipt(
-        template_html=template_html,
-        sujet=sujet,
-        destinataire_email=titulaire.email,
-        destinataire_type=destinataire_type,
-        destinataire_id=destinataire_id,
-        pdf_buffer=pdf_buffer,
-        operation_type='credit',
-        operation_id=credit_id
-    )
+    return {
+        'template_html': template_html,
+        'sujet': sujet,
+        'destinataire_email': titulaire.email,
+        'destinataire_type': destinataire_type,
+        'destinataire_id': destinataire_id,
+        'pdf_buffer': pdf_buffer,
+        'operation_type': 'credit',
+        'operation_id': credit_id,
+    }
+
+
+def envoyer_email_credit(credit_id):
+    """
+    Envoie automatiquement un email avec reçu PDF après l'octroi d'un crédit
     
-    return envoi
+    Args:
+        credit_id (int): ID du Credit
+    
+    Returns:
+        EnvoiEmail: Instance de l'envoi créé
+    """
+    parametres = preparer_email_credit(credit_id)
+    if parametres is None:
+        return None
+    return envoyer_email_avec_receipt(**parametres)
 
 
-def envoyer_email_remboursement(remboursement_id):
+def preparer_email_remboursement(remboursement_id):
     """
-    Envoie automatiquement un email avec reçu PDF après un remboursement
+    Prépare l'email avec reçu PDF après un remboursement
     
     Args:
         remboursement_id (int): ID du Remboursement
     
     Returns:
-        EnvoiEmail: Instance de l'envoi créé
+        dict: Paramètres de envoyer_email_avec_receipt, ou None si pas de destinataire
     """
     try:
         remboursement = Remboursement.objects.get(id=remboursement_id)
@@ -338,8 +399,8 @@ def envoyer_email_remboursement(remboursement_id):
     # Générer le template HTML
     template_html = get_email_template_remboursement(remboursement, titulaire)
     
-    # Générer le PDF
-    pdf_buffer = generate_receipt_remboursement(remboursement_id)
+    # Reçu PDF stocké (généré au premier envoi, réutilisé ensuite)
+    pdf_buffer = lire_recu('remboursement', remboursement_id)
     
     # Déterminer le type de destinataire
     if credit.membre:
@@ -352,30 +413,43 @@ def envoyer_email_remboursement(remboursement_id):
     # Sujet de l'email
     sujet = f"Confirmation de votre remboursement - {remboursement.montant} USD"
     
-    # Envoyer l'email
-    envoi = envoyer_email_avec_receipt(
-        template_html=template_html,
-        sujet=sujet,
-        destinataire_email=titulaire.email,
-        destinataire_type=destinataire_type,
-        destinataire_id=destinataire_id,
-        pdf_buffer=pdf_buffer,
-        operation_type='remboursement',
-        operation_id=remboursement_id
-    )
+    return {
+        'template_html': template_html,
+        'sujet': sujet,
+        'destinataire_email': titulaire.email,
+        'destinataire_type': destinataire_type,
+        'destinataire_id': destinataire_id,
+        'pdf_buffer': pdf_buffer,
+        'operation_type': 'remboursement',
+        'operation_id': remboursement_id,
+    }
+
+
+def envoyer_email_remboursement(remboursement_id):
+    """
+    Envoie automatiquement un email avec reçu PDF après un remboursement
     
-    return envoi
+    Args:
+        remboursement_id (int): ID du Remboursement
+    
+    Returns:
+        EnvoiEmail: Instance de l'envoi créé
+    """
+    parametres = preparer_email_remboursement(remboursement_id)
+    if parametres is None:
+        return None
+    return envoyer_email_avec_receipt(**parametres)
 
 
-def envoyer_email_frais_adhesion(frais_adhesion_id):
+def preparer_email_frais_adhesion(frais_adhesion_id):
     """
-    Envoie automatiquement un email avec reçu PDF après le paiement de frais d'adhésion
+    Prépare l'email avec reçu PDF après le paiement de frais d'adhésion
     
     Args:
         frais_adhesion_id (int): ID du FraisAdhesion
     
     Returns:
-        EnvoiEmail: Instance de l'envoi créé
+        dict: Paramètres de envoyer_email_avec_receipt, ou None si pas de destinataire
     """
     try:
         frais_adhesion = FraisAdhesion.objects.get(id=frais_adhesion_id)
@@ -392,8 +466,8 @@ def envoyer_email_frais_adhesion(frais_adhesion_id):
     # Générer le template HTML
     template_html = get_email_template_frais_adhesion(frais_adhesion, titulaire)
     
-    # Générer le PDF
-    pdf_buffer = generate_receipt_frais_adhesion(frais_adhesion_id)
+    # Reçu PDF stocké (généré au premier envoi, réutilisé ensuite)
+    pdf_buffer = lire_recu('frais_adhesion', frais_adhesion_id)
     
     # Déterminer le type de destinataire
     if frais_adhesion.titulaire_membre:
@@ -406,18 +480,243 @@ def envoyer_email_frais_adhesion(frais_adhesion_id):
     # Sujet de l'email
     sujet = f"Confirmation de votre paiement de frais d'adhésion - {frais_adhesion.montant} USD"
     
-    # Envoyer l'email
-    envoi = envoyer_email_avec_receipt(
-        template_html=template_html,
-        sujet=sujet,
-        destinataire_email=titulaire.email,
-        destinataire_type=destinataire_type,
-        destinataire_id=destinataire_id,
-        pdf_buffer=pdf_buffer,
-        operation_type='frais_adhesion',
-        operation_id=frais_adhesion_id
+    return {
+        'template_html': template_html,
+        'sujet': sujet,
+        'destinataire_email': titulaire.email,
+        'destinataire_type': destinataire_type,
+        'destinataire_id': destinataire_id,
+        'pdf_buffer': pdf_buffer,
+        'operation_type': 'frais_adhesion',
+        'operation_id': frais_adhesion_id,
+    }
+
+
+def envoyer_email_frais_adhesion(frais_adhesion_id):
+    """
+    Envoie automatiquement un email avec reçu PDF après le paiement de frais d'adhésion
+    
+    Args:
+        frais_adhesion_id (int): ID du FraisAdhesion
+    
+    Returns:
+        EnvoiEmail: Instance de l'envoi créé
+    """
+    parametres = preparer_email_frais_adhesion(frais_adhesion_id)
+    if parametres is None:
+        return None
+    return envoyer_email_avec_receipt(**parametres)
+
+
+def preparer_email_echeance_credit(credit_id):
+    """
+    Prépare l'email de rappel d'un crédit arrivé à échéance (sans reçu PDF)
+    
+    Args:
+        credit_id (int): ID du Credit
+    
+    Returns:
+        dict: Paramètres de envoyer_email_avec_receipt, ou None si le crédit n'est plus
+              EN_COURS (remboursé entre-temps) ou si le titulaire n'a pas d'email
+    """
+    try:
+        credit = Credit.objects.select_related('membre', 'client').get(id=credit_id)
+    except Credit.DoesNotExist:
+        return None
+    
+    if credit.statut != 'EN_COURS':
+        return None
+    
+    titulaire = credit.membre or credit.client
+    if not titulaire or not hasattr(titulaire, 'email') or not titulaire.email:
+        return None
+    
+    return {
+        'template_html': get_email_template_echeance_credit(credit, titulaire),
+        'sujet': "Échéance de crédit atteinte",
+        'destinataire_email': titulaire.email,
+        'destinataire_type': 'MEMBRE' if credit.membre else 'CLIENT',
+        'destinataire_id': titulaire.id,
+        'pdf_buffer': None,
+        'operation_type': 'echeance_credit',
+        'operation_id': credit_id,
+    }
+
+
+# ============================================================================
+# FILE D'ENVOI (OUTBOX) DES REÇUS
+# ============================================================================
+# Les signaux n'envoient plus les emails dans la requête HTTP : ils insèrent un EnvoiEmail
+# EN_ATTENTE dans la même transaction que l'opération (annulé avec elle en cas de rollback).
+# Le worker (python manage.py traiter_file_emails) génère ensuite le reçu et l'envoie.
+
+# Type d'opération -> fonction de préparation de l'email
+PREPARATEURS = {
+    'depot_epargne': preparer_email_depot_epargne,
+    'versement_part_sociale': preparer_email_versement_part_sociale,
+    'retrait': preparer_email_retrait,
+    'credit': preparer_email_credit,
+    'remboursement': preparer_email_remboursement,
+    'frais_adhesion': preparer_email_frais_adhesion,
+    'echeance_credit': preparer_email_echeance_credit,
+}
+
+# Délai de la première nouvelle tentative (doublé à chaque échec) et délai maximum
+DELAI_TENTATIVE_BASE = timedelta(minutes=1)
+DELAI_TENTATIVE_MAX = timedelta(hours=1)
+
+
+def mettre_en_file_email(type_operation, operation_id):
+    """
+    Met en file l'envoi de l'email avec reçu d'une opération (une seule requête INSERT)
+    
+    Args:
+        type_operation (str): Clé de PREPARATEURS (depot_epargne, retrait, credit, ...)
+        operation_id (int): ID de l'opération
+    
+    Returns:
+        EnvoiEmail: Envoi EN_ATTENTE (destinataire et contenu renseignés par le worker)
+    """
+    if type_operation not in PREPARATEURS:
+        raise ValueError(f"Type d'opération inconnu pour la file d'envoi: {type_operation}")
+    return EnvoiEmail.objects.create(
+        rapport=None,
+        destinataire_type='',
+        destinataire_id=0,
+        email_destinataire='',
+        sujet=f"Reçu {type_operation} #{operation_id}",
+        message='',
+        statut=StatutEnvoi.EN_ATTENTE,
+        type_operation=type_operation,
+        operation_id=operation_id
     )
+
+
+def mettre_en_file_emails(type_operation, operation_ids, taille_lot=500):
+    """
+    Met en file les emails de plusieurs opérations d'un même type (INSERT par lots)
     
-    return envoi
+    Args:
+        type_operation (str): Clé de PREPARATEURS
+        operation_ids (list): IDs des opérations
+        taille_lot (int): Nombre de lignes par INSERT
+    
+    Returns:
+        int: Nombre d'envois mis en file
+    """
+    if type_operation not in PREPARATEURS:
+        raise ValueError(f"Type d'opération inconnu pour la file d'envoi: {type_operation}")
+    envois = [
+        EnvoiEmail(
+            rapport=None,
+            destinataire_type='',
+            destinataire_id=0,
+            email_destinataire='',
+            sujet=f"Reçu {type_operation} #{operation_id}",
+            message='',
+            statut=StatutEnvoi.EN_ATTENTE,
+            type_operation=type_operation,
+            operation_id=operation_id
+        )
+        for operation_id in operation_ids
+    ]
+    EnvoiEmail.objects.bulk_create(envois, batch_size=taille_lot)
+    return len(envois)
+
+
+def calculer_delai_tentative(tentatives):
+    """Délai avant la prochaine tentative (backoff exponentiel plafonné)"""
+    delai = DELAI_TENTATIVE_BASE * (2 ** max(tentatives - 1, 0))
+    return min(delai, DELAI_TENTATIVE_MAX)
+
+
+def reclamer_envois_en_file(limite, duree_verrou=timedelta(minutes=10)):
+    """
+    Réserve un lot d'envois à traiter et les passe EN_COURS.
+    
+    Les lignes sont verrouillées avec SKIP LOCKED : plusieurs workers peuvent tourner en parallèle
+    sans traiter deux fois le même envoi. prochaine_tentative sert de fin de verrou pour un envoi
+    EN_COURS : si le worker s'arrête brutalement, l'envoi est repris après expiration.
+    
+    Args:
+        limite (int): Nombre maximum d'envois réservés
+        duree_verrou (timedelta): Durée de réservation d'un envoi EN_COURS
+    
+    Returns:
+        list: Envois EnvoiEmail réservés (tentatives déjà incrémentée)
+    """
+    maintenant = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            EnvoiEmail.objects.select_for_update(skip_locked=True)
+            .filter(type_operation__isnull=False)
+            .filter(
+                Q(statut=StatutEnvoi.EN_ATTENTE, prochaine_tentative__isnull=True)
+                | Q(statut=StatutEnvoi.EN_ATTENTE, prochaine_tentative__lte=maintenant)
+                | Q(statut=StatutEnvoi.EN_COURS, prochaine_tentative__lte=maintenant)
+            )
+            .order_by('date_creation', 'id')
+            .values_list('id', flat=True)[:limite]
+        )
+        if not ids:
+            return []
+        EnvoiEmail.objects.filter(id__in=ids).update(
+            statut=StatutEnvoi.EN_COURS,
+            prochaine_tentative=maintenant + duree_verrou,
+            tentatives=F('tentatives') + 1
+        )
+    return list(EnvoiEmail.objects.filter(id__in=ids).order_by('date_creation', 'id'))
 
 
+def traiter_envoi_en_file(envoi, connection=None, max_tentatives=5):
+    """
+    Génère le reçu d'un envoi réservé et l'envoie.
+    
+    En cas d'échec, l'envoi repasse EN_ATTENTE avec une prochaine tentative différée,
+    ou reste en ECHEC une fois max_tentatives atteint. Si l'opération n'existe plus ou si le
+    titulaire n'a pas d'email, l'envoi est supprimé (comme l'envoi direct, qui n'enregistre rien).
+    
+    Args:
+        envoi (EnvoiEmail): Envoi réservé par reclamer_envois_en_file
+        connection: Connexion SMTP ouverte à réutiliser pour tout le lot (optionnel)
+        max_tentatives (int): Nombre maximum de tentatives avant ECHEC définitif
+    
+    Returns:
+        EnvoiEmail: Envoi mis à jour, ou None s'il a été supprimé
+    """
+    preparateur = PREPARATEURS.get(envoi.type_operation)
+    try:
+        parametres = preparateur(envoi.operation_id) if preparateur else None
+    except Exception as e:
+        envoi.statut = StatutEnvoi.ECHEC
+        envoi.erreur = f"Erreur lors de la génération du reçu: {str(e)}"
+        parametres = False
+    
+    if parametres is None:
+        envoi.delete()
+        return None
+    
+    if parametres:
+        envoi = envoyer_email_avec_receipt(**parametres, envoi=envoi, connection=connection)
+    
+    if envoi.statut == StatutEnvoi.ENVOYE:
+        if envoi.prochaine_tentative is not None:
+            envoi.prochaine_tentative = None
+            envoi.save(update_fields=['prochaine_tentative'])
+        return envoi
+    
+    # Une connexion SMTP en erreur ne doit être réutilisée ni pour le reste du lot ni via le pool
+    if connection is not None:
+        abandonner = getattr(connection, 'abandonner', None)
+        if abandonner is not None:
+            abandonner()
+        else:
+            connection.close()
+    
+    if envoi.tentatives < max_tentatives:
+        envoi.statut = StatutEnvoi.EN_ATTENTE
+        envoi.prochaine_tentative = timezone.now() + calculer_delai_tentative(envoi.tentatives)
+    else:
+        envoi.prochaine_tentative = None
+    envoi.save()
+    return envoi
@@ -683,3 +683,116 @@ def get_email_template_frais_adhesion(frais_adhesion, titulaire):
 </body>
 </html>
 """
+
+
+def get_email_template_echeance_credit(credit, titulaire):
+    """Template HTML pour l'email de rappel d'échéance de crédit (sans pièce jointe)"""
+    context = get_email_template_context()
+    context.update({
+        'titulaire_nom': str(titulaire),
+        'montant': credit.montant,
+        'taux_interet': credit.taux_interet,
+        'interet': credit.interet,
+        'duree': credit.duree,
+        'duree_type': credit.get_duree_type_display(),
+        'date_fin': credit.date_fin.strftime("%d/%m/%Y") if credit.date_fin else '',
+        'solde_restant': credit.solde_restant,
+        'type_operation': 'Échéance de crédit',
+    })
+    
+    return f"""
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <style>
+        body {{
+            font-family: Arial, sans-serif;
+            line-height: 1.6;
+            color: #333;
+            max-width: 600px;
+            margin: 0 auto;
+            padding: 20px;
+        }}
+        .header {{
+            background: linear-gradient(135deg, #4A90E2 0%, #2E5C8A 100%);
+            color: white;
+            padding: 30px;
+            text-align: center;
+            border-radius: 10px 10px 0 0;
+        }}
+        .header img {{
+            max-width: 150px;
+            height: auto;
+            margin-bottom: 10px;
+        }}
+        .header h1 {{
+            margin: 10px 0;
+            font-size: 24px;
+        }}
+        .content {{
+            background: #f9f9f9;
+            padding: 30px;
+            border: 1px solid #ddd;
+        }}
+        .info-box {{
+            background: white;
+            border-left: 4px solid #4A90E2;
+            padding: 15px;
+            margin: 20px 0;
+        }}
+        .info-box strong {{
+            color: #2E5C8A;
+        }}
+        .footer {{
+            background: #2E5C8A;
+            color: white;
+            padding: 20px;
+            text-align: center;
+            border-radius: 0 0 10px 10px;
+            font-size: 12px;
+        }}
+    </style>
+</head>
+<body>
+    <div class="header">
+        {'<img src="' + context['coop_logo_url'] + '" alt="Logo">' if context['coop_logo_url'] else ''}
+        <h1>{context['coop_nom']}</h1>
+        {('<p>' + context['coop_sigle'] + '</p>') if context['coop_sigle'] else ''}
+    </div>
+    
+    <div class="content">
+        <h2 style="color: #2E5C8A;">Échéance de votre crédit atteinte</h2>
+        
+        <p>Bonjour <strong>{context['titulaire_nom']}</strong>,</p>
+        
+        <p>La durée de votre crédit ({context['duree']} {context['duree_type']}) arrive à son terme aujourd'hui. Merci de régulariser votre situation.</p>
+        
+        <div class="info-box">
+            <p><strong>Type d'opération :</strong> {context['type_operation']}</p>
+            <p><strong>Montant du crédit :</strong> {context['montant']:,.2f} USD</p>
+            <p><strong>Taux d'intérêt :</strong> {context['taux_interet']}%</p>
+            <p><strong>Intérêt total :</strong> {context['interet']:,.2f} USD</p>
+            <p><strong>Durée :</strong> {context['duree']} {context['duree_type']}</p>
+            <p><strong>Date d'échéance :</strong> {context['date_fin']}</p>
+            <p><strong>Solde restant :</strong> {context['solde_restant']:,.2f} USD</p>
+        </div>
+        
+        <p>Si vous avez déjà effectué ce remboursement, merci de ne pas tenir compte de ce message.</p>
+        
+        <p>Nous restons à votre disposition pour toute question.</p>
+        
+        <p>Cordialement,<br>
+        <strong>L'équipe {context['coop_nom']}</strong></p>
+    </div>
+    
+    <div class="footer">
+        <p><strong>{context['coop_nom']}</strong></p>
+        {('<p>Tél: ' + context['coop_telephone'] + '</p>') if context['coop_telephone'] else ''}
+        {('<p>Email: ' + context['coop_email'] + '</p>') if context['coop_email'] else ''}
+        {('<p>Site web: ' + context['coop_site_web'] + '</p>') if context['coop_site_web'] else ''}
+        <p>&copy; {context['coop_nom']} - Tous droits réservés</p>
+    </div>
+</body>
+</html>
+"""
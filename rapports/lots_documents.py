@@ -0,0 +1,252 @@
+"""
+Génération en lot de documents PDF (relevés de compte de fin de mois, reçus d'une période)
+
+Le lot est découpé en morceaux d'un même type de document, répartis sur un pool de processus.
+Chaque processus charge les titulaires / opérations de son morceau en une requête, génère les PDF
+et les écrit dans le stockage (lots/<id>/...). Les PDF déjà présents sont ignorés : un lot
+interrompu (arrêt, plantage) reprend là où il s'est arrêté. Les documents sont ensuite réunis
+dans une archive ZIP (LotDocuments.fichier_zip).
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from users.models import Membre, Client
+from membres.models import DonnatEpargne, DonnatPartSocial, Retrait, FraisAdhesion
+from credits.models import Credit, Remboursement
+from .models import LotDocuments, StatutLot, TypeLot
+from .account_statement import generer_releve_titulaire
+from .receipt_store import enregistrer_fichier
+from .receipts import (
+    charger_operations_recus,
+    rendre_recu,
+    donnees_receipt_depot_epargne,
+    donnees_receipt_versement_part_sociale,
+    donnees_receipt_retrait,
+    donnees_receipt_credit,
+    donnees_receipt_remboursement,
+    donnees_receipt_frais_adhesion
+)
+
+
+LOTS_DIR = 'lots'
+
+TITULAIRES_RELEVES = {
+    'membre': Membre,
+    'client': Client,
+}
+
+# Type de reçu -> (modèle, champ de date de l'opération, contenu du reçu)
+RECUS_LOT = {
+    'depot_epargne': (DonnatEpargne, 'souscriptEpargne__date_souscription', donnees_receipt_depot_epargne),
+    'versement_part_sociale': (DonnatPartSocial, 'date_donnat', donnees_receipt_versement_part_sociale),
+    'retrait': (Retrait, 'date_operation__date', donnees_receipt_retrait),
+    'credit': (Credit, 'date_octroi', donnees_receipt_credit),
+    'remboursement': (Remboursement, 'echeance', donnees_receipt_remboursement),
+    'frais_adhesion': (FraisAdhesion, 'date_paiement', donnees_receipt_frais_adhesion),
+}
+
+
+# =====================================================
+# LISTE DES DOCUMENTS D'UN LOT
+# =====================================================
+
+def dossier_lot(lot_id):
+    return f'{LOTS_DIR}/{lot_id}'
+
+
+def lister_documents(lot):
+    """
+    Liste les documents d'un lot, dans un ordre stable (reprise)
+
+    Returns:
+        list: Liste de (catégorie, id, chemin dans le stockage) ; la catégorie est
+              'membre' / 'client' pour les relevés, le type d'opération pour les reçus
+    """
+    dossier = dossier_lot(lot.id)
+    documents = []
+    if lot.type_lot == TypeLot.RELEVES:
+        for champ, modele in TITULAIRES_RELEVES.items():
+            for titulaire_id, numero_compte in modele.objects.order_by('id').values_list('id', 'numero_compte'):
+                documents.append((champ, titulaire_id, f'{dossier}/releves/releve_{champ}_{numero_compte}.pdf'))
+    else:
+        for type_operation, (modele, champ_date, _) in RECUS_LOT.items():
+            operations = modele.objects.order_by('id')
+            if lot.date_debut:
+                operations = operations.filter(**{f'{champ_date}__gte': lot.date_debut})
+            if lot.date_fin:
+                operations = operations.filter(**{f'{champ_date}__lte': lot.date_fin})
+            for operation_id in operations.values_list('id', flat=True):
+                documents.append((type_operation, operation_id, f'{dossier}/recus/{type_operation}/recu_{type_operation}_{operation_id}.pdf'))
+    return documents
+
+
+def decouper_documents(documents, taille_morceau):
+    """Découpe la liste en morceaux d'une seule catégorie (une requête de chargement par morceau)"""
+    morceaux = []
+    for document in documents:
+        if morceaux and morceaux[-1][0] == document[0] and len(morceaux[-1][1]) < taille_morceau:
+            morceaux[-1][1].append(document[1:])
+        else:
+            morceaux.append((document[0], [document[1:]]))
+    return morceaux
+
+
+# =====================================================
+# GÉNÉRATION (PROCESSUS DU POOL)
+# =====================================================
+
+def generer_morceau(categorie, documents, date_debut=None, date_fin=None):
+    """
+    Génère les PDF d'un morceau (exécuté dans un processus du pool)
+
+    Args:
+        categorie (str): 'membre', 'client' ou type de reçu
+        documents (list): Liste de (id, chemin)
+        date_debut, date_fin: Période des relevés
+
+    Returns:
+        tuple: (nombre traités, nombre générés, liste des erreurs)
+    """
+    erreurs = []
+    # Reprise : les PDF déjà écrits ne sont pas régénérés (mais comptent dans l'archive)
+    a_generer = [(i, chemin) for i, chemin in documents if not default_storage.exists(chemin)]
+    generes = len(documents) - len(a_generer)
+    if not a_generer:
+        return len(documents), generes, erreurs
+
+    ids = [i for i, _ in a_generer]
+    if categorie in TITULAIRES_RELEVES:
+        objets = TITULAIRES_RELEVES[categorie].objects.in_bulk(ids)
+    else:
+        objets = charger_operations_recus(categorie, ids)
+
+    for objet_id, chemin in a_generer:
+        objet = objets.get(objet_id)
+        if objet is None:
+            continue
+        try:
+            if categorie in TITULAIRES_RELEVES:
+                pdf_buffer = generer_releve_titulaire(categorie, objet, date_debut, date_fin)
+            else:
+                donnees = RECUS_LOT[categorie][2](objet_id, objet)
+                pdf_buffer = rendre_recu(**donnees) if donnees else None
+            if pdf_buffer is None:
+                # Titulaire sans opération sur la période : pas de relevé
+                continue
+            # Écriture atomique : un PDF présent dans le stockage est complet (voir la reprise ci-dessus)
+            enregistrer_fichier(chemin, pdf_buffer.getvalue())
+            generes += 1
+        except Exception as e:
+            erreurs.append(f'{categorie} {objet_id}: {str(e)}')
+    return len(documents), generes, erreurs
+
+
+# =====================================================
+# EXÉCUTION D'UN LOT
+# =====================================================
+
+def reclamer_lot_en_attente():
+    """Réserve le plus ancien lot EN_ATTENTE (SELECT ... SKIP LOCKED), ou None"""
+    with transaction.atomic():
+        lot = (
+            LotDocuments.objects.select_for_update(skip_locked=True)
+            .filter(statut=StatutLot.EN_ATTENTE)
+            .order_by('date_creation', 'id')
+            .first()
+        )
+        if lot is None:
+            return None
+        lot.statut = StatutLot.EN_COURS
+        lot.date_progression = timezone.now()
+        lot.save(update_fields=['statut', 'date_progression'])
+    return lot
+
+
+def assembler_zip(lot, documents):
+    """Réunit les PDF générés du lot dans une archive ZIP écrite au fil de l'eau (fichier temporaire)"""
+    dossier = dossier_lot(lot.id)
+    with tempfile.TemporaryFile() as temporaire:
+        with zipfile.ZipFile(temporaire, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for _, _, chemin in documents:
+                if not default_storage.exists(chemin):
+                    continue
+                nom = chemin[len(dossier) + 1:]
+                with default_storage.open(chemin, 'rb') as source, archive.open(nom, 'w') as cible:
+                    shutil.copyfileobj(source, cible)
+        temporaire.seek(0)
+        if lot.fichier_zip:
+            lot.fichier_zip.delete(save=False)
+        lot.fichier_zip.save(f'lot_{lot.id}_{lot.type_lot.lower()}.zip', File(temporaire), save=False)
+
+
+def executer_lot(lot, processus=None, taille_morceau=50, progression=None):
+    """
+    Génère (ou reprend) un lot de documents puis assemble l'archive ZIP
+
+    Args:
+        lot (LotDocuments): Lot à traiter
+        processus (int): Nombre de processus du pool (défaut : nombre de cœurs, 1 = sans pool)
+        taille_morceau (int): Nombre de documents par morceau
+        progression (callable): Appelé avec le lot après chaque morceau (optionnel)
+
+    Returns:
+        LotDocuments: Lot mis à jour (TERMINE ou ECHEC)
+    """
+    processus = processus or os.cpu_count() or 1
+    documents = lister_documents(lot)
+    LotDocuments.objects.filter(pk=lot.pk).update(
+        statut=StatutLot.EN_COURS, total=len(documents), traites=0, generes=0, erreurs=0,
+        erreur=None, date_debut_traitement=timezone.now(), date_fin_traitement=None,
+        date_progression=timezone.now()
+    )
+    lot.refresh_from_db()
+
+    morceaux = decouper_documents(documents, taille_morceau)
+    messages_erreurs = []
+    try:
+        if processus == 1:
+            resultats = (generer_morceau(categorie, docs, lot.date_debut, lot.date_fin) for categorie, docs in morceaux)
+            _enregistrer_resultats(lot, resultats, messages_erreurs, progression)
+        else:
+            # Les processus sont créés par fork : ne pas leur transmettre les connexions ouvertes
+            connections.close_all()
+            contexte = multiprocessing.get_context('fork')
+            with ProcessPoolExecutor(max_workers=processus, mp_context=contexte) as executor:
+                futures = [
+                    executor.submit(generer_morceau, categorie, docs, lot.date_debut, lot.date_fin)
+                    for categorie, docs in morceaux
+                ]
+                _enregistrer_resultats(lot, (future.result() for future in as_completed(futures)), messages_erreurs, progression)
+
+        assembler_zip(lot, documents)
+        lot.statut = StatutLot.TERMINE
+        lot.erreur = '\n'.join(messages_erreurs[:50]) or None
+    except Exception as e:
+        lot.statut = StatutLot.ECHEC
+        lot.erreur = str(e)
+    lot.date_fin_traitement = timezone.now()
+    lot.save(update_fields=['statut', 'erreur', 'fichier_zip', 'date_fin_traitement'])
+    return lot
+
+
+def _enregistrer_resultats(lot, resultats, messages_erreurs, progression):
+    """Met à jour l'avancement du lot au fur et à mesure des morceaux terminés"""
+    for traites, generes, erreurs in resultats:
+        messages_erreurs.extend(erreurs)
+        LotDocuments.objects.filter(pk=lot.pk).update(
+            traites=F('traites') + traites,
+            generes=F('generes') + generes,
+            erreurs=F('erreurs') + len(erreurs),
+            date_progression=timezone.now()
+        )
+        lot.refresh_from_db(fields=['traites', 'generes', 'erreurs'])
+        if progression:
+            progression(lot)
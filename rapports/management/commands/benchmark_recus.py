@@ -0,0 +1,143 @@
+"""
+Commande Django pour mesurer la vitesse de génération des reçus PDF (reçus / seconde)
+Usage:
+    python manage.py benchmark_recus
+    python manage.py benchmark_recus --type retrait --nombre 200
+
+Compare le rendu direct sur le canvas (rapports.receipts.rendre_recu) avec le rendu
+précédent par SimpleDocTemplate (story de flowables, getSampleStyleSheet, informations
+de la coopérative et logo relus à chaque reçu), sur le même contenu de reçu.
+"""
+import os
+import time
+from io import BytesIO
+from django.core.management.base import BaseCommand, CommandError
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.lib.enums import TA_CENTER
+from users.models import Cooperative
+from membres.models import DonnatEpargne, DonnatPartSocial, Retrait, FraisAdhesion
+from credits.models import Credit, Remboursement
+from rapports import receipts
+
+
+# Type de reçu -> (modèle de l'opération, fonction du contenu du reçu)
+TYPES_RECUS = {
+    'depot_epargne': (DonnatEpargne, receipts.donnees_receipt_depot_epargne),
+    'versement_part_sociale': (DonnatPartSocial, receipts.donnees_receipt_versement_part_sociale),
+    'retrait': (Retrait, receipts.donnees_receipt_retrait),
+    'credit': (Credit, receipts.donnees_receipt_credit),
+    'remboursement': (Remboursement, receipts.donnees_receipt_remboursement),
+    'frais_adhesion': (FraisAdhesion, receipts.donnees_receipt_frais_adhesion),
+}
+
+
+def _info_cooperative_sans_cache():
+    """Informations de la coopérative relues en base, logo relu depuis le disque (rendu précédent)"""
+    coop = Cooperative.objects.first()
+    if not coop:
+        return None
+    return {
+        'nom': coop.nom,
+        'sigle': coop.sigle or '',
+        'adresse': coop.adresse or '',
+        'ville': coop.ville or '',
+        'province': coop.province or '',
+        'pays': coop.pays or 'RDC',
+        'telephone': coop.telephone or '',
+        'email': coop.email or '',
+        'site_web': coop.site_web or '',
+        'numero_rccm': coop.numero_rccm or '',
+        'numero_id_nat': coop.numero_id_nat or '',
+        'agrement': coop.agrement or '',
+        'logo': coop.logo.path if coop.logo and os.path.exists(coop.logo.path) else None
+    }
+
+
+def rendre_recu_platypus(titre, lignes_operation, titre_section, lignes_section, libelle, message=None):
+    """Rendu de référence : SimpleDocTemplate et flowables, comme avant le rendu sur canvas"""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4,
+                           rightMargin=20*mm, leftMargin=20*mm,
+                           topMargin=80*mm, bottomMargin=20*mm)
+    styles = getSampleStyleSheet()
+    coop_info = _info_cooperative_sans_cache()
+
+    title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=14,
+                                 textColor=receipts.BLUE_MEDIUM, alignment=TA_CENTER, spaceAfter=10)
+    table_style = TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('TEXTCOLOR', (0, 0), (0, -1), receipts.BLUE_MEDIUM),
+        ('TEXTCOLOR', (1, 0), (1, -1), colors.black),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ('TOPPADDING', (0, 0), (-1, -1), 6),
+    ])
+    story = [Paragraph(titre, title_style), Spacer(1, 5*mm)]
+    for lignes in (lignes_operation, None, lignes_section):
+        if lignes is None:
+            story += [Paragraph(f"<b>{titre_section}</b>", styles['Normal']), Spacer(1, 2*mm)]
+            continue
+        table = Table(lignes, colWidths=[50*mm, 120*mm])
+        table.setStyle(table_style)
+        story += [table, Spacer(1, 5*mm)]
+    story.append(Paragraph(libelle, styles['Normal']))
+    if message:
+        story.append(Paragraph(f"<b>{message}</b>", title_style))
+
+    def en_tete(canvas_obj, doc):
+        receipts.generate_receipt_header(canvas_obj, doc, coop_info)
+        receipts.generate_receipt_footer(canvas_obj, doc)
+
+    doc.build(story, onFirstPage=en_tete, onLaterPages=en_tete)
+    buffer.seek(0)
+    return buffer
+
+
+class Command(BaseCommand):
+    help = 'Mesure le nombre de reçus PDF générés par seconde (rendu canvas et rendu précédent)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--type',
+            default='depot_epargne',
+            choices=list(TYPES_RECUS),
+            help='Type de reçu à générer (défaut: depot_epargne)'
+        )
+        parser.add_argument(
+            '--nombre',
+            type=int,
+            default=100,
+            help='Nombre de reçus générés par rendu (défaut: 100)'
+        )
+
+    def handle(self, *args, **options):
+        if options['nombre'] < 1:
+            raise CommandError('--nombre doit être supérieur à 0')
+        modele, donnees_recu = TYPES_RECUS[options['type']]
+        ids = list(modele.objects.order_by('id').values_list('id', flat=True)[:options['nombre']])
+        if not ids:
+            raise CommandError(f"Aucune opération {options['type']} en base pour le benchmark")
+        ids = (ids * (options['nombre'] // len(ids) + 1))[:options['nombre']]
+
+        rendus = (
+            ('Rendu précédent (SimpleDocTemplate)', rendre_recu_platypus),
+            ('Rendu canvas (rendre_recu)', receipts.rendre_recu),
+        )
+        resultats = []
+        for nom, rendre in rendus:
+            # Échauffement (chargement des polices, cache de la coopérative)
+            rendre(**donnees_recu(ids[0]))
+            debut = time.perf_counter()
+            for operation_id in ids:
+                rendre(**donnees_recu(operation_id))
+            duree = time.perf_counter() - debut
+            resultats.append(len(ids) / duree)
+            self.stdout.write(f'{nom}: {len(ids)} reçus en {duree:.2f} s, {resultats[-1]:.1f} reçus/s')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendu canvas {resultats[1] / resultats[0]:.1f} fois plus rapide ({options["type"]})'
+        ))
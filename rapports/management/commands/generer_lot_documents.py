@@ -0,0 +1,124 @@
+"""
+Commande Django pour générer en lot des documents PDF dans une archive ZIP
+Usage:
+    python manage.py generer_lot_documents --type releves --date-debut 2025-01-01 --date-fin 2025-01-31
+    python manage.py generer_lot_documents --type recus --date-debut 2025-01-01 --date-fin 2025-01-31
+    python manage.py generer_lot_documents --lot 12        (reprendre un lot interrompu)
+    python manage.py generer_lot_documents --en-attente    (lots créés via l'API, cron)
+
+La génération est répartie sur un pool de processus (--processus, défaut : nombre de cœurs).
+Les PDF déjà générés d'un lot sont conservés : relancer un lot reprend là où il s'est arrêté.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from rapports.models import LotDocuments, StatutLot, TypeLot
+from rapports.lots_documents import executer_lot, reclamer_lot_en_attente
+
+
+class Command(BaseCommand):
+    help = 'Génère en lot les relevés de compte ou les reçus d\'une période (pool de processus, archive ZIP)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--type',
+            choices=['releves', 'recus'],
+            help='Créer un nouveau lot : relevés de tous les titulaires ou reçus des opérations'
+        )
+        parser.add_argument(
+            '--date-debut',
+            type=str,
+            help='Début de la période (format: YYYY-MM-DD)'
+        )
+        parser.add_argument(
+            '--date-fin',
+            type=str,
+            help='Fin de la période (format: YYYY-MM-DD)'
+        )
+        parser.add_argument(
+            '--lot',
+            type=int,
+            help='Reprendre le lot existant avec cet ID'
+        )
+        parser.add_argument(
+            '--en-attente',
+            action='store_true',
+            help='Traiter les lots EN_ATTENTE (créés via l\'API)'
+        )
+        parser.add_argument(
+            '--processus',
+            type=int,
+            default=None,
+            help='Nombre de processus de génération (défaut: nombre de cœurs, 1 = sans pool)'
+        )
+        parser.add_argument(
+            '--taille-morceau',
+            type=int,
+            default=50,
+            help='Nombre de documents chargés et générés par morceau (défaut: 50)'
+        )
+
+    def handle(self, *args, **options):
+        if options['processus'] is not None and options['processus'] < 1:
+            raise CommandError('--processus doit être supérieur à 0')
+        if options['taille_morceau'] < 1:
+            raise CommandError('--taille-morceau doit être supérieur à 0')
+        if sum(bool(options[cle]) for cle in ('type', 'lot', 'en_attente')) != 1:
+            raise CommandError('Spécifiez une seule option parmi --type, --lot et --en-attente')
+
+        if options['en_attente']:
+            nombre = 0
+            while True:
+                lot = reclamer_lot_en_attente()
+                if lot is None:
+                    break
+                self.traiter(lot, options)
+                nombre += 1
+            if not nombre:
+                self.stdout.write('Aucun lot en attente')
+            return
+
+        if options['lot']:
+            try:
+                lot = LotDocuments.objects.get(pk=options['lot'])
+            except LotDocuments.DoesNotExist:
+                raise CommandError(f"Lot {options['lot']} introuvable")
+        else:
+            dates = {}
+            for cle in ('date_debut', 'date_fin'):
+                dates[cle] = None
+                if options[cle]:
+                    try:
+                        dates[cle] = parse_date(options[cle])
+                    except ValueError:
+                        dates[cle] = None
+                    if dates[cle] is None:
+                        raise CommandError(f"Format de --{cle.replace('_', '-')} invalide. Utilisez YYYY-MM-DD")
+            lot = LotDocuments.objects.create(
+                type_lot=TypeLot.RELEVES if options['type'] == 'releves' else TypeLot.RECUS,
+                statut=StatutLot.EN_COURS,
+                **dates
+            )
+        self.traiter(lot, options)
+
+    def traiter(self, lot, options):
+        self.stdout.write(f'Lot {lot.id} ({lot.get_type_lot_display()})...')
+
+        def progression(lot):
+            self.stdout.write(f'  {lot.traites}/{lot.total} documents ({lot.progression} %), {lot.erreurs} erreur(s)')
+
+        lot = executer_lot(
+            lot,
+            processus=options['processus'],
+            taille_morceau=options['taille_morceau'],
+            progression=progression
+        )
+        if lot.statut == StatutLot.TERMINE:
+            message = f'Lot {lot.id} terminé : {lot.generes} PDF dans {lot.fichier_zip.name}'
+            if lot.erreurs:
+                self.stdout.write(self.style.WARNING(f'{message} ({lot.erreurs} erreur(s), voir LotDocuments.erreur)'))
+            else:
+                self.stdout.write(self.style.SUCCESS(message))
+        else:
+            self.stdout.write(self.style.ERROR(
+                f'Lot {lot.id} en échec : {lot.erreur} (relancer avec --lot {lot.id})'
+            ))
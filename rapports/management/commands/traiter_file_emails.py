@@ -0,0 +1,131 @@
+"""
+Commande Django pour traiter la file d'envoi des emails avec reçus PDF
+Usage: python manage.py traiter_file_emails [--threads 4] [--lot 20] [--une-fois]
+
+Les signaux d'opérations (dépôt, retrait, crédit, remboursement, ...) mettent les emails en file
+(EnvoiEmail EN_ATTENTE). Cette commande génère les reçus et les envoie :
+- plusieurs threads en parallèle, chacun réservant son propre lot (SELECT ... SKIP LOCKED)
+- une seule connexion SMTP par lot
+- nouvelle tentative différée (backoff exponentiel) en cas d'échec, ECHEC après --max-tentatives
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection as db_connection
+from users.email_config import get_smtp_backend
+from rapports.models import StatutEnvoi
+from rapports.email_services import reclamer_envois_en_file, traiter_envoi_en_file
+
+
+def traiter_lot(taille_lot, max_tentatives):
+    """
+    Réserve et traite un lot d'envois dans le thread courant.
+
+    Returns:
+        tuple: (nombre traités, nombre envoyés, nombre en échec)
+    """
+    traites = envoyes = echecs = 0
+    try:
+        envois = reclamer_envois_en_file(taille_lot)
+        if not envois:
+            return traites, envoyes, echecs
+
+        smtp = get_smtp_backend()
+        try:
+            # Ouvrir la session pour tout le lot : sans open(), chaque envoi ouvrirait (ou emprunterait
+            # au pool) puis refermerait sa propre connexion
+            smtp.open()
+        except Exception:
+            # Serveur injoignable : chaque envoi échoue et sera replanifié (backoff)
+            pass
+        try:
+            for envoi in envois:
+                resultat = traiter_envoi_en_file(envoi, connection=smtp, max_tentatives=max_tentatives)
+                traites += 1
+                if resultat is None:
+                    continue
+                if resultat.statut == StatutEnvoi.ENVOYE:
+                    envoyes += 1
+                else:
+                    echecs += 1
+        finally:
+            smtp.close()
+    finally:
+        # Chaque thread a sa propre connexion à la base : la fermer en fin de lot
+        db_connection.close()
+    return traites, envoyes, echecs
+
+
+class Command(BaseCommand):
+    help = 'Traite la file d\'envoi des emails avec reçus PDF (génération et envoi SMTP)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=4,
+            help='Nombre de threads d\'envoi en parallèle (défaut: 4)'
+        )
+        parser.add_argument(
+            '--lot',
+            type=int,
+            default=20,
+            help='Nombre d\'envois réservés par thread et par connexion SMTP (défaut: 20)'
+        )
+        parser.add_argument(
+            '--max-tentatives',
+            type=int,
+            default=5,
+            help='Nombre de tentatives avant de marquer un envoi en ECHEC (défaut: 5)'
+        )
+        parser.add_argument(
+            '--intervalle',
+            type=float,
+            default=5,
+            help='Attente en secondes quand la file est vide (défaut: 5)'
+        )
+        parser.add_argument(
+            '--une-fois',
+            action='store_true',
+            help='Vider la file une fois puis s\'arrêter (cron) au lieu de tourner en continu'
+        )
+
+    def handle(self, *args, **options):
+        threads = options['threads']
+        taille_lot = options['lot']
+        max_tentatives = options['max_tentatives']
+        if threads < 1 or taille_lot < 1 or max_tentatives < 1:
+            raise CommandError('--threads, --lot et --max-tentatives doivent être supérieurs à 0')
+
+        self.stdout.write(
+            f'Traitement de la file d\'emails ({threads} thread(s), lots de {taille_lot})...'
+        )
+
+        total_envoyes = total_echecs = 0
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            try:
+                while True:
+                    resultats = list(executor.map(
+                        lambda _: traiter_lot(taille_lot, max_tentatives), range(threads)
+                    ))
+                    traites = sum(r[0] for r in resultats)
+                    envoyes = sum(r[1] for r in resultats)
+                    echecs = sum(r[2] for r in resultats)
+                    total_envoyes += envoyes
+                    total_echecs += echecs
+
+                    if traites:
+                        self.stdout.write(f'  {envoyes} envoyé(s), {echecs} échec(s)')
+                        continue
+                    if options['une_fois']:
+                        break
+                    time.sleep(options['intervalle'])
+            except KeyboardInterrupt:
+                self.stdout.write(self.style.WARNING('Arrêt demandé'))
+
+        if total_echecs:
+            self.stdout.write(self.style.WARNING(
+                f'{total_envoyes} email(s) envoyé(s), {total_echecs} échec(s) (voir EnvoiEmail.erreur)'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{total_envoyes} email(s) envoyé(s)'))
@@ -0,0 +1,98 @@
+"""
+Commande Django pour traiter la file des tâches de génération (rapports, relevés de compte)
+Usage: python manage.py traiter_taches_rapports [--concurrence 2] [--une-fois]
+
+Les endpoints POST /api/rapports/generer/ et GET /api/receipts/releve_compte/ mettent les
+demandes en file (TacheRapport EN_ATTENTE) et répondent 202. Cette commande les exécute :
+- plusieurs tâches en parallèle (--concurrence), chacune réservée par SELECT ... SKIP LOCKED ;
+  chaque emplacement reprend une tâche dès qu'il est libre (un relevé long ne bloque pas les autres)
+- avancement, résultat et erreurs enregistrés sur la tâche (GET /api/taches-rapports/<id>/)
+- une tâche EN_COURS abandonnée par un worker arrêté (aucune étape depuis TACHES_RAPPORTS_DELAI_REPRISE
+  secondes, défaut : 3600) est reprise ; le worker remplacé n'enregistre pas son résultat
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection as db_connection
+from rapports.models import StatutTache
+from rapports.taches import reclamer_tache, executer_tache
+
+
+def traiter_une_tache(attente=0):
+    """
+    Réserve et exécute une tâche dans le thread courant (après `attente` secondes).
+
+    Returns:
+        TacheRapport: Tâche traitée, ou None si la file est vide
+    """
+    time.sleep(attente)
+    try:
+        tache = reclamer_tache()
+        if tache is None:
+            return None
+        return executer_tache(tache)
+    finally:
+        # Chaque thread a sa propre connexion à la base : la fermer après chaque tâche
+        db_connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Traite la file des tâches de génération de rapports et de relevés de compte'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrence',
+            type=int,
+            default=2,
+            help='Nombre de tâches exécutées en parallèle (défaut: 2)'
+        )
+        parser.add_argument(
+            '--intervalle',
+            type=float,
+            default=2,
+            help='Attente en secondes quand la file est vide (défaut: 2)'
+        )
+        parser.add_argument(
+            '--une-fois',
+            action='store_true',
+            help='Vider la file une fois puis s\'arrêter (cron) au lieu de tourner en continu'
+        )
+
+    def handle(self, *args, **options):
+        concurrence = options['concurrence']
+        if concurrence < 1:
+            raise CommandError('--concurrence doit être supérieur à 0')
+
+        self.stdout.write(f'Traitement des tâches de génération ({concurrence} en parallèle)...')
+
+        terminees = echecs = 0
+        with ThreadPoolExecutor(max_workers=concurrence) as executor:
+            en_cours = {executor.submit(traiter_une_tache) for _ in range(concurrence)}
+            try:
+                while en_cours:
+                    faites, en_cours = wait(en_cours, return_when=FIRST_COMPLETED)
+                    for future in faites:
+                        tache = future.result()
+                        if tache is None:
+                            # File vide : cet emplacement s'arrête (--une-fois) ou réessaie plus tard
+                            if not options['une_fois']:
+                                en_cours.add(executor.submit(traiter_une_tache, options['intervalle']))
+                            continue
+                        if tache.statut == StatutTache.ECHEC:
+                            echecs += 1
+                            self.stdout.write(self.style.ERROR(f'  {tache} : {tache.erreur}'))
+                        else:
+                            terminees += 1
+                            self.stdout.write(f'  {tache}')
+                        en_cours.add(executor.submit(traiter_une_tache))
+            except KeyboardInterrupt:
+                self.stdout.write(self.style.WARNING('Arrêt demandé'))
+                for future in en_cours:
+                    future.cancel()
+
+        if echecs:
+            self.stdout.write(self.style.WARNING(
+                f'{terminees} tâche(s) traitée(s), {echecs} échec(s) (voir TacheRapport.erreur)'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{terminees} tâche(s) traitée(s)'))
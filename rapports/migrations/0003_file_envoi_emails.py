@@ -0,0 +1,37 @@
+# Generated by Django 4.2.25 on 2026-10-16 22:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rapports', '0002_alter_rapport_type_rapport'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='envoiemail',
+            name='operation_id',
+            field=models.IntegerField(blank=True, help_text="ID de l'opération du reçu", null=True),
+        ),
+        migrations.AddField(
+            model_name='envoiemail',
+            name='prochaine_tentative',
+            field=models.DateTimeField(blank=True, help_text='Date de la prochaine tentative (ou fin du verrou si EN_COURS)', null=True),
+        ),
+        migrations.AddField(
+            model_name='envoiemail',
+            name='tentatives',
+            field=models.PositiveIntegerField(default=0, help_text="Nombre de tentatives d'envoi"),
+        ),
+        migrations.AddField(
+            model_name='envoiemail',
+            name='type_operation',
+            field=models.CharField(blank=True, help_text="Type d'opération du reçu (depot_epargne, retrait, credit, ...)", max_length=30, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='envoiemail',
+            index=models.Index(fields=['statut', 'prochaine_tentative'], name='rapports_envoi_file_idx'),
+        ),
+    ]
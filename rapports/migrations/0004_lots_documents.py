@@ -0,0 +1,37 @@
+# Generated by Django 4.2.25 on 2026-10-16 22:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rapports', '0003_file_envoi_emails'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LotDocuments',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type_lot', models.CharField(choices=[('RELEVES', 'Relevés de compte'), ('RECUS', "Reçus d'opérations")], help_text='Type de documents', max_length=10)),
+                ('date_debut', models.DateField(blank=True, help_text='Début de la période (relevés) ou des opérations (reçus)', null=True)),
+                ('date_fin', models.DateField(blank=True, help_text='Fin de la période (relevés) ou des opérations (reçus)', null=True)),
+                ('statut', models.CharField(choices=[('EN_ATTENTE', 'En attente'), ('EN_COURS', 'En cours'), ('TERMINE', 'Terminé'), ('ECHEC', 'Échec')], default='EN_ATTENTE', help_text='Statut du lot', max_length=20)),
+                ('total', models.PositiveIntegerField(default=0, help_text='Nombre de documents du lot')),
+                ('traites', models.PositiveIntegerField(default=0, help_text='Nombre de documents traités')),
+                ('generes', models.PositiveIntegerField(default=0, help_text='Nombre de PDF générés (hors titulaires sans opération)')),
+                ('erreurs', models.PositiveIntegerField(default=0, help_text='Nombre de documents en erreur')),
+                ('erreur', models.TextField(blank=True, help_text="Message d'erreur si échec", null=True)),
+                ('fichier_zip', models.FileField(blank=True, help_text='Archive ZIP des documents générés', null=True, upload_to='lots/zip/')),
+                ('date_creation', models.DateTimeField(auto_now_add=True, help_text='Date de création')),
+                ('date_debut_traitement', models.DateTimeField(blank=True, help_text='Début du traitement', null=True)),
+                ('date_fin_traitement', models.DateTimeField(blank=True, help_text='Fin du traitement', null=True)),
+            ],
+            options={
+                'verbose_name': 'Lot de documents',
+                'verbose_name_plural': 'Lots de documents',
+                'ordering': ['-date_creation'],
+            },
+        ),
+    ]
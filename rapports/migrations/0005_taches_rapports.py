@@ -0,0 +1,42 @@
+# Generated by Django 4.2.25 on 2026-10-16 23:06
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('rapports', '0004_lots_documents'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TacheRapport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type_tache', models.CharField(choices=[('RAPPORT', 'Génération de rapport'), ('RELEVE', 'Relevé de compte')], help_text='Type de tâche', max_length=10)),
+                ('parametres', models.JSONField(default=dict, help_text='Paramètres de la demande')),
+                ('statut', models.CharField(choices=[('EN_ATTENTE', 'En attente'), ('EN_COURS', 'En cours'), ('TERMINE', 'Terminé'), ('ECHEC', 'Échec'), ('ANNULE', 'Annulé')], default='EN_ATTENTE', help_text='Statut de la tâche', max_length=20)),
+                ('progression', models.PositiveSmallIntegerField(default=0, help_text='Avancement (0-100 %)')),
+                ('etape', models.CharField(blank=True, default='', help_text='Étape en cours', max_length=100)),
+                ('annulation_demandee', models.BooleanField(default=False, help_text='Annulation demandée pendant le traitement')),
+                ('fichier', models.FileField(blank=True, help_text='Fichier PDF généré (relevé de compte)', null=True, upload_to='taches/releves/')),
+                ('resultat', models.JSONField(blank=True, help_text="Résultat (contenu d'un rapport non sauvegardé, envoi email)", null=True)),
+                ('erreur', models.TextField(blank=True, help_text="Message d'erreur si échec", null=True)),
+                ('date_creation', models.DateTimeField(auto_now_add=True, help_text='Date de création')),
+                ('date_debut_traitement', models.DateTimeField(blank=True, help_text='Début du traitement', null=True)),
+                ('date_fin_traitement', models.DateTimeField(blank=True, help_text='Fin du traitement', null=True)),
+                ('demandeur', models.ForeignKey(blank=True, help_text='Utilisateur ayant demandé la tâche', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='taches_rapports', to=settings.AUTH_USER_MODEL)),
+                ('rapport', models.ForeignKey(blank=True, help_text='Rapport généré (contenu, fichier_pdf)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='taches', to='rapports.rapport')),
+            ],
+            options={
+                'verbose_name': 'Tâche de génération',
+                'verbose_name_plural': 'Tâches de génération',
+                'ordering': ['-date_creation'],
+                'indexes': [models.Index(fields=['statut', 'date_creation'], name='rapports_tache_file_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.25 on 2026-10-16 23:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rapports', '0005_taches_rapports'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lotdocuments',
+            name='date_progression',
+            field=models.DateTimeField(blank=True, help_text='Dernière progression du traitement (morceau terminé)', null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.25 on 2026-10-16 23:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rapports', '0006_lot_date_progression'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tacherapport',
+            name='date_progression',
+            field=models.DateTimeField(blank=True, help_text='Dernière activité du worker (réservation, étape terminée)', null=True),
+        ),
+    ]
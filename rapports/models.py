@@ -1,8 +1,10 @@
 """
 Modèles pour la gestion des rapports et envois d'emails
 """
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
+from datetime import timedelta
 from decimal import Decimal
 
 class TypeRapport(models.TextChoices):
@@ -83,10 +85,162 @@ class EnvoiEmail(models.Model):
     date_creation = models.DateTimeField(auto_now_add=True, help_text="Date de création")
     erreur = models.TextField(null=True, blank=True, help_text="Message d'erreur si échec")
     
+    # File d'envoi (outbox) : les reçus d'opérations sont mis en file dans la transaction de l'opération,
+    # puis rendus et envoyés par le worker (python manage.py traiter_file_emails).
+    # Cycle de vie : EN_ATTENTE -> EN_COURS -> ENVOYE | (EN_ATTENTE si nouvelle tentative) | ECHEC
+    type_operation = models.CharField(max_length=30, null=True, blank=True, help_text="Type d'opération du reçu (depot_epargne, retrait, credit, ...)")
+    operation_id = models.IntegerField(null=True, blank=True, help_text="ID de l'opération du reçu")
+    tentatives = models.PositiveIntegerField(default=0, help_text="Nombre de tentatives d'envoi")
+    prochaine_tentative = models.DateTimeField(null=True, blank=True, help_text="Date de la prochaine tentative (ou fin du verrou si EN_COURS)")
+    
     class Meta:
         ordering = ['-date_creation']
         verbose_name = 'Envoi Email'
         verbose_name_plural = 'Envois Emails'
+        indexes = [
+            models.Index(fields=['statut', 'prochaine_tentative'], name='rapports_envoi_file_idx'),
+        ]
     
     def __str__(self):
         return f"Email à {self.email_destinataire} - {self.statut}"
+
+class TypeLot(models.TextChoices):
+    """Types de lots de documents PDF"""
+    RELEVES = 'RELEVES', 'Relevés de compte'
+    RECUS = 'RECUS', 'Reçus d\'opérations'
+
+class StatutLot(models.TextChoices):
+    """Statuts d'un lot de documents"""
+    EN_ATTENTE = 'EN_ATTENTE', 'En attente'
+    EN_COURS = 'EN_COURS', 'En cours'
+    TERMINE = 'TERMINE', 'Terminé'
+    ECHEC = 'ECHEC', 'Échec'
+
+class LotDocuments(models.Model):
+    """
+    Génération en lot de documents PDF (relevés de fin de mois, reçus d'une période) dans une archive ZIP.
+    Les PDF sont écrits un par un dans le stockage (lots/<id>/...) : un lot interrompu reprend
+    là où il s'est arrêté. Traitement : python manage.py generer_lot_documents
+    """
+    type_lot = models.CharField(max_length=10, choices=TypeLot.choices, help_text="Type de documents")
+    date_debut = models.DateField(null=True, blank=True, help_text="Début de la période (relevés) ou des opérations (reçus)")
+    date_fin = models.DateField(null=True, blank=True, help_text="Fin de la période (relevés) ou des opérations (reçus)")
+    statut = models.CharField(
+        max_length=20,
+        choices=StatutLot.choices,
+        default=StatutLot.EN_ATTENTE,
+        help_text="Statut du lot"
+    )
+    total = models.PositiveIntegerField(default=0, help_text="Nombre de documents du lot")
+    traites = models.PositiveIntegerField(default=0, help_text="Nombre de documents traités")
+    generes = models.PositiveIntegerField(default=0, help_text="Nombre de PDF générés (hors titulaires sans opération)")
+    erreurs = models.PositiveIntegerField(default=0, help_text="Nombre de documents en erreur")
+    erreur = models.TextField(null=True, blank=True, help_text="Message d'erreur si échec")
+    fichier_zip = models.FileField(
+        upload_to='lots/zip/',
+        null=True,
+        blank=True,
+        help_text="Archive ZIP des documents générés"
+    )
+    date_creation = models.DateTimeField(auto_now_add=True, help_text="Date de création")
+    date_debut_traitement = models.DateTimeField(null=True, blank=True, help_text="Début du traitement")
+    date_fin_traitement = models.DateTimeField(null=True, blank=True, help_text="Fin du traitement")
+    date_progression = models.DateTimeField(null=True, blank=True, help_text="Dernière progression du traitement (morceau terminé)")
+    
+    class Meta:
+        ordering = ['-date_creation']
+        verbose_name = 'Lot de documents'
+        verbose_name_plural = 'Lots de documents'
+    
+    def __str__(self):
+        return f"{self.get_type_lot_display()} #{self.id} - {self.statut}"
+    
+    @property
+    def progression(self):
+        """Pourcentage de documents traités"""
+        if not self.total:
+            return 100 if self.statut == StatutLot.TERMINE else 0
+        return round(self.traites * 100 / self.total, 1)
+    
+    @property
+    def interrompu(self):
+        """
+        Lot EN_COURS sans progression depuis LOTS_DOCUMENTS_DELAI_REPRISE secondes (défaut : 15 min) :
+        le processus qui le traitait a été arrêté
+        """
+        if self.statut != StatutLot.EN_COURS:
+            return False
+        derniere_activite = self.date_progression or self.date_debut_traitement or self.date_creation
+        delai = getattr(settings, 'LOTS_DOCUMENTS_DELAI_REPRISE', 900)
+        return derniere_activite < timezone.now() - timedelta(seconds=delai)
+
+class TypeTache(models.TextChoices):
+    """Types de tâches de génération en arrière-plan"""
+    RAPPORT = 'RAPPORT', 'Génération de rapport'
+    RELEVE = 'RELEVE', 'Relevé de compte'
+
+class StatutTache(models.TextChoices):
+    """Statuts d'une tâche de génération"""
+    EN_ATTENTE = 'EN_ATTENTE', 'En attente'
+    EN_COURS = 'EN_COURS', 'En cours'
+    TERMINE = 'TERMINE', 'Terminé'
+    ECHEC = 'ECHEC', 'Échec'
+    ANNULE = 'ANNULE', 'Annulé'
+
+class TacheRapport(models.Model):
+    """
+    File de tâches de génération (rapports, relevés de compte volumineux) traitées en
+    arrière-plan par : python manage.py traiter_taches_rapports
+    Cycle de vie : EN_ATTENTE -> EN_COURS -> TERMINE | ECHEC | ANNULE
+    Le résultat est le Rapport sauvegardé (contenu, fichier_pdf) ou le fichier PDF du relevé.
+    """
+    type_tache = models.CharField(max_length=10, choices=TypeTache.choices, help_text="Type de tâche")
+    parametres = models.JSONField(default=dict, help_text="Paramètres de la demande")
+    statut = models.CharField(
+        max_length=20,
+        choices=StatutTache.choices,
+        default=StatutTache.EN_ATTENTE,
+        help_text="Statut de la tâche"
+    )
+    progression = models.PositiveSmallIntegerField(default=0, help_text="Avancement (0-100 %)")
+    etape = models.CharField(max_length=100, blank=True, default='', help_text="Étape en cours")
+    annulation_demandee = models.BooleanField(default=False, help_text="Annulation demandée pendant le traitement")
+    demandeur = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name='taches_rapports',
+        null=True,
+        blank=True,
+        help_text="Utilisateur ayant demandé la tâche"
+    )
+    rapport = models.ForeignKey(
+        Rapport,
+        on_delete=models.SET_NULL,
+        related_name='taches',
+        null=True,
+        blank=True,
+        help_text="Rapport généré (contenu, fichier_pdf)"
+    )
+    fichier = models.FileField(
+        upload_to='taches/releves/',
+        null=True,
+        blank=True,
+        help_text="Fichier PDF généré (relevé de compte)"
+    )
+    resultat = models.JSONField(null=True, blank=True, help_text="Résultat (contenu d'un rapport non sauvegardé, envoi email)")
+    erreur = models.TextField(null=True, blank=True, help_text="Message d'erreur si échec")
+    date_creation = models.DateTimeField(auto_now_add=True, help_text="Date de création")
+    date_debut_traitement = models.DateTimeField(null=True, blank=True, help_text="Début du traitement")
+    date_fin_traitement = models.DateTimeField(null=True, blank=True, help_text="Fin du traitement")
+    date_progression = models.DateTimeField(null=True, blank=True, help_text="Dernière activité du worker (réservation, étape terminée)")
+    
+    class Meta:
+        ordering = ['-date_creation']
+        verbose_name = 'Tâche de génération'
+        verbose_name_plural = 'Tâches de génération'
+        indexes = [
+            models.Index(fields=['statut', 'date_creation'], name='rapports_tache_file_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_type_tache_display()} #{self.id} - {self.statut}"
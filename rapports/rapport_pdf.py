@@ -0,0 +1,222 @@
+"""
+Rendu PDF des rapports (mensuel, annuel, apports, intérêts, caisse, crédits)
+
+Le PDF est produit une seule fois, à la sauvegarde du rapport, à partir de Rapport.contenu
+puis enregistré dans Rapport.fichier_pdf : le téléchargement et l'envoi par email
+réutilisent le fichier stocké sans relire ni reformater le contenu JSON.
+"""
+from io import BytesIO
+from xml.sax.saxutils import escape
+from django.core.files.base import ContentFile
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.lib.enums import TA_CENTER
+from caisse.services import MOIS_MAPPING
+from .account_statement import (
+    BLUE_MEDIUM,
+    LIGNES_PAR_TABLEAU,
+    CanvasReleve,
+    get_cooperative_info,
+    format_currency,
+    generate_account_statement_header
+)
+
+
+# Sections des rapports complets (MENSUEL, ANNUEL) et section des rapports simples
+TITRES_SECTIONS = {
+    'apports': 'APPORTS DES MEMBRES',
+    'interets': 'RÉPARTITION DES INTÉRÊTS',
+    'caisse': 'SITUATION DE LA CAISSE',
+    'credits': 'CRÉDITS',
+    'operations': 'OPÉRATIONS',
+}
+SECTION_PAR_TYPE = {
+    'APPORTS': 'apports',
+    'INTERETS': 'interets',
+    'CAISSE': 'caisse',
+    'CREDITS': 'credits',
+    'OPERATIONS': 'operations',
+}
+
+# Colonnes affichées pour les listes connues du contenu : (clé, en-tête)
+COLONNES_LISTES = {
+    'apports_par_membre': [
+        ('membre_numero', 'N° COMPTE'), ('membre_nom', 'NOM'), ('montant_parts_sociales', 'PARTS SOC.'),
+        ('montant_epargnes_bloquees', 'ÉP. BLOQUÉES'), ('montant_comptes_vue', 'CPT. À VUE'), ('total_apports', 'TOTAL'),
+    ],
+    'repartitions': [
+        ('membre_numero', 'N° COMPTE'), ('membre_nom', 'NOM'), ('total_apports', 'APPORTS'),
+        ('proportion', 'PROPORTION'), ('interet_attribue', 'INTÉRÊT ATTRIBUÉ'),
+    ],
+    'credits_actifs': [
+        ('id', 'N° CRÉDIT'), ('membre_id', 'MEMBRE'), ('client_id', 'CLIENT'), ('montant', 'MONTANT'),
+        ('solde_restant', 'SOLDE RESTANT'), ('statut', 'STATUT'), ('date_octroi', 'DATE OCTROI'),
+    ],
+}
+
+# Champs sans intérêt dans le PDF
+CHAMPS_IGNORES = {'type', 'date_generation', 'periode_mois', 'periode_annee', 'rapport_id', 'envoi_id'}
+
+LARGEUR_CONTENU = 170*mm
+
+
+def _libelle(cle):
+    return cle.replace('_', ' ').upper()
+
+
+def _valeur(cle, valeur):
+    """Formate une valeur du contenu pour le PDF"""
+    if valeur is None:
+        return '-'
+    if isinstance(valeur, bool):
+        return 'Oui' if valeur else 'Non'
+    if isinstance(valeur, float):
+        if cle == 'proportion':
+            return f"{valeur * 100:.2f} %".replace('.', ',')
+        if 'pourcentage' in cle:
+            return f"{valeur:g} %"
+        return format_currency(valeur)
+    return str(valeur)
+
+
+def _tableau_valeurs(valeurs):
+    """Tableau libellé / valeur des totaux d'une section"""
+    table = Table(
+        [[_libelle(cle), _valeur(cle, valeur)] for cle, valeur in valeurs],
+        colWidths=[80*mm, 60*mm], hAlign='LEFT'
+    )
+    table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ('TEXTCOLOR', (0, 0), (0, -1), BLUE_MEDIUM),
+        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+        ('TOPPADDING', (0, 0), (-1, -1), 3),
+    ]))
+    return table
+
+
+def _tableaux_liste(cle, lignes, style_cellule):
+    """Tableaux d'une liste du contenu, découpés en morceaux de LIGNES_PAR_TABLEAU lignes"""
+    colonnes = COLONNES_LISTES.get(cle) or [(c, _libelle(c)) for c in lignes[0]]
+    largeur = LARGEUR_CONTENU / len(colonnes)
+    style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), BLUE_MEDIUM),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 7),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
+    ])
+    tableaux = []
+    for debut in range(0, len(lignes), LIGNES_PAR_TABLEAU):
+        donnees = [[Paragraph(f'<b>{titre}</b>', style_cellule) for _, titre in colonnes]]
+        for ligne in lignes[debut:debut + LIGNES_PAR_TABLEAU]:
+            donnees.append([Paragraph(escape(_valeur(c, ligne.get(c))), style_cellule) for c, _ in colonnes])
+        table = Table(donnees, colWidths=[largeur] * len(colonnes), repeatRows=1)
+        table.setStyle(style)
+        tableaux.append(table)
+    return tableaux
+
+
+def _flowables_section(donnees, styles):
+    """Totaux, listes et sous-sections (dictionnaires imbriqués) d'une section du rapport"""
+    story = []
+    valeurs = [
+        (cle, valeur) for cle, valeur in donnees.items()
+        if cle not in CHAMPS_IGNORES and not isinstance(valeur, (dict, list))
+    ]
+    if valeurs:
+        story += [_tableau_valeurs(valeurs), Spacer(1, 4*mm)]
+    for cle, valeur in donnees.items():
+        if isinstance(valeur, list) and valeur and isinstance(valeur[0], dict):
+            story.append(Paragraph(_libelle(cle), styles['sous_titre']))
+            story += _tableaux_liste(cle, valeur, styles['cellule'])
+            story.append(Spacer(1, 4*mm))
+        elif isinstance(valeur, dict):
+            story.append(Paragraph(TITRES_SECTIONS.get(cle, _libelle(cle)), styles['sous_titre']))
+            story += _flowables_section(valeur, styles)
+    return story
+
+
+def _titre_rapport(rapport):
+    titre = f"{rapport.get_type_rapport_display().upper()}"
+    if rapport.periode_mois:
+        return f"{titre} - {MOIS_MAPPING.get(rapport.periode_mois, rapport.periode_mois)} {rapport.periode_annee}"
+    return f"{titre} - {rapport.periode_annee}"
+
+
+def generer_pdf_rapport(rapport):
+    """
+    Rend le contenu d'un rapport en PDF
+
+    Args:
+        rapport (Rapport): Rapport sauvegardé
+
+    Returns:
+        BytesIO: Buffer contenant le PDF
+    """
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4,
+                            rightMargin=20*mm, leftMargin=20*mm,
+                            topMargin=60*mm, bottomMargin=30*mm)
+    echantillon = getSampleStyleSheet()
+    styles = {
+        'titre': ParagraphStyle('TitreRapport', parent=echantillon['Heading1'], fontSize=12,
+                                textColor=BLUE_MEDIUM, alignment=TA_CENTER, spaceAfter=10),
+        'section': ParagraphStyle('SectionRapport', parent=echantillon['Heading2'], fontSize=11,
+                                  textColor=BLUE_MEDIUM, spaceBefore=6, spaceAfter=6),
+        'sous_titre': ParagraphStyle('SousTitreRapport', parent=echantillon['Heading3'], fontSize=9,
+                                     spaceBefore=4, spaceAfter=4),
+        'cellule': ParagraphStyle('CelluleRapport', parent=echantillon['Normal'], fontSize=7, leading=8.5),
+        'info': ParagraphStyle('InfoRapport', parent=echantillon['Normal'], fontSize=9),
+    }
+    coop_info = get_cooperative_info()
+
+    story = [Paragraph(_titre_rapport(rapport), styles['titre'])]
+    donnees = (rapport.contenu or {}).get('donnees') or {}
+    section_unique = SECTION_PAR_TYPE.get(rapport.type_rapport)
+    sections = {section_unique: donnees} if section_unique else donnees
+    for nom, contenu_section in sections.items():
+        if not isinstance(contenu_section, dict):
+            continue
+        story.append(Paragraph(TITRES_SECTIONS.get(nom, _libelle(nom)), styles['section']))
+        story += _flowables_section(contenu_section, styles)
+
+    date_generation = rapport.date_generation.strftime('%d-%m-%Y %H:%M:%S') if rapport.date_generation else ''
+    story += [Spacer(1, 5*mm), Paragraph(f"<i>Généré le {date_generation}</i>", styles['info'])]
+
+    def en_tete(canvas_obj, doc):
+        generate_account_statement_header(canvas_obj, doc, coop_info)
+
+    # Une seule passe : "Page X sur Y" est ajouté par CanvasReleve
+    doc.build(story, onFirstPage=en_tete, onLaterPages=en_tete, canvasmaker=CanvasReleve)
+    buffer.seek(0)
+    return buffer
+
+
+def nom_fichier_rapport(rapport):
+    """Nom du fichier PDF d'un rapport"""
+    periode = f"{rapport.periode_annee}_{rapport.periode_mois:02d}" if rapport.periode_mois else f"{rapport.periode_annee}"
+    return f"rapport_{rapport.type_rapport.lower()}_{periode}_{rapport.id}.pdf"
+
+
+def enregistrer_pdf_rapport(rapport):
+    """
+    Génère le PDF du rapport et l'enregistre dans Rapport.fichier_pdf (remplace le précédent)
+
+    Returns:
+        Rapport: Rapport avec fichier_pdf renseigné
+    """
+    pdf_buffer = generer_pdf_rapport(rapport)
+    if rapport.fichier_pdf:
+        rapport.fichier_pdf.delete(save=False)
+    rapport.fichier_pdf.save(nom_fichier_rapport(rapport), ContentFile(pdf_buffer.getvalue()), save=False)
+    rapport.save(update_fields=['fichier_pdf'])
+    return rapport
@@ -0,0 +1,216 @@
+"""
+Stockage des reçus PDF générés
+
+Un reçu est généré une seule fois (au premier envoi par email ou au premier téléchargement)
+puis conservé dans le stockage des médias. Le chemin du fichier dépend de :
+- type d'opération et ID de l'opération
+- version du modèle de reçu (RECEIPT_TEMPLATE_VERSION, à incrémenter quand la mise en page change)
+- version de la coopérative (empreinte des informations affichées dans l'en-tête)
+- version du contenu (empreinte des données du reçu : montants, soldes, libellés, ...)
+
+Les reçus affichent des soldes courants (solde de l'épargne après un retrait, solde restant d'un
+crédit) que les opérations suivantes modifient : l'empreinte du contenu donne alors un nouveau
+chemin, un reçu stocké ne peut pas être servi avec un contenu périmé.
+
+Le PDF est rendu en mémoire puis écrit de façon atomique (enregistrer_fichier) : un reçu présent
+dans le stockage est toujours complet.
+
+Les reçus stockés d'une opération sont supprimés après la validation de la transaction qui
+modifie ou supprime l'opération (voir rapports/signals.py). Un reçu écrit entre-temps par une
+lecture concurrente porte l'empreinte de l'ancien contenu : il n'est plus servi et disparaît à la
+génération suivante.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from collections import namedtuple
+from io import BytesIO
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from users.models import Cooperative
+from .receipts import (
+    infos_cooperative,
+    rendre_recu,
+    donnees_receipt_depot_epargne,
+    donnees_receipt_versement_part_sociale,
+    donnees_receipt_retrait,
+    donnees_receipt_credit,
+    donnees_receipt_remboursement,
+    donnees_receipt_frais_adhesion
+)
+
+
+# Version du modèle de reçu : l'incrémenter invalide tous les reçus stockés
+RECEIPT_TEMPLATE_VERSION = 2
+
+RECEIPTS_DIR = 'receipts'
+
+# Suffixe des fichiers en cours d'écriture (jamais servis, ignorés par supprimer_recus)
+SUFFIXE_TEMPORAIRE = '.tmp'
+
+# Type d'opération -> contenu du reçu (paramètres de rendre_recu, mêmes clés que la file d'envoi
+# des emails). 'operation' : reçu des mouvements de caisse pas encore réimplémenté (Caissetypemvt)
+DONNEES_RECUS = {
+    'depot_epargne': donnees_receipt_depot_epargne,
+    'versement_part_sociale': donnees_receipt_versement_part_sociale,
+    'retrait': donnees_receipt_retrait,
+    'credit': donnees_receipt_credit,
+    'remboursement': donnees_receipt_remboursement,
+    'frais_adhesion': donnees_receipt_frais_adhesion,
+    'operation': None,
+}
+
+RecuStocke = namedtuple('RecuStocke', ['chemin', 'etag', 'last_modified'])
+
+
+# Champs de la coopérative affichés sur les reçus
+CHAMPS_VERSION_COOPERATIVE = (
+    'nom', 'sigle', 'adresse', 'ville', 'province', 'pays', 'telephone', 'email',
+    'site_web', 'numero_rccm', 'numero_id_nat', 'agrement', 'logo'
+)
+
+
+def version_cooperative(coop=None):
+    """
+    Empreinte des informations de la coopérative affichées sur les reçus
+    (change dès que le nom, l'adresse, le logo, ... sont modifiés)
+
+    Args:
+        coop (Cooperative): Coopérative déjà chargée (par défaut : lue en base)
+    """
+    if coop is None:
+        coop = Cooperative.objects.first()
+    valeurs = None
+    if coop is not None:
+        valeurs = {champ: getattr(coop, champ) for champ in CHAMPS_VERSION_COOPERATIVE}
+        valeurs['logo'] = coop.logo.name
+    return hashlib.md5(repr(valeurs).encode('utf-8')).hexdigest()[:12]
+
+
+def _dossier_recus(type_operation, operation_id):
+    return f'{RECEIPTS_DIR}/{type_operation}/{operation_id}'
+
+
+def version_contenu(donnees):
+    """Empreinte du contenu d'un reçu (paramètres de rendre_recu, sans rendu PDF)"""
+    contenu = json.dumps(donnees, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.md5(contenu.encode('utf-8')).hexdigest()[:12]
+
+
+def chemin_recu(type_operation, operation_id, coop_version, donnees):
+    """Chemin du reçu dans le stockage pour la version du modèle, de la coopérative et du contenu"""
+    return (
+        f'{_dossier_recus(type_operation, operation_id)}/'
+        f'v{RECEIPT_TEMPLATE_VERSION}-{coop_version}-{version_contenu(donnees)}.pdf'
+    )
+
+
+def enregistrer_fichier(chemin, contenu):
+    """
+    Écrit `contenu` (bytes) à `chemin` dans le stockage sans jamais exposer un fichier partiel
+
+    Stockage local : le fichier est écrit sous un nom temporaire du même dossier puis renommé
+    (os.replace, atomique sur un même système de fichiers). Un lecteur voit l'ancien fichier ou
+    le nouveau, jamais un fichier tronqué ; un plantage ne laisse qu'un fichier temporaire.
+    Stockage distant (sans chemin local) : l'envoi d'un objet est déjà atomique.
+
+    Les appelants n'écrivent un chemin que s'il est absent : si un autre processus l'a écrit
+    entre-temps, les deux fichiers ont le même contenu et l'un ou l'autre est conservé.
+    """
+    try:
+        destination = default_storage.path(chemin)
+    except NotImplementedError:
+        nom = default_storage.save(chemin, ContentFile(contenu))
+        if nom != chemin:
+            # Écrit en parallèle par un autre processus : garder le premier fichier
+            default_storage.delete(nom)
+        return
+
+    dossier = os.path.dirname(destination)
+    os.makedirs(dossier, exist_ok=True)
+    descripteur, temporaire = tempfile.mkstemp(dir=dossier, prefix='.', suffix=SUFFIXE_TEMPORAIRE)
+    try:
+        with os.fdopen(descripteur, 'wb') as fichier:
+            fichier.write(contenu)
+            fichier.flush()
+            os.fsync(fichier.fileno())
+        if settings.FILE_UPLOAD_PERMISSIONS is not None:
+            os.chmod(temporaire, settings.FILE_UPLOAD_PERMISSIONS)
+        os.replace(temporaire, destination)
+    except BaseException:
+        try:
+            os.unlink(temporaire)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def supprimer_recus(type_operation, operation_id, sauf=None):
+    """Supprime les reçus stockés d'une opération (toutes versions, sauf le chemin `sauf`)"""
+    dossier = _dossier_recus(type_operation, operation_id)
+    try:
+        _, fichiers = default_storage.listdir(dossier)
+    except (FileNotFoundError, NotImplementedError):
+        return
+    for fichier in fichiers:
+        chemin = f'{dossier}/{fichier}'
+        # Les fichiers temporaires appartiennent à une écriture en cours (enregistrer_fichier)
+        if chemin != sauf and not fichier.endswith(SUFFIXE_TEMPORAIRE):
+            default_storage.delete(chemin)
+
+
+def obtenir_recu(type_operation, operation_id):
+    """
+    Retourne le reçu stocké d'une opération, en le générant et en l'enregistrant s'il n'existe pas encore
+
+    Args:
+        type_operation (str): Clé de DONNEES_RECUS
+        operation_id (int): ID de l'opération
+
+    Returns:
+        RecuStocke: (chemin, etag, last_modified), ou None si l'opération n'existe pas
+    """
+    if type_operation not in DONNEES_RECUS:
+        raise ValueError(f"Type d'opération inconnu: {type_operation}")
+
+    # Contenu du reçu lu à chaque demande (quelques requêtes, sans rendu PDF) : son empreinte
+    # fait partie du chemin, un reçu dont les données ont changé n'est jamais resservi
+    donnees_recu = DONNEES_RECUS[type_operation]
+    donnees = donnees_recu(operation_id) if donnees_recu else None
+    if not donnees:
+        return None
+
+    # Une seule lecture de la coopérative : l'empreinte du chemin et l'en-tête du PDF
+    # viennent des mêmes données (pas du cache du processus, qui peut être en retard)
+    coop = Cooperative.objects.first()
+    chemin = chemin_recu(type_operation, operation_id, version_cooperative(coop), donnees)
+    if not default_storage.exists(chemin):
+        pdf_buffer = rendre_recu(**donnees, coop_info=infos_cooperative(coop) or {})
+        # Les anciennes versions (modèle, coopérative ou contenu modifiés) ne servent plus
+        supprimer_recus(type_operation, operation_id, sauf=chemin)
+        # Écriture atomique : une requête concurrente ne lit jamais un PDF à moitié écrit
+        enregistrer_fichier(chemin, pdf_buffer.getvalue())
+
+    try:
+        last_modified = default_storage.get_modified_time(chemin)
+    except NotImplementedError:
+        last_modified = None
+    # Le chemin change avec le contenu ; l'ETag tient aussi compte de la date d'écriture
+    etag = '"%s"' % hashlib.md5(f'{chemin}:{last_modified}'.encode('utf-8')).hexdigest()
+    return RecuStocke(chemin, etag, last_modified)
+
+
+def lire_recu(type_operation, operation_id):
+    """
+    Contenu du reçu stocké d'une opération (généré au besoin)
+
+    Returns:
+        BytesIO: Buffer du PDF, ou None si l'opération n'existe pas
+    """
+    recu = obtenir_recu(type_operation, operation_id)
+    if recu is None:
+        return None
+    with default_storage.open(recu.chemin, 'rb') as fichier:
+        return BytesIO(fichier.read())
@@ -2,7 +2,7 @@
 Serializers pour l'API des rapports
 """
 from rest_framework import serializers
-from .models import Rapport, EnvoiEmail, TypeRapport, StatutEnvoi
+from .models import Rapport, EnvoiEmail, TypeRapport, StatutEnvoi, LotDocuments, TacheRapport
 
 class RapportSerializer(serializers.ModelSerializer):
     """Serializer pour les rapports"""
@@ -16,7 +16,7 @@ class RapportSerializer(serializers.ModelSerializer):
             'date_generation', 'contenu', 'fichier_pdf',
             'envoye', 'date_envoi'
         ]
-        read_only_fields = ['date_generation', 'envoye', 'date_envoi']
+        read_only_fields = ['date_generation', 'fichier_pdf', 'envoye', 'date_envoi']
 
 class EnvoiEmailSerializer(serializers.ModelSerializer):
     """Serializer pour les envois d'emails"""
@@ -38,9 +38,13 @@ class EnvoiEmailSerializer(serializers.ModelSerializer):
             'destinataire_type', 'destinataire_type_display',
             'destinataire_id', 'email_destinataire',
             'sujet', 'message', 'statut', 'statut_display',
-            'date_envoi', 'date_creation', 'erreur'
+            'date_envoi', 'date_creation', 'erreur',
+            'type_operation', 'operation_id', 'tentatives', 'prochaine_tentative'
+        ]
+        read_only_fields = [
+            'date_creation', 'date_envoi', 'statut',
+            'type_operation', 'operation_id', 'tentatives', 'prochaine_tentative'
         ]
-        read_only_fields = ['date_creation', 'date_envoi', 'statut']
 
 class GenererRapportSerializer(serializers.Serializer):
     """Serializer pour générer un rapport"""
@@ -67,3 +71,43 @@ class EnvoyerRapportSerializer(serializers.Serializer):
     )
     destinataire_id = serializers.IntegerField(required=False, allow_null=True)
 
+class LotDocumentsSerializer(serializers.ModelSerializer):
+    """Serializer pour les lots de documents PDF (relevés, reçus)"""
+    type_lot_display = serializers.CharField(source='get_type_lot_display', read_only=True)
+    statut_display = serializers.CharField(source='get_statut_display', read_only=True)
+    progression = serializers.FloatField(read_only=True)
+    
+    class Meta:
+        model = LotDocuments
+        fields = [
+            'id', 'type_lot', 'type_lot_display', 'date_debut', 'date_fin',
+            'statut', 'statut_display', 'total', 'traites', 'generes', 'erreurs', 'progression',
+            'erreur', 'fichier_zip', 'date_creation', 'date_debut_traitement', 'date_fin_traitement',
+            'date_progression'
+        ]
+        read_only_fields = [
+            'statut', 'total', 'traites', 'generes', 'erreurs', 'erreur', 'fichier_zip',
+            'date_creation', 'date_debut_traitement', 'date_fin_traitement', 'date_progression'
+        ]
+    
+    def validate(self, attrs):
+        date_debut = attrs.get('date_debut')
+        date_fin = attrs.get('date_fin')
+        if date_debut and date_fin and date_debut > date_fin:
+            raise serializers.ValidationError({'date_fin': 'La date de fin doit être postérieure à la date de début.'})
+        return attrs
+
+class TacheRapportSerializer(serializers.ModelSerializer):
+    """Serializer pour les tâches de génération en arrière-plan (lecture seule)"""
+    type_tache_display = serializers.CharField(source='get_type_tache_display', read_only=True)
+    statut_display = serializers.CharField(source='get_statut_display', read_only=True)
+    
+    class Meta:
+        model = TacheRapport
+        fields = [
+            'id', 'type_tache', 'type_tache_display', 'parametres',
+            'statut', 'statut_display', 'progression', 'etape', 'annulation_demandee',
+            'rapport', 'fichier', 'resultat', 'erreur',
+            'date_creation', 'date_debut_traitement', 'date_fin_traitement', 'date_progression'
+        ]
+        read_only_fields = fields
@@ -1,23 +1,103 @@
 """
 Services pour la génération de rapports et l'envoi d'emails
 """
+import logging
+import time
+from contextlib import contextmanager
 from decimal import Decimal
 from datetime import date, datetime
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage
 from django.template.loader import render_to_string
 from django.conf import settings
 from django.utils import timezone
 from users.email_config import get_smtp_backend, get_default_from_email
 from users.models import Cooperative
+from django.db import connection
 from caisse.services import (
     calculer_apports_tous_membres,
     calculer_interets_tous_credits,
     calculer_frais_gestion,
     repartir_interets_aux_membres
 )
+from caisse.memoisation import memoisation_calculs, memoiser
 from credits.models import Credit
 # Utiliser Caissetypemvt pour tous les mouvements
 from rapports.models import Rapport, EnvoiEmail, TypeRapport, StatutEnvoi
+from rapports.rapport_pdf import enregistrer_pdf_rapport, nom_fichier_rapport
+
+logger = logging.getLogger(__name__)
+
+
+# =====================================================
+# CONTEXTE DE CONSTRUCTION DES RAPPORTS
+# =====================================================
+
+class ContexteRapport:
+    """
+    Contexte de construction d'un rapport : sections mesurées sur une mémoïsation commune
+
+    Un rapport mensuel ou annuel réunit plusieurs sections (apports, intérêts, caisse, crédits)
+    qui s'appuient sur les mêmes calculs (apports des membres, intérêts des crédits, crédits
+    actifs). Ces calculs sont mémoïsés (caisse.memoisation) : construit dans `construction()`,
+    chaque jeu de données est calculé une seule fois pour une période donnée, puis réutilisé
+    par toutes les sections.
+
+    Le contexte mesure le coût de chaque section (durée et nombre de requêtes SQL), consultable
+    dans `mesures` ; les calculs effectués / réutilisés sont ceux de la mémoïsation (`calculs`).
+    """
+
+    def __init__(self):
+        # Section -> {'duree_ms', 'requetes'}
+        self.mesures = {}
+        self.memoisation = None
+
+    @contextmanager
+    def construction(self):
+        """Active (ou rejoint) la mémoïsation des calculs pour la construction du rapport"""
+        with memoisation_calculs() as memo:
+            self.memoisation = memo
+            yield self
+
+    @property
+    def calculs(self):
+        """Statistiques de la mémoïsation (succès, échecs, par fonction)"""
+        return self.memoisation.statistiques() if self.memoisation else {}
+
+    @contextmanager
+    def section(self, nom):
+        """Mesure la durée et le nombre de requêtes SQL d'une section du rapport"""
+        requetes = [0]
+
+        def compter(execute, sql, params, many, context):
+            requetes[0] += 1
+            return execute(sql, params, many, context)
+
+        debut = time.perf_counter()
+        try:
+            with connection.execute_wrapper(compter):
+                yield
+        finally:
+            self.mesures[nom] = {
+                'duree_ms': round((time.perf_counter() - debut) * 1000, 1),
+                'requetes': requetes[0],
+            }
+
+    def journaliser(self, type_rapport):
+        """Écrit le coût de chaque section et les calculs réutilisés dans les logs"""
+        details = ', '.join(
+            f"{nom}: {mesure['duree_ms']} ms / {mesure['requetes']} requêtes"
+            for nom, mesure in self.mesures.items()
+        )
+        if self.memoisation:
+            details += f" - calculs : {self.memoisation.succes} réutilisé(s), {self.memoisation.echecs} effectué(s)"
+        logger.info('Rapport %s - %s', type_rapport, details)
+
+
+@memoiser
+def credits_actifs():
+    """Crédits en cours ou échus (sections caisse et crédits d'un rapport)"""
+    return list(Credit.objects.filter(statut__in=['EN_COURS', 'ECHEANCE_DEPASSEE']))
+
 
 def generer_rapport_apports(periode_mois=None, periode_annee=None):
     """
@@ -52,11 +132,8 @@ def generer_rapport_interets(pourcentage_frais_gestion=20, periode_mois=None, pe
     Returns:
         dict: Données du rapport
     """
-    repartition = repartir_interets_aux_membres(
-        pourcentage_frais_gestion,
-        periode_mois,
-        periode_annee
-    )
+    # Intérêts et apports repris de la mémoïsation active (calculés une fois par rapport)
+    repartition = repartir_interets_aux_membres(pourcentage_frais_gestion, periode_mois, periode_annee)
     
     return {
         'type': 'INTERETS',
@@ -85,8 +162,8 @@ def generer_rapport_caisse():
     apports = calculer_apports_tous_membres()
     
     # Calculer les crédits actifs
-    credits_actifs = Credit.objects.filter(statut__in=['EN_COURS', 'ECHEANCE_DEPASSEE'])
-    total_credits_actifs = sum([c.solde_restant for c in credits_actifs])
+    actifs = credits_actifs()
+    total_credits_actifs = sum([c.solde_restant for c in actifs])
     
     return {
         'type': 'CAISSE',
@@ -108,18 +185,17 @@ def generer_rapport_credits():
     Returns:
         dict: Données du rapport
     """
-    credits = Credit.objects.all()
-    credits_actifs = credits.filter(statut__in=['EN_COURS', 'ECHEANCE_DEPASSEE'])
-    credits_termines = credits.filter(statut='TERMINE')
+    actifs = credits_actifs()
+    credits_termines = Credit.objects.filter(statut='TERMINE')
     
-    total_credits_actifs = sum([c.solde_restant for c in credits_actifs])
+    total_credits_actifs = sum([c.solde_restant for c in actifs])
     total_credits_termines = sum([c.montant for c in credits_termines])
     
     return {
         'type': 'CREDITS',
         'date_generation': datetime.now().isoformat(),
         'donnees': {
-            'nombre_credits_actifs': credits_actifs.count(),
+            'nombre_credits_actifs': len(actifs),
             'nombre_credits_termines': credits_termines.count(),
             'total_credits_actifs': float(total_credits_actifs),
             'total_credits_termines': float(total_credits_termines),
@@ -133,7 +209,7 @@ def generer_rapport_credits():
                     'statut': c.statut,
                     'date_octroi': c.date_octroi.isoformat() if c.date_octroi else None
                 }
-                for c in credits_actifs
+                for c in actifs
             ]
         }
     }
@@ -173,52 +249,103 @@ def generer_rapport_operations(periode_mois=None, periode_annee=None, type_opera
         }
     }
 
-def generer_rapport_mensuel(periode_mois, periode_annee):
+def _generer_sections(contexte, periode_mois, periode_annee):
+    """Génère les sections d'un rapport complet en partageant les calculs mémoïsés du contexte"""
+    sections = {
+        'apports': lambda: generer_rapport_apports(periode_mois, periode_annee),
+        'interets': lambda: generer_rapport_interets(periode_mois=periode_mois, periode_annee=periode_annee),
+        'caisse': generer_rapport_caisse,
+        'credits': generer_rapport_credits,
+    }
+    donnees = {}
+    with contexte.construction():
+        for nom, generer in sections.items():
+            with contexte.section(nom):
+                donnees[nom] = generer()['donnees']
+    return donnees
+
+def generer_rapport_mensuel(periode_mois, periode_annee, contexte=None):
     """
     Génère un rapport mensuel complet
     
     Args:
         periode_mois (int): Mois (1-12)
         periode_annee (int): Année
+        contexte (ContexteRapport, optional): Contexte de construction (mesures consultables après l'appel)
     
     Returns:
         dict: Données du rapport mensuel
     """
+    contexte = contexte or ContexteRapport()
+    donnees = _generer_sections(contexte, periode_mois, periode_annee)
+    contexte.journaliser('MENSUEL')
     return {
         'type': 'MENSUEL',
         'periode_mois': periode_mois,
         'periode_annee': periode_annee,
         'date_generation': datetime.now().isoformat(),
-        'donnees': {
-            'apports': generer_rapport_apports(periode_mois, periode_annee)['donnees'],
-            'interets': generer_rapport_interets(periode_mois=periode_mois, periode_annee=periode_annee)['donnees'],
-            'caisse': generer_rapport_caisse()['donnees'],
-            'credits': generer_rapport_credits()['donnees']
-        }
+        'donnees': donnees
     }
 
-def generer_rapport_annuel(periode_annee):
+def generer_rapport_annuel(periode_annee, contexte=None):
     """
     Génère un rapport annuel complet
     
     Args:
         periode_annee (int): Année
+        contexte (ContexteRapport, optional): Contexte de construction (mesures consultables après l'appel)
     
     Returns:
         dict: Données du rapport annuel
     """
+    contexte = contexte or ContexteRapport()
+    donnees = _generer_sections(contexte, None, periode_annee)
+    contexte.journaliser('ANNUEL')
     return {
         'type': 'ANNUEL',
         'periode_annee': periode_annee,
         'date_generation': datetime.now().isoformat(),
-        'donnees': {
-            'apports': generer_rapport_apports(periode_annee=periode_annee)['donnees'],
-            'interets': generer_rapport_interets(periode_annee=periode_annee)['donnees'],
-            'caisse': generer_rapport_caisse()['donnees'],
-            'credits': generer_rapport_credits()['donnees']
-        }
+        'donnees': donnees
     }
 
+def generer_contenu_rapport(type_rapport, periode_mois=None, periode_annee=None,
+                            pourcentage_frais_gestion=20.0, type_operation=None):
+    """
+    Génère le contenu d'un rapport selon son type
+    
+    Args:
+        type_rapport (str): Type de rapport (TypeRapport)
+        periode_mois (int, optional): Mois (requis pour un rapport mensuel)
+        periode_annee (int, optional): Année
+        pourcentage_frais_gestion (float): Pourcentage des frais de gestion (rapport des intérêts)
+        type_operation (str, optional): Type d'opération (rapport des opérations)
+    
+    Returns:
+        dict: Contenu du rapport
+    
+    Raises:
+        ValueError: Type de rapport non supporté ou période incomplète
+    """
+    # Les calculs de la caisse (intérêts, frais, apports) sont partagés par toutes les sections
+    with memoisation_calculs():
+        if type_rapport == 'APPORTS':
+            return generer_rapport_apports(periode_mois, periode_annee)
+        if type_rapport == 'INTERETS':
+            return generer_rapport_interets(pourcentage_frais_gestion, periode_mois, periode_annee)
+        if type_rapport == 'CAISSE':
+            return generer_rapport_caisse()
+        if type_rapport == 'CREDITS':
+            return generer_rapport_credits()
+        if type_rapport == 'OPERATIONS':
+            return generer_rapport_operations(periode_mois, periode_annee, type_operation)
+        if type_rapport == 'MENSUEL':
+            if not periode_mois:
+                raise ValueError('periode_mois est requis pour un rapport mensuel')
+            return generer_rapport_mensuel(periode_mois, periode_annee)
+        if type_rapport == 'ANNUEL':
+            return generer_rapport_annuel(periode_annee)
+        raise ValueError(f'Type de rapport non supporté: {type_rapport}')
+
 def sauvegarder_rapport(type_rapport, contenu, periode_mois=None, periode_annee=None):
     """
     Sauvegarde un rapport dans la base de données
@@ -230,7 +357,7 @@ def sauvegarder_rapport(type_rapport, contenu, periode_mois=None, periode_annee=
         periode_annee (int, optional): Année
     
     Returns:
-        Rapport: Instance du rapport sauvegardé
+        Rapport: Instance du rapport sauvegardé (avec son PDF dans fichier_pdf)
     """
     rapport = Rapport.objects.create(
         type_rapport=type_rapport,
@@ -238,17 +365,34 @@ def sauvegarder_rapport(type_rapport, contenu, periode_mois=None, periode_annee=
         periode_annee=periode_annee or date.today().year,
         contenu=contenu
     )
-    return rapport
+    # Le PDF est rendu une seule fois ici, puis réutilisé (téléchargement, emails)
+    return enregistrer_pdf_rapport(rapport)
 
-def envoyer_email_rapport(rapport, destinataire_email, destinataire_type='ADMIN', destinataire_id=None):
+def lire_pdf_rapport(rapport):
     """
-    Envoie un rapport par email
+    Contenu du PDF stocké d'un rapport (rendu et enregistré s'il n'existe pas encore,
+    par exemple pour les rapports sauvegardés avant le rendu PDF)
+    
+    Returns:
+        bytes: Contenu du PDF
+    """
+    if not rapport.fichier_pdf or not rapport.fichier_pdf.storage.exists(rapport.fichier_pdf.name):
+        enregistrer_pdf_rapport(rapport)
+    with rapport.fichier_pdf.open('rb') as fichier:
+        return fichier.read()
+
+def envoyer_email_rapport(rapport, destinataire_email, destinataire_type='ADMIN', destinataire_id=None,
+                          connection=None, pdf=None):
+    """
+    Envoie un rapport par email, avec son PDF stocké en pièce jointe
     
     Args:
         rapport (Rapport): Rapport à envoyer
         destinataire_email (str): Email du destinataire
         destinataire_type (str): Type de destinataire (MEMBRE, CLIENT, ADMIN)
         destinataire_id (int, optional): ID du destinataire
+        connection: Connexion SMTP déjà ouverte à réutiliser (optionnel)
+        pdf (bytes, optional): Contenu du PDF déjà lu (envoi à de nombreux destinataires)
     
     Returns:
         EnvoiEmail: Instance de l'envoi créé
@@ -280,19 +424,24 @@ COOPEC
     )
     
     try:
-        # Utiliser la configuration SMTP dynamique
-        backend = get_smtp_backend()
+        # Utiliser la connexion fournie, sinon la configuration SMTP dynamique
+        backend = connection or get_smtp_backend()
         from_email = coop.email if coop and hasattr(coop, 'email') and coop.email else get_default_from_email()
         
-        # Envoyer l'email avec le backend configuré
-        send_mail(
+        # Joindre le PDF stocké du rapport (jamais régénéré à l'envoi)
+        email = EmailMessage(
             subject=sujet,
-            message=message,
+            body=message,
             from_email=from_email,
-            recipient_list=[destinataire_email],
-            fail_silently=False,
+            to=[destinataire_email],
             connection=backend
         )
+        email.attach(
+            nom_fichier_rapport(rapport),
+            pdf if pdf is not None else lire_pdf_rapport(rapport),
+            'application/pdf'
+        )
+        email.send()
         
         # Marquer comme envoyé
         envoi.statut = StatutEnvoi.ENVOYE
@@ -312,7 +461,7 @@ COOPEC
     
     return envoi
 
-def envoyer_rapport_membre(membre, type_rapport='MENSUEL', periode_mois=None, periode_annee=None):
+def envoyer_rapport_membre(membre, type_rapport='MENSUEL', periode_mois=None, periode_annee=None, rapport=None):
     """
     Génère et envoie un rapport à un membre
     
@@ -321,6 +470,8 @@ def envoyer_rapport_membre(membre, type_rapport='MENSUEL', periode_mois=None, pe
         type_rapport (str): Type de rapport
         periode_mois (int, optional): Mois
         periode_annee (int, optional): Année
+        rapport (Rapport, optional): Rapport déjà généré à réutiliser (envoi à plusieurs membres :
+            le rapport et son PDF ne sont générés qu'une fois)
     
     Returns:
         tuple: (Rapport, EnvoiEmail)
@@ -328,21 +479,21 @@ def envoyer_rapport_membre(membre, type_rapport='MENSUEL', periode_mois=None, pe
     if not membre.email:
         raise ValueError(f"Le membre {membre.numero_compte} n'a pas d'email")
     
-    # Générer le rapport selon le type
-    if type_rapport == 'MENSUEL':
-        contenu = generer_rapport_mensuel(periode_mois, periode_annee)
-    elif type_rapport == 'ANNUEL':
-        contenu = generer_rapport_annuel(periode_annee)
-    elif type_rapport == 'APPORTS':
-        contenu = generer_rapport_apports(periode_mois, periode_annee)
-    else:
-        raise ValueError(f"Type de rapport non supporté: {type_rapport}")
-    
-    # Sauvegarder le rapport
-    rapport = sauvegarder_rapport(type_rapport, contenu, periode_mois, periode_annee)
+    if rapport is None:
+        # Générer le rapport selon le type
+        if type_rapport == 'MENSUEL':
+            contenu = generer_rapport_mensuel(periode_mois, periode_annee)
+        elif type_rapport == 'ANNUEL':
+            contenu = generer_rapport_annuel(periode_annee)
+        elif type_rapport == 'APPORTS':
+            contenu = generer_rapport_apports(periode_mois, periode_annee)
+        else:
+            raise ValueError(f"Type de rapport non supporté: {type_rapport}")
+        
+        # Sauvegarder le rapport
+        rapport = sauvegarder_rapport(type_rapport, contenu, periode_mois, periode_annee)
     
     # Envoyer l'email
     envoi = envoyer_email_rapport(rapport, membre.email, 'MEMBRE', membre.id)
     
     return rapport, envoi
-
@@ -0,0 +1,56 @@
+"""
+Signaux Django qui invalident les reçus PDF stockés (voir rapports/receipt_store.py)
+après la validation de la transaction qui modifie ou supprime l'opération correspondante,
+et le cache des informations de la coopérative utilisé par le rendu des reçus
+(voir rapports/receipts.py).
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from membres.models import DonnatEpargne, DonnatPartSocial, Retrait, FraisAdhesion
+from credits.models import Credit, Remboursement
+from users.models import Cooperative
+from .receipt_store import supprimer_recus
+from .receipts import vider_cache_cooperative
+
+
+# Modèle d'opération -> type d'opération du reçu
+TYPES_RECUS = {
+    DonnatEpargne: 'depot_epargne',
+    DonnatPartSocial: 'versement_part_sociale',
+    Retrait: 'retrait',
+    Credit: 'credit',
+    Remboursement: 'remboursement',
+    FraisAdhesion: 'frais_adhesion',
+}
+
+
+def invalider_recu_apres_modification(sender, instance, created=False, **kwargs):
+    """Supprime les reçus stockés d'une opération modifiée (ou supprimée), après la validation"""
+    if created:
+        return
+    type_operation, operation_id = TYPES_RECUS[sender], instance.pk
+
+    def supprimer():
+        try:
+            supprimer_recus(type_operation, operation_id)
+        except Exception as e:
+            # Ne pas bloquer l'opération si le stockage est indisponible
+            print(f"Erreur lors de la suppression du reçu {type_operation} {operation_id}: {str(e)}")
+
+    # Avant la validation, une lecture concurrente voit encore l'ancienne opération
+    # et réécrirait aussitôt le reçu supprimé
+    transaction.on_commit(supprimer)
+
+
+for modele in TYPES_RECUS:
+    post_save.connect(invalider_recu_apres_modification, sender=modele, dispatch_uid=f'invalider_recu_save_{modele.__name__}')
+    post_delete.connect(invalider_recu_apres_modification, sender=modele, dispatch_uid=f'invalider_recu_delete_{modele.__name__}')
+
+
+def vider_cache_apres_modification_cooperative(sender, **kwargs):
+    """Recharge les informations et le logo de la coopérative au prochain reçu"""
+    vider_cache_cooperative()
+
+
+post_save.connect(vider_cache_apres_modification_cooperative, sender=Cooperative, dispatch_uid='vider_cache_cooperative_save')
+post_delete.connect(vider_cache_apres_modification_cooperative, sender=Cooperative, dispatch_uid='vider_cache_cooperative_delete')
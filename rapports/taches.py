@@ -0,0 +1,264 @@
+"""
+File de tâches de génération en arrière-plan (rapports, relevés de compte)
+
+Les endpoints de génération créent une TacheRapport EN_ATTENTE et répondent 202 avec l'ID
+de la tâche. Le worker (python manage.py traiter_taches_rapports) réserve les tâches
+(SELECT ... SKIP LOCKED), les exécute et enregistre le résultat : les workers web restent
+disponibles pour les opérations de caisse.
+
+Reprise : le worker signale son activité à chaque étape (date_progression). Une tâche EN_COURS
+sans activité depuis TACHES_RAPPORTS_DELAI_REPRISE secondes (worker arrêté pendant son exécution)
+est de nouveau réservée par reclamer_tache. La date de réservation (date_debut_traitement) sert
+de jeton : un worker dont la tâche a été réservée par un autre s'arrête à l'étape suivante et
+n'enregistre pas son résultat.
+
+Annulation : une tâche EN_ATTENTE est annulée immédiatement ; une tâche EN_COURS est marquée
+(annulation_demandee) et s'arrête à la prochaine étape.
+"""
+from datetime import date, timedelta
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import TacheRapport, TypeTache, StatutTache
+from .services import generer_contenu_rapport, sauvegarder_rapport, envoyer_email_rapport
+from .account_statement import generate_account_statement
+
+
+class TacheAnnulee(Exception):
+    """Annulation demandée pendant l'exécution d'une tâche"""
+
+
+class TacheReprise(Exception):
+    """Tâche réservée de nouveau par un autre worker pendant son exécution"""
+
+
+# =====================================================
+# CRÉATION, RÉSERVATION ET ANNULATION
+# =====================================================
+
+def creer_tache(type_tache, parametres, demandeur=None):
+    """
+    Met une tâche de génération en file
+
+    Args:
+        type_tache (str): TypeTache.RAPPORT ou TypeTache.RELEVE
+        parametres (dict): Paramètres de la demande (sérialisables en JSON)
+        demandeur (User, optional): Utilisateur à l'origine de la demande
+
+    Returns:
+        TacheRapport: Tâche EN_ATTENTE
+    """
+    return TacheRapport.objects.create(
+        type_tache=type_tache,
+        parametres=parametres,
+        demandeur=demandeur if demandeur is not None and demandeur.is_authenticated else None
+    )
+
+
+def obtenir_ou_creer_tache(type_tache, parametres, demandeur=None):
+    """
+    Réutilise une tâche identique (même type, mêmes paramètres, même demandeur) en attente,
+    en cours ou terminée depuis moins de TACHES_RAPPORTS_DELAI_REUTILISATION secondes
+    (défaut : 5 min), sinon met une nouvelle tâche en file
+
+    Une demande répétée (rafraîchissement, nouvel essai du client) ne remplit pas la file de doublons.
+
+    Returns:
+        tuple: (TacheRapport, créée)
+    """
+    if demandeur is not None and not demandeur.is_authenticated:
+        demandeur = None
+    recente = timezone.now() - timedelta(seconds=getattr(settings, 'TACHES_RAPPORTS_DELAI_REUTILISATION', 300))
+    tache = (
+        TacheRapport.objects.filter(type_tache=type_tache, parametres=parametres, demandeur=demandeur)
+        .filter(
+            Q(statut__in=[StatutTache.EN_ATTENTE, StatutTache.EN_COURS], annulation_demandee=False)
+            | Q(statut=StatutTache.TERMINE, date_fin_traitement__gte=recente)
+        )
+        .order_by('-date_creation', '-id')
+        .first()
+    )
+    if tache is not None:
+        return tache, False
+    return creer_tache(type_tache, parametres, demandeur), True
+
+
+def reclamer_tache():
+    """
+    Réserve la plus ancienne tâche EN_ATTENTE (SELECT ... SKIP LOCKED), ou None
+
+    Une tâche EN_COURS sans activité (date_progression) depuis TACHES_RAPPORTS_DELAI_REPRISE
+    secondes (défaut : 1 h) a perdu son worker (arrêt, plantage) : elle est réservée de nouveau
+    et reprise depuis le début, sans l'erreur ni le résultat d'une exécution précédente.
+    """
+    abandon = timezone.now() - timedelta(seconds=getattr(settings, 'TACHES_RAPPORTS_DELAI_REPRISE', 3600))
+    with transaction.atomic():
+        tache = (
+            TacheRapport.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(statut=StatutTache.EN_ATTENTE)
+                | Q(statut=StatutTache.EN_COURS, date_progression__lt=abandon)
+                # Tâches réservées avant l'ajout de date_progression
+                | Q(statut=StatutTache.EN_COURS, date_progression__isnull=True, date_debut_traitement__lt=abandon)
+            )
+            .order_by('date_creation', 'id')
+            .first()
+        )
+        if tache is None:
+            return None
+        tache.statut = StatutTache.EN_COURS
+        tache.date_debut_traitement = tache.date_progression = timezone.now()
+        tache.progression = 0
+        tache.etape = ''
+        tache.erreur = None
+        tache.resultat = None
+        tache.save(update_fields=[
+            'statut', 'date_debut_traitement', 'date_progression', 'progression', 'etape', 'erreur', 'resultat'
+        ])
+    return tache
+
+
+def annuler_tache(tache):
+    """
+    Annule une tâche en attente, ou demande l'arrêt d'une tâche en cours
+
+    Returns:
+        bool: False si la tâche est déjà terminée (TERMINE, ECHEC, ANNULE)
+    """
+    annulee = TacheRapport.objects.filter(pk=tache.pk, statut=StatutTache.EN_ATTENTE).update(
+        statut=StatutTache.ANNULE, date_fin_traitement=timezone.now()
+    )
+    if not annulee:
+        annulee = TacheRapport.objects.filter(pk=tache.pk, statut=StatutTache.EN_COURS).update(
+            annulation_demandee=True
+        )
+    tache.refresh_from_db()
+    return bool(annulee)
+
+
+def _reservation(tache):
+    """Tâche telle que réservée par ce worker (encore EN_COURS, même date de réservation)"""
+    return TacheRapport.objects.filter(
+        pk=tache.pk, statut=StatutTache.EN_COURS, date_debut_traitement=tache.date_debut_traitement
+    )
+
+
+def _avancer(tache, progression, etape):
+    """
+    Enregistre l'avancement de la tâche et l'activité du worker
+
+    Lève TacheReprise si la tâche a été réservée par un autre worker,
+    TacheAnnulee si l'annulation a été demandée.
+    """
+    if not _reservation(tache).update(progression=progression, etape=etape, date_progression=timezone.now()):
+        raise TacheReprise()
+    if TacheRapport.objects.filter(pk=tache.pk, annulation_demandee=True).exists():
+        raise TacheAnnulee()
+
+
+# =====================================================
+# EXÉCUTION
+# =====================================================
+
+def nom_fichier_releve(parametres):
+    """Nom du fichier PDF d'un relevé de compte (sans extension)"""
+    if parametres.get('membre_id'):
+        nom = f"releve_compte_membre_{parametres['membre_id']}"
+    else:
+        nom = f"releve_compte_client_{parametres['client_id']}"
+    if parametres.get('date_debut') and parametres.get('date_fin'):
+        nom += f"_{parametres['date_debut'].replace('-', '')}_{parametres['date_fin'].replace('-', '')}"
+    return nom
+
+
+def _executer_rapport(tache):
+    """Génère le rapport, le sauvegarde et l'envoie par email si demandé"""
+    parametres = tache.parametres
+    _avancer(tache, 10, 'Génération du rapport')
+    contenu = generer_contenu_rapport(
+        parametres['type_rapport'],
+        parametres.get('periode_mois'),
+        parametres.get('periode_annee'),
+        parametres.get('pourcentage_frais_gestion', 20.0),
+        parametres.get('type_operation')
+    )
+
+    _avancer(tache, 70, 'Sauvegarde du rapport')
+    envoyer_email = parametres.get('envoyer_email') and parametres.get('destinataire_email')
+    resultat = {}
+    if parametres.get('sauvegarder', True) or envoyer_email:
+        tache.rapport = sauvegarder_rapport(
+            parametres['type_rapport'], contenu, parametres.get('periode_mois'), parametres.get('periode_annee')
+        )
+        # Le rapport reste rattaché à la tâche même si elle est annulée avant l'envoi
+        _reservation(tache).update(rapport=tache.rapport)
+    else:
+        resultat['rapport'] = contenu
+
+    if envoyer_email:
+        _avancer(tache, 85, 'Envoi de l\'email')
+        envoi = envoyer_email_rapport(tache.rapport, parametres['destinataire_email'])
+        resultat['envoi_id'] = envoi.id
+        resultat['envoi_statut'] = envoi.statut
+    tache.resultat = resultat or None
+
+
+def _executer_releve(tache):
+    """Génère le relevé de compte PDF et l'enregistre dans le stockage"""
+    parametres = tache.parametres
+    _avancer(tache, 10, 'Génération du relevé')
+    pdf_buffer = generate_account_statement(
+        membre_id=parametres.get('membre_id'),
+        client_id=parametres.get('client_id'),
+        date_debut=date.fromisoformat(parametres['date_debut']) if parametres.get('date_debut') else None,
+        date_fin=date.fromisoformat(parametres['date_fin']) if parametres.get('date_fin') else None
+    )
+    if not pdf_buffer:
+        raise ValueError('Membre/Client non trouvé ou aucune opération')
+
+    _avancer(tache, 90, 'Enregistrement du relevé')
+    tache.fichier.save(f'{nom_fichier_releve(parametres)}.pdf', ContentFile(pdf_buffer.getvalue()), save=False)
+
+
+EXECUTEURS = {
+    TypeTache.RAPPORT: _executer_rapport,
+    TypeTache.RELEVE: _executer_releve,
+}
+
+
+def executer_tache(tache):
+    """
+    Exécute une tâche réservée (EN_COURS) et enregistre son résultat
+
+    Le résultat n'est enregistré que si la tâche est toujours réservée par ce worker : une
+    exécution remplacée par une reprise (reclamer_tache) n'écrase pas celle qui l'a reprise.
+
+    Returns:
+        TacheRapport: Tâche mise à jour (TERMINE, ECHEC ou ANNULE), ou telle qu'enregistrée
+        par le worker qui l'a reprise
+    """
+    champs = ['statut', 'erreur', 'rapport', 'fichier', 'resultat', 'date_fin_traitement']
+    try:
+        EXECUTEURS[tache.type_tache](tache)
+        tache.statut = StatutTache.TERMINE
+        tache.progression = 100
+        tache.etape = 'Terminé'
+        champs += ['progression', 'etape']
+    except TacheReprise:
+        pass
+    except TacheAnnulee:
+        tache.statut = StatutTache.ANNULE
+    except Exception as e:
+        tache.statut = StatutTache.ECHEC
+        tache.erreur = str(e)
+    tache.date_fin_traitement = timezone.now()
+    if tache.statut == StatutTache.EN_COURS or not _reservation(tache).update(
+        **{champ: getattr(tache, champ) for champ in champs}
+    ):
+        # Tâche reprise par un autre worker : le relevé déjà écrit par cette exécution n'est pas servi
+        if tache.fichier:
+            tache.fichier.delete(save=False)
+        return TacheRapport.objects.get(pk=tache.pk)
+    return tache
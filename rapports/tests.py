@@ -1,3 +1,71 @@
-from django.test import TestCase
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import TacheRapport, TypeTache, StatutTache
+from .taches import creer_tache, reclamer_tache, executer_tache
+
+
+def echouer(tache):
+    raise ValueError('Exécution remplacée')
+
+
+@override_settings(TACHES_RAPPORTS_DELAI_REPRISE=60)
+class RepriseTachesTests(TestCase):
+    """File de tâches (rapports.taches) : reprise sur l'activité du worker, exécution remplacée"""
+
+    def setUp(self):
+        self.tache = creer_tache(TypeTache.RELEVE, {'membre_id': 1})
+
+    def vieillir(self, **dates):
+        TacheRapport.objects.filter(pk=self.tache.pk).update(
+            **{champ: timezone.now() - timedelta(seconds=secondes) for champ, secondes in dates.items()}
+        )
+
+    def test_reprise_sur_activite(self):
+        self.assertEqual(reclamer_tache().pk, self.tache.pk)
+        # Réservée depuis longtemps mais active récemment : pas reprise
+        self.vieillir(date_debut_traitement=3600, date_progression=10)
+        self.assertIsNone(reclamer_tache())
+        # Sans activité depuis le délai : reprise, sans l'erreur d'une exécution précédente
+        self.vieillir(date_progression=120)
+        TacheRapport.objects.filter(pk=self.tache.pk).update(erreur='Erreur précédente')
+        reprise = reclamer_tache()
+        self.assertEqual(reprise.pk, self.tache.pk)
+        reprise.refresh_from_db()
+        self.assertIsNone(reprise.erreur)
+        self.assertGreater(reprise.date_progression, timezone.now() - timedelta(seconds=60))
+
+    def test_execution_remplacee(self):
+        premiere = reclamer_tache()
+        self.vieillir(date_progression=120)
+        seconde = reclamer_tache()
+        self.assertNotEqual(premiere.date_debut_traitement, seconde.date_debut_traitement)
+
+        # L'exécution remplacée s'arrête à sa première étape, sans échec ni résultat
+        with mock.patch('rapports.taches.generate_account_statement') as generer:
+            executer_tache(premiere)
+        generer.assert_not_called()
+        self.tache.refresh_from_db()
+        self.assertEqual(self.tache.statut, StatutTache.EN_COURS)
+        self.assertIsNone(self.tache.erreur)
+
+        # Une erreur de l'exécution remplacée après sa dernière étape n'est pas enregistrée non plus
+        with mock.patch.dict('rapports.taches.EXECUTEURS', {TypeTache.RELEVE: echouer}):
+            executer_tache(premiere)
+        self.tache.refresh_from_db()
+        self.assertEqual(self.tache.statut, StatutTache.EN_COURS)
+        self.assertIsNone(self.tache.erreur)
+
+        # Le worker qui a repris la tâche enregistre son résultat
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media), \
+                mock.patch('rapports.taches.generate_account_statement', return_value=BytesIO(b'%PDF')):
+            executer_tache(seconde)
+            self.tache.refresh_from_db()
+            self.assertEqual(self.tache.statut, StatutTache.TERMINE)
+            self.assertIsNone(self.tache.erreur)
+            self.assertTrue(self.tache.fichier.name.startswith('taches/releves/releve_compte_membre_1'))
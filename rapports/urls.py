@@ -3,12 +3,14 @@ URLs pour l'application rapports
 """
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import RapportViewSet, EnvoiEmailViewSet, ReceiptViewSet
+from .views import RapportViewSet, EnvoiEmailViewSet, ReceiptViewSet, LotDocumentsViewSet, TacheRapportViewSet
 
 router = DefaultRouter()
 router.register(r'rapports', RapportViewSet, basename='rapport')
 router.register(r'envois-emails', EnvoiEmailViewSet, basename='envoi-email')
 router.register(r'receipts', ReceiptViewSet, basename='receipt')
+router.register(r'lots-documents', LotDocumentsViewSet, basename='lot-documents')
+router.register(r'taches-rapports', TacheRapportViewSet, basename='tache-rapport')
 
 urlpatterns = [
     path('', include(router.urls)),
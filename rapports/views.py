@@ -1,44 +1,91 @@
 """
 Vues pour l'API des rapports et envois d'emails
 """
-from rest_framework import viewsets, status
+import hashlib
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.http import HttpResponse
+from django.core.files.storage import default_storage
+from django.http import FileResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 from coopec.pagination import StandardResultsSetPagination
-from .models import Rapport, EnvoiEmail
+from users.permissions import IsAdminOrSuperAdmin
+from .models import Rapport, EnvoiEmail, LotDocuments, StatutLot, TacheRapport, TypeTache, StatutTache
 from .serializers import (
     RapportSerializer,
     EnvoiEmailSerializer,
     GenererRapportSerializer,
-    EnvoyerRapportSerializer
+    EnvoyerRapportSerializer,
+    LotDocumentsSerializer,
+    TacheRapportSerializer
 )
 from .services import (
-    generer_rapport_apports,
-    generer_rapport_interets,
-    generer_rapport_caisse,
-    generer_rapport_credits,
-    generer_rapport_operations,
-    generer_rapport_mensuel,
-    generer_rapport_annuel,
-    sauvegarder_rapport,
     envoyer_email_rapport,
     envoyer_rapport_membre
 )
-from .receipts import (
-    generate_receipt_depot_epargne,
-    generate_receipt_versement_part_sociale,
-    generate_receipt_retrait,
-    generate_receipt_credit,
-    generate_receipt_remboursement,
-    generate_receipt_frais_adhesion,
-    generate_receipt_transaction
-)
-from .account_statement import generate_account_statement
+from .rapport_pdf import enregistrer_pdf_rapport, nom_fichier_rapport
+from .receipt_store import obtenir_recu
+from .taches import creer_tache, obtenir_ou_creer_tache, annuler_tache, nom_fichier_releve
+from users.models import Membre, Client
 from datetime import date
 
+
+def reponse_tache(request, tache, message):
+    """Réponse 202 Accepted d'une tâche mise en file, avec l'URL de suivi (Location)"""
+    response = Response({
+        'message': message,
+        'tache': TacheRapportSerializer(tache).data
+    }, status=status.HTTP_202_ACCEPTED)
+    response['Location'] = request.build_absolute_uri(reverse('tache-rapport-detail', args=[tache.id]))
+    return response
+
+
+def reponse_fichier_stocke(request, chemin, nom_fichier, etag=None, last_modified=None):
+    """
+    Sert un fichier PDF du stockage avec ETag / Last-Modified.
+    Retourne 304 Not Modified si le client possède déjà cette version du fichier.
+    Sans ETag fourni, il est calculé à partir du chemin et de la date d'écriture du fichier.
+    """
+    if etag is None:
+        try:
+            last_modified = default_storage.get_modified_time(chemin)
+        except NotImplementedError:
+            last_modified = None
+        etag = '"%s"' % hashlib.md5(f'{chemin}:{last_modified}'.encode('utf-8')).hexdigest()
+
+    last_modified = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = FileResponse(default_storage.open(chemin, 'rb'), content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="{nom_fichier}"'
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    # Le navigateur garde le fichier mais revalide à chaque fois (réponse 304 si inchangé)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def reponse_recu(request, type_operation, operation_id, message_introuvable):
+    """
+    Sert le reçu PDF stocké d'une opération (généré au premier appel) avec ETag / Last-Modified.
+    Retourne 304 Not Modified si le client possède déjà cette version du reçu.
+    """
+    recu = obtenir_recu(type_operation, operation_id)
+    if recu is None:
+        return Response(
+            {'error': message_introuvable},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    return reponse_fichier_stocke(
+        request, recu.chemin, f'receipt_{type_operation}_{operation_id}.pdf',
+        etag=recu.etag, last_modified=recu.last_modified
+    )
+
 @extend_schema(tags=['Rapports'])
 class RapportViewSet(viewsets.ModelViewSet):
     """
@@ -48,16 +95,48 @@ class RapportViewSet(viewsets.ModelViewSet):
     serializer_class = RapportSerializer
     pagination_class = StandardResultsSetPagination
     
+    def perform_create(self, serializer):
+        enregistrer_pdf_rapport(serializer.save())
+    
+    def perform_update(self, serializer):
+        # Le PDF reflète toujours le contenu enregistré
+        enregistrer_pdf_rapport(serializer.save())
+    
+    def perform_destroy(self, instance):
+        if instance.fichier_pdf:
+            instance.fichier_pdf.delete(save=False)
+        instance.delete()
+    
+    @extend_schema(
+        summary="Télécharger le PDF d'un rapport",
+        description="PDF stocké du rapport, avec ETag / Last-Modified (304 si inchangé)",
+        responses={(200, 'application/pdf'): OpenApiTypes.BINARY},
+        tags=['Rapports']
+    )
+    @action(detail=True, methods=['get'])
+    def pdf(self, request, pk=None):
+        """
+        Télécharge le PDF stocké d'un rapport (rendu au premier appel pour les anciens rapports)
+        
+        GET /api/rapports/{id}/pdf/
+        """
+        rapport = self.get_object()
+        if not rapport.fichier_pdf or not default_storage.exists(rapport.fichier_pdf.name):
+            enregistrer_pdf_rapport(rapport)
+        return reponse_fichier_stocke(request, rapport.fichier_pdf.name, nom_fichier_rapport(rapport))
+    
     @extend_schema(
         summary="Générer un rapport",
-        description="Génère un nouveau rapport selon le type spécifié (MENSUEL, ANNUEL, APPORTS, INTERETS, CAISSE, CREDITS, OPERATIONS)",
+        description="Met en file la génération d'un rapport selon le type spécifié (MENSUEL, ANNUEL, APPORTS, INTERETS, CAISSE, CREDITS, OPERATIONS). "
+                    "Réponse 202 avec la tâche à suivre sur /api/taches-rapports/{id}/",
         request=GenererRapportSerializer,
+        responses={202: TacheRapportSerializer},
         tags=['Rapports']
     )
     @action(detail=False, methods=['post'])
     def generer(self, request):
         """
-        Génère un nouveau rapport
+        Met en file la génération d'un nouveau rapport (réponse 202 avec l'ID de la tâche)
         
         POST /api/rapports/generer/
         {
@@ -80,61 +159,24 @@ class RapportViewSet(viewsets.ModelViewSet):
         envoyer_email = data.get('envoyer_email', False)
         destinataire_email = data.get('destinataire_email')
         
-        try:
-            # Générer le rapport selon le type
-            if type_rapport == 'APPORTS':
-                contenu = generer_rapport_apports(periode_mois, periode_annee)
-            elif type_rapport == 'INTERETS':
-                pourcentage = data.get('pourcentage_frais_gestion', 20.0)
-                contenu = generer_rapport_interets(pourcentage, periode_mois, periode_annee)
-            elif type_rapport == 'CAISSE':
-                contenu = generer_rapport_caisse()
-            elif type_rapport == 'CREDITS':
-                contenu = generer_rapport_credits()
-            elif type_rapport == 'OPERATIONS':
-                type_operation = data.get('type_operation')
-                contenu = generer_rapport_operations(periode_mois, periode_annee, type_operation)
-            elif type_rapport == 'MENSUEL':
-                if not periode_mois:
-                    return Response(
-                        {'error': 'periode_mois est requis pour un rapport mensuel'},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                contenu = generer_rapport_mensuel(periode_mois, periode_annee)
-            elif type_rapport == 'ANNUEL':
-                contenu = generer_rapport_annuel(periode_annee)
-            else:
-                return Response(
-                    {'error': f'Type de rapport non supporté: {type_rapport}'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Sauvegarder si demandé
-            rapport = None
-            if sauvegarder:
-                rapport = sauvegarder_rapport(type_rapport, contenu, periode_mois, periode_annee)
-                contenu['rapport_id'] = rapport.id
-            
-            # Envoyer par email si demandé
-            envoi = None
-            if envoyer_email and destinataire_email:
-                if not rapport:
-                    rapport = sauvegarder_rapport(type_rapport, contenu, periode_mois, periode_annee)
-                envoi = envoyer_email_rapport(rapport, destinataire_email)
-                contenu['envoi_id'] = envoi.id
-            
-            return Response({
-                'message': 'Rapport généré avec succès',
-                'rapport': contenu,
-                'rapport_sauvegarde': RapportSerializer(rapport).data if rapport else None,
-                'envoi': EnvoiEmailSerializer(envoi).data if envoi else None
-            }, status=status.HTTP_201_CREATED)
-            
-        except Exception as e:
+        if type_rapport == 'MENSUEL' and not periode_mois:
             return Response(
-                {'error': f'Erreur lors de la génération du rapport: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {'error': 'periode_mois est requis pour un rapport mensuel'},
+                status=status.HTTP_400_BAD_REQUEST
             )
+        
+        # Génération, sauvegarde et envoi par le worker (traiter_taches_rapports)
+        tache = creer_tache(TypeTache.RAPPORT, {
+            'type_rapport': type_rapport,
+            'periode_mois': periode_mois,
+            'periode_annee': periode_annee,
+            'pourcentage_frais_gestion': data.get('pourcentage_frais_gestion', 20.0),
+            'type_operation': data.get('type_operation'),
+            'sauvegarder': sauvegarder,
+            'envoyer_email': envoyer_email,
+            'destinataire_email': destinataire_email
+        }, request.user)
+        return reponse_tache(request, tache, 'Génération du rapport en file d\'attente')
     
     @action(detail=True, methods=['post'])
     def envoyer(self, request, pk=None):
@@ -220,16 +262,7 @@ class ReceiptViewSet(viewsets.ViewSet):
             )
         
         try:
-            pdf_buffer = generate_receipt_depot_epargne(int(donnat_epargne_id))
-            if not pdf_buffer:
-                return Response(
-                    {'error': 'Dépôt d\'épargne non trouvé'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
-            
-            response = HttpResponse(pdf_buffer.read(), content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="receipt_depot_epargne_{donnat_epargne_id}.pdf"'
-            return response
+            return reponse_recu(request, 'depot_epargne', int(donnat_epargne_id), 'Dépôt d\'épargne non trouvé')
         except Exception as e:
             return Response(
                 {'error': f'Erreur lors de la génération du reçu: {str(e)}'},
@@ -259,16 +292,7 @@ class ReceiptViewSet(viewsets.ViewSet):
             )
         
         try:
-            pdf_buffer = generate_receipt_versement_part_sociale(int(donnat_part_social_id))
-            if not pdf_buffer:
-                return Response(
-                    {'error': 'Versement de part sociale non trouvé'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
-            
-            response = HttpResponse(pdf_buffer.read(), content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="receipt_versement_part_sociale_{donnat_part_social_id}.pdf"'
-            return response
+            return reponse_recu(request, 'versement_part_sociale', int(donnat_part_social_id), 'Versement de part sociale non trouvé')
         except Exception as e:
             return Response(
                 {'error': f'Erreur lors de la génération du reçu: {str(e)}'},
@@ -298,16 +322,7 @@ class ReceiptViewSet(viewsets.ViewSet):
             )
         
         try:
-            pdf_buffer = generate_receipt_retrait(int(retrait_id))
-            if not pdf_buffer:
-                return Response(
-                    {'error': 'Retrait non trouvé'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
-            
-            response = HttpResponse(pdf_buffer.read(), content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="receipt_retrait_{retrait_id}.pdf"'
-            return response
+            return reponse_recu(request, 'retrait', int(retrait_id), 'Retrait non trouvé')
         except Exception as e:
             return Response(
                 {'error': f'Erreur lors de la génération du reçu: {str(e)}'},
@@ -337,16 +352,7 @@ class ReceiptViewSet(viewsets.ViewSet):
             )
         
         try:
-            pdf_buffer = generate_receipt_credit(int(credit_id))
-            if not pdf_buffer:
-                return Response(
-                    {'error': 'Crédit non trouvé'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
-            
-            response = HttpResponse(pdf_buffer.read(), content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="receipt_credit_{credit_id}.pdf"'
-            return response
+            return reponse_recu(request, 'credit', int(credit_id), 'Crédit non trouvé')
         except Exception as e:
             return Response(
                 {'error': f'Erreur lors de la génération du reçu: {str(e)}'},
@@ -376,16 +382,7 @@ class ReceiptViewSet(viewsets.ViewSet):
             )
         
         try:
-            pdf_buffer = generate_receipt_remboursement(int(remboursement_id))
-            if not pdf_buffer:
-                return Response(
-                    {'error': 'Remboursement non trouvé'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
-            
-            response = HttpResponse(pdf_buffer.read(), content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="receipt_remboursement_{remboursement_id}.pdf"'
-            return response
+            return reponse_recu(request, 'remboursement', int(remboursement_id), 'Remboursement non trouvé')
         except Exception as e:
             return Response(
                 {'error': f'Erreur lors de la génération du reçu: {str(e)}'},
@@ -415,16 +412,7 @@ class ReceiptViewSet(viewsets.ViewSet):
             )
         
         try:
-            pdf_buffer = generate_receipt_frais_adhesion(int(frais_adhesion_id))
-            if not pdf_buffer:
-                return Response(
-                    {'error': 'Frais d\'adhésion non trouvé'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
-            
-            response = HttpResponse(pdf_buffer.read(), content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="receipt_frais_adhesion_{frais_adhesion_id}.pdf"'
-            return response
+            return reponse_recu(request, 'frais_adhesion', int(frais_adhesion_id), 'Frais d\'adhésion non trouvé')
         except Exception as e:
             return Response(
                 {'error': f'Erreur lors de la génération du reçu: {str(e)}'},
@@ -454,16 +442,7 @@ class ReceiptViewSet(viewsets.ViewSet):
             )
         
         try:
-            pdf_buffer = generate_receipt_transaction(int(operation_id))
-            if not pdf_buffer:
-                return Response(
-                    {'error': 'Opération non trouvée'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
-            
-            response = HttpResponse(pdf_buffer.read(), content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="receipt_operation_{operation_id}.pdf"'
-            return response
+            return reponse_recu(request, 'operation', int(operation_id), 'Opération non trouvée')
         except Exception as e:
             return Response(
                 {'error': f'Erreur lors de la génération du reçu: {str(e)}'},
@@ -472,19 +451,22 @@ class ReceiptViewSet(viewsets.ViewSet):
     
     @extend_schema(
         summary="Relevé de compte",
-        description="Génère un relevé de compte PDF pour un membre ou un client avec toutes ses OPERATIONS",
+        description="Met en file la génération du relevé de compte PDF d'un membre ou d'un client. "
+                    "Réponse 202 avec la tâche à suivre ; le PDF se télécharge sur /api/taches-rapports/{id}/telecharger/. "
+                    "Une demande identique en attente, en cours ou terminée récemment est réutilisée.",
         parameters=[
             OpenApiParameter(name='membre_id', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, required=False, description='ID du membre'),
             OpenApiParameter(name='client_id', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, required=False, description='ID du client'),
             OpenApiParameter(name='date_debut', type=OpenApiTypes.DATE, location=OpenApiParameter.QUERY, required=False, description='Date de début (format: YYYY-MM-DD)'),
             OpenApiParameter(name='date_fin', type=OpenApiTypes.DATE, location=OpenApiParameter.QUERY, required=False, description='Date de fin (format: YYYY-MM-DD)')
         ],
+        responses={202: TacheRapportSerializer},
         tags=['Rapports']
     )
     @action(detail=False, methods=['get'])
     def releve_compte(self, request):
         """
-        Génère un relevé de compte PDF pour un membre ou un client
+        Met en file la génération d'un relevé de compte PDF pour un membre ou un client
         
         GET /api/receipts/releve_compte/?membre_id=1&date_debut=2025-01-01&date_fin=2025-12-31
         GET /api/receipts/releve_compte/?client_id=1&date_debut=2025-01-01&date_fin=2025-12-31
@@ -528,34 +510,157 @@ class ReceiptViewSet(viewsets.ViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
         
+        modele, titulaire_id = (Membre, membre_id) if membre_id else (Client, client_id)
         try:
-            pdf_buffer = generate_account_statement(
-                membre_id=int(membre_id) if membre_id else None,
-                client_id=int(client_id) if client_id else None,
-                date_debut=date_debut,
-                date_fin=date_fin
+            titulaire_existe = modele.objects.filter(id=int(titulaire_id)).exists()
+        except ValueError:
+            titulaire_existe = False
+        if not titulaire_existe:
+            return Response(
+                {'error': 'Membre/Client non trouvé'},
+                status=status.HTTP_404_NOT_FOUND
             )
-            
-            if not pdf_buffer:
-                return Response(
-                    {'error': 'Membre/Client non trouvé ou aucune opération'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
-            
-            # Nom du fichier
-            if membre_id:
-                filename = f"releve_compte_membre_{membre_id}"
-            else:
-                filename = f"releve_compte_client_{client_id}"
-            
-            if date_debut and date_fin:
-                filename += f"_{date_debut.strftime('%Y%m%d')}_{date_fin.strftime('%Y%m%d')}"
-            
-            response = HttpResponse(pdf_buffer.read(), content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="{filename}.pdf"'
-            return response
-        except Exception as e:
+        
+        # Le PDF (potentiellement des milliers de lignes) est généré par le worker ;
+        # un GET répété renvoie la tâche déjà en file (ou terminée récemment) pour ce relevé
+        tache, creee = obtenir_ou_creer_tache(TypeTache.RELEVE, {
+            'membre_id': int(membre_id) if membre_id else None,
+            'client_id': int(client_id) if client_id else None,
+            'date_debut': date_debut.isoformat() if date_debut else None,
+            'date_fin': date_fin.isoformat() if date_fin else None
+        }, request.user)
+        if not creee:
+            return reponse_tache(request, tache, 'Relevé déjà demandé : tâche existante')
+        return reponse_tache(request, tache, 'Génération du relevé en file d\'attente')
+
+@extend_schema(tags=['Rapports'])
+class LotDocumentsViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    ViewSet pour la génération en lot de documents PDF (ADMIN et SUPERADMIN)
+    - POST : crée un lot EN_ATTENTE (relevés de tous les titulaires ou reçus d'une période)
+    - GET : suit l'avancement (traites / total, progression)
+    Les lots sont générés par : python manage.py generer_lot_documents --en-attente
+    """
+    queryset = LotDocuments.objects.all()
+    serializer_class = LotDocumentsSerializer
+    pagination_class = StandardResultsSetPagination
+    permission_classes = [IsAdminOrSuperAdmin]
+    
+    @extend_schema(
+        summary="Télécharger l'archive ZIP d'un lot",
+        responses={(200, 'application/zip'): OpenApiTypes.BINARY},
+        tags=['Rapports']
+    )
+    @action(detail=True, methods=['get'])
+    def telecharger(self, request, pk=None):
+        """
+        Télécharge l'archive ZIP d'un lot terminé
+        
+        GET /api/lots-documents/1/telecharger/
+        """
+        lot = self.get_object()
+        if lot.statut != StatutLot.TERMINE or not lot.fichier_zip:
             return Response(
-                {'error': f'Erreur lors de la génération du relevé: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+                {'error': f'Le lot n\'est pas terminé (statut: {lot.statut}, {lot.traites}/{lot.total} documents)'},
+                status=status.HTTP_409_CONFLICT
+            )
+        response = FileResponse(lot.fichier_zip.open('rb'), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="{lot.fichier_zip.name.rsplit("/", 1)[-1]}"'
+        return response
+    
+    @extend_schema(
+        summary="Reprendre un lot",
+        description=(
+            "Remet EN_ATTENTE un lot en échec, ou un lot EN_COURS interrompu (sans progression depuis "
+            "LOTS_DOCUMENTS_DELAI_REPRISE secondes) ; les PDF déjà générés sont conservés"
+        ),
+        request=None,
+        tags=['Rapports']
+    )
+    @action(detail=True, methods=['post'])
+    def reprendre(self, request, pk=None):
+        """
+        Remet en file un lot en échec ou interrompu
+        
+        Un lot EN_COURS dont le traitement progresse encore ne peut pas être repris :
+        il serait traité deux fois en parallèle.
+        
+        POST /api/lots-documents/1/reprendre/
+        """
+        lot = self.get_object()
+        if lot.statut != StatutLot.ECHEC and not lot.interrompu:
+            return Response(
+                {'error': f'Seul un lot en échec ou interrompu peut être repris (statut: {lot.statut})'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # Mise à jour conditionnelle : le lot n'a pas changé depuis sa lecture (reprise concurrente)
+        repris = LotDocuments.objects.filter(
+            pk=lot.pk, statut=lot.statut, date_progression=lot.date_progression
+        ).update(statut=StatutLot.EN_ATTENTE)
+        if not repris:
+            return Response(
+                {'error': 'Le lot a été modifié entre-temps, réessayez'},
+                status=status.HTTP_409_CONFLICT
+            )
+        lot.refresh_from_db()
+        return Response(self.get_serializer(lot).data)
+
+
+@extend_schema(tags=['Rapports'])
+class TacheRapportViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    ViewSet pour suivre les tâches de génération en arrière-plan (rapports, relevés)
+    - GET : statut, progression et résultat (rapport, fichier)
+    - POST annuler : annule une tâche en attente ou arrête une tâche en cours
+    Les administrateurs voient toutes les tâches, les autres utilisateurs leurs propres tâches.
+    """
+    serializer_class = TacheRapportSerializer
+    pagination_class = StandardResultsSetPagination
+    
+    def get_queryset(self):
+        queryset = TacheRapport.objects.all()
+        if self.request.user.user_type not in ['ADMIN', 'SUPERADMIN']:
+            queryset = queryset.filter(demandeur=self.request.user)
+        return queryset
+    
+    @extend_schema(
+        summary="Annuler une tâche",
+        request=None,
+        tags=['Rapports']
+    )
+    @action(detail=True, methods=['post'])
+    def annuler(self, request, pk=None):
+        """
+        Annule une tâche en attente, ou demande l'arrêt d'une tâche en cours
+        
+        POST /api/taches-rapports/1/annuler/
+        """
+        tache = self.get_object()
+        if not annuler_tache(tache):
+            return Response(
+                {'error': f'La tâche est déjà terminée (statut: {tache.statut})'},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response(self.get_serializer(tache).data)
+    
+    @extend_schema(
+        summary="Télécharger le PDF d'une tâche terminée",
+        responses={(200, 'application/pdf'): OpenApiTypes.BINARY},
+        tags=['Rapports']
+    )
+    @action(detail=True, methods=['get'])
+    def telecharger(self, request, pk=None):
+        """
+        Télécharge le relevé de compte PDF d'une tâche terminée
+        
+        GET /api/taches-rapports/1/telecharger/
+        """
+        tache = self.get_object()
+        if tache.statut != StatutTache.TERMINE or not tache.fichier:
+            return Response(
+                {'error': f'Aucun fichier disponible (statut: {tache.statut}, {tache.progression} %)'},
+                status=status.HTTP_409_CONFLICT
+            )
+        response = FileResponse(tache.fichier.open('rb'), content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="{nom_fichier_releve(tache.parametres)}.pdf"'
+        return response
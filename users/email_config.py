@@ -1,15 +1,24 @@
 """
 Gestion dynamique de la configuration SMTP
 Les paramètres sont stockés en mémoire (pas en base de données)
+
+Les connexions SMTP authentifiées sont réutilisées via un pool par processus
+(voir PooledEmailBackend) : un envoi ne repaie pas la poignée de main TCP + TLS + AUTH.
+Le pool est vidé à chaque changement de configuration (set_smtp_config / clear_smtp_config).
 """
 from django.core.mail.backends.smtp import EmailBackend
 from django.conf import settings
 import threading
+import time
 
 # Stockage thread-safe des paramètres SMTP dynamiques
 _smtp_config = {}
 _config_lock = threading.Lock()
 
+# Pool de connexions SMTP inactives : {cle_config: [(connexion smtplib, date du dernier usage), ...]}
+_smtp_pool = {}
+_pool_lock = threading.Lock()
+
 
 def set_smtp_config(host=None, port=None, use_tls=None, use_ssl=None, 
                     host_user=None, host_password=None, default_from_email=None):
@@ -42,6 +51,9 @@ def set_smtp_config(host=None, port=None, use_tls=None, use_ssl=None,
             _smtp_config['host_password'] = host_password
         if default_from_email is not None:
             _smtp_config['default_from_email'] = default_from_email
+    
+    # Les connexions ouvertes avec l'ancienne configuration ne doivent plus être réutilisées
+    vider_pool_smtp()
 
 
 def get_smtp_config():
@@ -61,34 +73,171 @@ def get_smtp_config():
         return config
 
 
-def get_smtp_backend():
+def _get_smtp_parametres():
     """
-    Retourne une instance de EmailBackend configurée avec les paramètres dynamiques
-    ou les paramètres par défaut du settings.py
+    Retourne les paramètres de connexion SMTP (configuration dynamique, sinon settings.py)
     
     Returns:
-        EmailBackend: Backend SMTP configuré
+        dict: host, port, username, password, use_tls, use_ssl
     """
     global _smtp_config
     
     with _config_lock:
-        # Utiliser la configuration dynamique si elle existe, sinon utiliser settings.py
-        host = _smtp_config.get('host', getattr(settings, 'EMAIL_HOST', 'smtp.gmail.com'))
-        port = _smtp_config.get('port', getattr(settings, 'EMAIL_PORT', 587))
-        use_tls = _smtp_config.get('use_tls', getattr(settings, 'EMAIL_USE_TLS', True))
-        use_ssl = _smtp_config.get('use_ssl', getattr(settings, 'EMAIL_USE_SSL', False))
-        host_user = _smtp_config.get('host_user', getattr(settings, 'EMAIL_HOST_USER', ''))
-        host_password = _smtp_config.get('host_password', getattr(settings, 'EMAIL_HOST_PASSWORD', ''))
-    
-    return EmailBackend(
-        host=host,
-        port=port,
-        username=host_user,
-        password=host_password,
-        use_tls=use_tls,
-        use_ssl=use_ssl,
-        fail_silently=False
+        return {
+            'host': _smtp_config.get('host', getattr(settings, 'EMAIL_HOST', 'smtp.gmail.com')),
+            'port': _smtp_config.get('port', getattr(settings, 'EMAIL_PORT', 587)),
+            'username': _smtp_config.get('host_user', getattr(settings, 'EMAIL_HOST_USER', '')),
+            'password': _smtp_config.get('host_password', getattr(settings, 'EMAIL_HOST_PASSWORD', '')),
+            'use_tls': _smtp_config.get('use_tls', getattr(settings, 'EMAIL_USE_TLS', True)),
+            'use_ssl': _smtp_config.get('use_ssl', getattr(settings, 'EMAIL_USE_SSL', False)),
+        }
+
+
+def _fermer_connexion_smtp(connexion):
+    """Ferme une connexion smtplib en ignorant les erreurs (connexion déjà coupée, etc.)"""
+    try:
+        connexion.quit()
+    except Exception:
+        try:
+            connexion.close()
+        except Exception:
+            pass
+
+
+class PooledEmailBackend(EmailBackend):
+    """
+    EmailBackend SMTP dont les connexions sont empruntées au pool et y sont rendues.
+    
+    - open() réutilise une connexion inactive du pool si elle est encore valide
+      (même configuration, inactivité < SMTP_POOL_INACTIVITE, réponse au NOOP)
+    - close() rend la connexion au pool (dans la limite de SMTP_POOL_TAILLE) au lieu de la fermer
+    - abandonner() ferme la connexion sans la rendre au pool (après une erreur d'envoi)
+    
+    Le comportement reste celui d'EmailBackend pour les appelants : send_mail(connection=...),
+    EmailMessage.send(), with backend: ..., etc.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cle_pool = (self.host, self.port, self.username, self.password, self.use_tls, self.use_ssl)
+    
+    def open(self):
+        if self.connection:
+            return False
+        connexion = _emprunter_connexion_pool(self.cle_pool)
+        if connexion is not None:
+            self.connection = connexion
+            return True
+        return super().open()
+    
+    def close(self):
+        if self.connection is None:
+            return
+        connexion = self.connection
+        self.connection = None
+        if not _rendre_connexion_pool(self.cle_pool, connexion):
+            _fermer_connexion_smtp(connexion)
+    
+    def abandonner(self):
+        """Ferme la connexion sans la rendre au pool (connexion en erreur, à ne pas réutiliser)"""
+        if self.connection is None:
+            return
+        connexion = self.connection
+        self.connection = None
+        _fermer_connexion_smtp(connexion)
+
+
+def _emprunter_connexion_pool(cle):
+    """
+    Retire du pool une connexion valide pour cette configuration.
+    Les connexions expirées ou qui ne répondent plus au NOOP sont fermées.
+    
+    Returns:
+        smtplib.SMTP: Connexion authentifiée, ou None si le pool n'en a pas
+    """
+    inactivite_max = getattr(settings, 'SMTP_POOL_INACTIVITE', 60)
+    while True:
+        with _pool_lock:
+            connexions = _smtp_pool.get(cle)
+            if not connexions:
+                return None
+            connexion, dernier_usage = connexions.pop()
+        
+        # Vérifications hors du verrou (le NOOP est un aller-retour réseau)
+        if time.monotonic() - dernier_usage > inactivite_max:
+            _fermer_connexion_smtp(connexion)
+            continue
+        try:
+            if connexion.noop()[0] == 250:
+                return connexion
+        except Exception:
+            pass
+        _fermer_connexion_smtp(connexion)
+
+
+def _rendre_connexion_pool(cle, connexion):
+    """
+    Remet une connexion dans le pool si la configuration n'a pas changé et si le pool n'est pas plein.
+    
+    Returns:
+        bool: True si la connexion a été conservée
+    """
+    if getattr(connexion, 'sock', None) is None:
+        return False
+    parametres = _get_smtp_parametres()
+    cle_courante = (
+        parametres['host'], parametres['port'], parametres['username'],
+        parametres['password'], parametres['use_tls'], parametres['use_ssl'],
     )
+    if cle != cle_courante:
+        return False
+    with _pool_lock:
+        connexions = _smtp_pool.setdefault(cle, [])
+        if len(connexions) >= getattr(settings, 'SMTP_POOL_TAILLE', 4):
+            return False
+        connexions.append((connexion, time.monotonic()))
+    return True
+
+
+def vider_pool_smtp():
+    """
+    Ferme toutes les connexions inactives du pool SMTP.
+    Les connexions en cours d'utilisation seront fermées (et non rendues) à leur libération
+    si la configuration a changé.
+    """
+    with _pool_lock:
+        connexions = [connexion for liste in _smtp_pool.values() for connexion, _ in liste]
+        _smtp_pool.clear()
+    for connexion in connexions:
+        _fermer_connexion_smtp(connexion)
+
+
+def get_smtp_backend():
+    """
+    Retourne une instance de EmailBackend configurée avec les paramètres dynamiques
+    ou les paramètres par défaut du settings.py.
+    Les connexions SMTP sont réutilisées via le pool (voir PooledEmailBackend).
+    
+    Returns:
+        EmailBackend: Backend SMTP configuré
+    """
+    return PooledEmailBackend(fail_silently=False, **_get_smtp_parametres())
+
+
+def envoyer_emails_en_masse(messages):
+    """
+    Envoie plusieurs emails sur une seule session SMTP authentifiée
+    
+    Args:
+        messages (list): Instances EmailMessage / EmailMultiAlternatives (connexion non requise)
+    
+    Returns:
+        int: Nombre d'emails envoyés
+    """
+    if not messages:
+        return 0
+    with get_smtp_backend() as backend:
+        return backend.send_messages(messages)
 
 
 def get_default_from_email():
@@ -112,12 +261,5 @@ def clear_smtp_config():
     
     with _config_lock:
         _smtp_config.clear()
-
-
-
-
-
-
-
-
-
+    
+    vider_pool_smtp()
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.25 on 2026-10-16 22:47
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def initialiser_scores(apps, schema_editor):
+    """Initialise le résumé du score de crédit à partir des crédits existants"""
+    from django.db.models import Count, DecimalField, IntegerField, OuterRef, Subquery, Sum, Value
+    from django.db.models.functions import Coalesce
+
+    Membre = apps.get_model('users', 'Membre')
+    Client = apps.get_model('users', 'Client')
+    Credit = apps.get_model('credits', 'Credit')
+
+    decimal_field = DecimalField(max_digits=12, decimal_places=1)
+
+    for modele, champ in ((Membre, 'membre'), (Client, 'client')):
+        credits = Credit.objects.filter(**{champ: OuterRef('pk')}).order_by().values(champ)
+        modele.objects.update(
+            score_total=Coalesce(
+                Subquery(credits.annotate(total=Sum('score')).values('total'), output_field=decimal_field),
+                Value(Decimal('0.0')),
+                output_field=decimal_field
+            ),
+            score_nombre_credits=Coalesce(
+                Subquery(credits.annotate(nombre=Count('id')).values('nombre'), output_field=IntegerField()),
+                Value(0)
+            ),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_alter_client_options_alter_membre_options'),
+        ('credits', '0003_alter_credit_options_alter_remboursement_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='score_nombre_credits',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Nombre de crédits pris en compte dans le score'),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='score_total',
+            field=models.DecimalField(decimal_places=1, default=Decimal('0.0'), editable=False, help_text='Somme des scores des crédits', max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='membre',
+            name='score_nombre_credits',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Nombre de crédits pris en compte dans le score'),
+        ),
+        migrations.AddField(
+            model_name='membre',
+            name='score_total',
+            field=models.DecimalField(decimal_places=1, default=Decimal('0.0'), editable=False, help_text='Somme des scores des crédits', max_digits=12),
+        ),
+        migrations.RunPython(initialiser_scores, migrations.RunPython.noop),
+    ]
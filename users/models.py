@@ -3,6 +3,46 @@ from django.utils import timezone
 from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from datetime import datetime
+from decimal import Decimal
+from coopec.mixins import ChampsMaintenusMixin
+
+
+def calculer_resume_score(score_total, nombre_credits):
+    """
+    Calcule le score moyen, le pourcentage et la mention à partir du résumé stocké
+    (somme des scores et nombre de crédits du titulaire).
+    """
+    if not nombre_credits:
+        return {
+            'score_moyen': 10.0,
+            'pourcentage': 100.0,
+            'mention': 'A+',
+            'nombre_credits': 0
+        }
+    
+    score_moyen = float(Decimal(score_total) / Decimal(str(nombre_credits)))
+    pourcentage = score_moyen * 10  # Convertir sur 100 (10/10 = 100%)
+    
+    # Déterminer la mention selon le score moyen
+    if 9.0 <= score_moyen <= 10.0:
+        mention = 'A+'
+    elif 7.0 <= score_moyen < 9.0:
+        mention = 'A'
+    elif 5.0 <= score_moyen < 7.0:
+        mention = 'B'
+    elif 3.0 <= score_moyen < 5.0:
+        mention = 'C'
+    elif 1.0 <= score_moyen < 3.0:
+        mention = 'D'
+    else:
+        mention = 'D'
+    
+    return {
+        'score_moyen': round(score_moyen, 2),
+        'pourcentage': round(pourcentage, 2),
+        'mention': mention,
+        'nombre_credits': nombre_credits
+    }
 
 
 class Cooperative(models.Model):
@@ -43,7 +83,7 @@ class Cooperative(models.Model):
 
 
 
-class Membre(models.Model):
+class Membre(ChampsMaintenusMixin, models.Model):
     TYPE_MEMBRE_CHOICES = [
         ('PHYSIQUE', 'Personne physique'),
         ('MORALE', 'Personne morale (Entreprise)'),
@@ -83,6 +123,14 @@ class Membre(models.Model):
     forme_juridique = models.CharField(max_length=100, blank=True, null=True, help_text="Forme juridique (SARL, SA, etc.) (personne morale uniquement)")
     representant_legal = models.CharField(max_length=255, blank=True, null=True, help_text="Nom du représentant légal (personne morale uniquement)")
     secteur_activite = models.CharField(max_length=255, blank=True, null=True, help_text="Secteur d'activité (personne morale uniquement)")
+    
+    # Résumé du score de crédit, maintenu par credits/signals.py
+    # (recalcul complet : python manage.py recalculer_scores_credit)
+    score_total = models.DecimalField(max_digits=12, decimal_places=1, default=Decimal('0.0'), editable=False, help_text="Somme des scores des crédits")
+    score_nombre_credits = models.PositiveIntegerField(default=0, editable=False, help_text="Nombre de crédits pris en compte dans le score")
+    
+    # Jamais écrits par un save() complet (voir ChampsMaintenusMixin)
+    CHAMPS_MAINTENUS = ('score_total', 'score_nombre_credits')
 
     def save(self, *args, **kwargs):
         # Génération du numéro de compte si nécessaire
@@ -114,53 +162,10 @@ class Membre(models.Model):
     def calculer_score_moyen(self):
         """
         Calcule le score moyen basé sur tous les crédits du membre.
-        Retourne un tuple (score_moyen, pourcentage, mention)
+        Lit le résumé stocké (score_total, score_nombre_credits) : aucune requête sur les crédits.
+        Retourne un dict (score_moyen, pourcentage, mention, nombre_credits)
         """
-        from credits.models import Credit
-        from decimal import Decimal
-        
-        credits = Credit.objects.filter(membre=self)
-        
-        if not credits.exists():
-            return {
-                'score_moyen': 10.0,
-                'pourcentage': 100.0,
-                'mention': 'A+',
-                'nombre_credits': 0
-            }
-        
-        total_score = Decimal('0.0')
-        nombre_credits = 0
-        
-        for credit in credits:
-            # Chaque crédit a un score par défaut de 10/10 à l'octroi
-            score = credit.score if hasattr(credit, 'score') else Decimal('10.0')
-            total_score += score
-            nombre_credits += 1
-        
-        score_moyen = float(total_score / Decimal(str(nombre_credits)))
-        pourcentage = score_moyen * 10  # Convertir sur 100 (10/10 = 100%)
-        
-        # Déterminer la mention selon le score moyen
-        if 9.0 <= score_moyen <= 10.0:
-            mention = 'A+'
-        elif 7.0 <= score_moyen < 9.0:
-            mention = 'A'
-        elif 5.0 <= score_moyen < 7.0:
-            mention = 'B'
-        elif 3.0 <= score_moyen < 5.0:
-            mention = 'C'
-        elif 1.0 <= score_moyen < 3.0:
-            mention = 'D'
-        else:
-            mention = 'D'
-        
-        return {
-            'score_moyen': round(score_moyen, 2),
-            'pourcentage': round(pourcentage, 2),
-            'mention': mention,
-            'nombre_credits': nombre_credits
-        }
+        return calculer_resume_score(self.score_total, self.score_nombre_credits)
     
     def get_mention_score(self):
         """
@@ -183,7 +188,7 @@ class Membre(models.Model):
         verbose_name_plural = 'Membres'
 
 
-class Client(models.Model):
+class Client(ChampsMaintenusMixin, models.Model):
     numero_compte = models.CharField(max_length=20, unique=True, editable=False)
     nom = models.CharField(max_length=100)
     postnom = models.CharField(max_length=100, blank=True, null=True)
@@ -207,6 +212,14 @@ class Client(models.Model):
     photo_profil = models.ImageField(upload_to='clients/photos/', blank=True, null=True, help_text="Photo de profil (formats acceptés: JPG, PNG)")
     parrain = models.ForeignKey(Membre, on_delete=models.SET_NULL, null=True, blank=True, help_text="Membre qui a recommandé le client")
     actif = models.BooleanField(default=False, editable=False)
+    
+    # Résumé du score de crédit, maintenu par credits/signals.py
+    # (recalcul complet : python manage.py recalculer_scores_credit)
+    score_total = models.DecimalField(max_digits=12, decimal_places=1, default=Decimal('0.0'), editable=False, help_text="Somme des scores des crédits")
+    score_nombre_credits = models.PositiveIntegerField(default=0, editable=False, help_text="Nombre de crédits pris en compte dans le score")
+    
+    # Jamais écrits par un save() complet (voir ChampsMaintenusMixin)
+    CHAMPS_MAINTENUS = ('score_total', 'score_nombre_credits')
 
     def save(self, *args, **kwargs):
         # Génération du numéro de compte si nécessaire
@@ -237,53 +250,10 @@ class Client(models.Model):
     def calculer_score_moyen(self):
         """
         Calcule le score moyen basé sur tous les crédits du client.
-        Retourne un tuple (score_moyen, pourcentage, mention)
+        Lit le résumé stocké (score_total, score_nombre_credits) : aucune requête sur les crédits.
+        Retourne un dict (score_moyen, pourcentage, mention, nombre_credits)
         """
-        from credits.models import Credit
-        from decimal import Decimal
-        
-        credits = Credit.objects.filter(client=self)
-        
-        if not credits.exists():
-            return {
-                'score_moyen': 10.0,
-                'pourcentage': 100.0,
-                'mention': 'A+',
-                'nombre_credits': 0
-            }
-        
-        total_score = Decimal('0.0')
-        nombre_credits = 0
-        
-        for credit in credits:
-            # Chaque crédit a un score par défaut de 10/10 à l'octroi
-            score = credit.score if hasattr(credit, 'score') else Decimal('10.0')
-            total_score += score
-            nombre_credits += 1
-        
-        score_moyen = float(total_score / Decimal(str(nombre_credits)))
-        pourcentage = score_moyen * 10  # Convertir sur 100 (10/10 = 100%)
-        
-        # Déterminer la mention selon le score moyen
-        if 9.0 <= score_moyen <= 10.0:
-            mention = 'A+'
-        elif 7.0 <= score_moyen < 9.0:
-            mention = 'A'
-        elif 5.0 <= score_moyen < 7.0:
-            mention = 'B'
-        elif 3.0 <= score_moyen < 5.0:
-            mention = 'C'
-        elif 1.0 <= score_moyen < 3.0:
-            mention = 'D'
-        else:
-            mention = 'D'
-        
-        return {
-            'score_moyen': round(score_moyen, 2),
-            'pourcentage': round(pourcentage, 2),
-            'mention': mention,
-            'nombre_credits': nombre_credits
-        }
+        return calculer_resume_score(self.score_total, self.score_nombre_credits)
     
     def get_mention_score(self):
         """